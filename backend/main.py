@@ -1,30 +1,78 @@
 import os
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import weakref
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi import Query, Request
 from dotenv import load_dotenv
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+# Before the service imports: they read their settings from the environment at import time
+load_dotenv()
 
 from models import (
     TranscriptResponse,
     TTSRequest,
     TTSResponse,
     SessionCreateResponse,
+    ChatRequest,
+    ChatResponse,
     Course,
     Lesson,
     PracticeRequest,
+    PracticeBatchItem,
     PracticeResponse,
     PronunciationScore,
     UserProgress,
+    JobRequest,
+    JobStatus,
 )
-from services.stt import transcribe_audio
-from services.tts import synthesize
-from services import course_service
-from services.pronunciation import evaluate_pronunciation
+from services.stt import transcribe_audio, get_cache_stats as get_stt_cache_stats
+from services.streaming_stt import stream_transcript
+from services.preprocess import get_preprocess_stats
+from services.tts import synthesize_async, get_cache_stats as get_tts_cache_stats
+from services import tts
+from services import catalog_responses, course_service, lesson_audio, stats
+from services.audio import wav_duration_ms
+from services.pronunciation import evaluate_pronunciation_async
+from services import jobs, pronunciation, prompts, provider_client
+from services.concurrency import run_blocking, shutdown_executors
+from services import metrics
+from services.metrics import MetricsMiddleware, span
+from services.resilience import DeadlineExceeded, RequestBudgetMiddleware, get_breaker_stats
+from services.store import create_store
+from services.uploads import UploadLimitMiddleware, UploadTooLarge, read_upload
+from services.sessions import append_turn, new_session
+from services.llm import stream_chat
 
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lesson_audio.start()
+    pronunciation.load_cache()
+    # Static prompt prefixes for every course language (plus the default), built once
+    prompts.precompile(["French", *(c["targetLanguage"] for c in course_service.get_all_courses())])
+    jobs.start()
+    yield
+    await jobs.stop()
+    pronunciation.save_cache()
+    STORE.close()
+    provider_client.close_client()
+    shutdown_executors()
+
+app = FastAPI(title="Natulang Backend", version="0.3.0", lifespan=lifespan)
 
-app = FastAPI(title="Natulang Backend", version="0.3.0")
+# Per-request deadline that provider calls respect (REQUEST_BUDGET_SECONDS)
+app.add_middleware(RequestBudgetMiddleware)
+
+# 413 for multipart bodies over UPLOAD_MAX_REQUEST_BYTES, before they are spooled
+app.add_middleware(UploadLimitMiddleware)
+
+# Server-Timing headers + request latency histograms (see /metrics)
+app.add_middleware(MetricsMiddleware)
 
 # CORS configuration - allow Flutter app to connect
 app.add_middleware(
@@ -33,62 +81,245 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],  # catalog pagination
 )
 
-# In-memory stores (later replace with Redis/DB)
-SESSIONS: Dict[str, Dict] = {}
-USER_PROGRESS: Dict[str, UserProgress] = {}
+# Session & progress store (SQLite shared across workers, or in-memory; see STORE_BACKEND).
+# Its methods block, so request handlers call them on the "store" pool.
+STORE = create_store()
 
 def _ensure_session(session_id: str):
-    if session_id not in SESSIONS:
-        SESSIONS[session_id] = {"history": []}
-    return SESSIONS[session_id]
+    session = STORE.get_session(session_id)
+    if session is None:
+        session = new_session()
+        STORE.put_session(session_id, session)
+    return session
+
+def _progress_key(user_id: str, course_id: str = None) -> str:
+    return f"{user_id}:{course_id}" if course_id else user_id
+
+def _new_progress(user_id: str, course_id: str = None) -> Dict:
+    return UserProgress(
+        userId=user_id,
+        courseId=course_id or "",
+        completedLessons=[],
+        averageScore=0.0,
+        totalPracticeTime=0
+    ).model_dump()
 
 def _get_user_progress(user_id: str, course_id: str = None) -> UserProgress:
-    """Get or create user progress"""
-    key = f"{user_id}:{course_id}" if course_id else user_id
-    if key not in USER_PROGRESS:
-        USER_PROGRESS[key] = UserProgress(
-            userId=user_id,
-            courseId=course_id or "",
-            completedLessons=[],
-            averageScore=0.0,
-            totalPracticeTime=0
+    """Get user progress (a fresh record if none is stored yet) with its score statistics"""
+    data = STORE.get_progress(_progress_key(user_id, course_id)) or _new_progress(user_id, course_id)
+    scores = STORE.get_scores(user_id)
+    if course_id:
+        lessons = course_service.get_lessons_by_course(course_id)
+        summary = stats.summarize_user(
+            scores, course_id,
+            lesson_ids=[l["id"] for l in lessons],
+            exercise_ids=[ex["id"] for l in lessons for ex in l.get("exercises", [])],
         )
-    return USER_PROGRESS[key]
+    else:
+        summary = stats.summarize_user(scores)
+    data["stats"] = summary
+    data["averageScore"] = summary["overall"]["meanScore"]
+    data["totalPracticeTime"] = summary["overall"]["practiceSeconds"] // 60
+    return UserProgress(**data)
+
+def _record_attempt(user_id: str, course_id: str, lesson_id: str, exercise_id: str, score: float, practice_ms: int):
+    """O(1) incremental update of the user's overall/course/lesson/exercise score aggregates"""
+    STORE.record_score(user_id, stats.attempt_scopes(course_id, lesson_id, exercise_id), score, practice_ms)
+
+def _course_for_lesson(lesson_id: str) -> str:
+    lesson = course_service.get_lesson_by_id(lesson_id)
+    if lesson:
+        return lesson["courseId"]
+    return lesson_id.split("-lesson-")[0] if "lesson" in lesson_id else ""
+
+async def _upload_duration_ms(file: UploadFile) -> int:
+    """Recording length of an uploaded WAV (0 if unknown), used as practice time"""
+    try:
+        await file.seek(0)
+        header = await file.read(4096)
+    except Exception:
+        return 0
+    return wav_duration_ms(header, file.size or 0)
+
+def _update_user_progress(user_id: str, course_id: str, mutate) -> UserProgress:
+    """
+    Queue `mutate(progress_dict)` against the stored record. It may run more
+    than once (local read-your-writes view, then the write-behind flush), so
+    it must derive everything from the dict it is given.
+    """
+    data = STORE.update_progress(_progress_key(user_id, course_id), _new_progress(user_id, course_id), mutate)
+    return UserProgress(**data)
 
 # === Course Endpoints ===
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Accept-Encoding allows gzip with a non-zero q-value (explicitly or via `*`)"""
+    wildcard = False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name in ("gzip", "x-gzip"):
+            return q > 0
+        if name == "*":
+            wildcard = q > 0
+    return wildcard
+
+def _catalog_response(request: Request, entry: catalog_responses.SerializedResponse) -> Response:
+    """Serve a pre-serialized catalog body: 304 on a matching ETag, gzip when accepted"""
+    gzipped = entry.gzipped is not None and _accepts_gzip(request.headers.get("accept-encoding", ""))
+    etag = entry.gzip_etag if gzipped else entry.etag
+    # no-cache: clients may store the body but must revalidate (cheap 304) so catalog edits show up
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        return Response(entry.gzipped, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+def _page_response(request: Request, entry: catalog_responses.SerializedResponse, page: course_service.Page) -> Response:
+    response = _catalog_response(request, entry)
+    response.headers["X-Total-Count"] = str(page.total)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return response
+
 @app.get("/api/courses", response_model=List[Course])
-async def get_courses():
-    """Get all available courses"""
-    courses = course_service.get_all_courses()
-    return courses
+async def get_courses(
+    request: Request,
+    targetLanguage: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    topicCategory: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=course_service.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    Get available courses, optionally filtered (exact, case-insensitive) and
+    paginated: pass `limit`, then the X-Next-Cursor response header as
+    `cursor` for the following page (absent on the last page).
+    """
+    filters = {k: v for k, v in (("targetLanguage", targetLanguage), ("difficulty", difficulty),
+                                 ("topicCategory", topicCategory)) if v}
+    if not filters and limit is None and cursor is None:
+        return _catalog_response(request, catalog_responses.courses())
+    try:
+        entry, page = catalog_responses.courses_page(filters, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _page_response(request, entry, page)
 
 @app.get("/api/courses/{course_id}", response_model=Course)
-async def get_course(course_id: str):
+async def get_course(course_id: str, request: Request):
     """Get a specific course by ID"""
-    course = course_service.get_course_by_id(course_id)
-    if not course:
+    entry = catalog_responses.course(course_id)
+    if not entry:
         raise HTTPException(status_code=404, detail="Course not found")
-    return course
+    return _catalog_response(request, entry)
 
 @app.get("/api/courses/{course_id}/lessons", response_model=List[Lesson])
-async def get_course_lessons(course_id: str):
-    """Get all lessons for a course"""
-    lessons = course_service.get_lessons_by_course(course_id)
-    return lessons
+async def get_course_lessons(
+    course_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=course_service.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Get all lessons for a course (paginated like /api/courses when `limit` or `cursor` is given)"""
+    if limit is None and cursor is None:
+        return _catalog_response(request, catalog_responses.course_lessons(course_id))
+    try:
+        entry, page = catalog_responses.course_lessons_page(course_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _page_response(request, entry, page)
 
 @app.get("/api/lessons/{lesson_id}", response_model=Lesson)
-async def get_lesson(lesson_id: str):
+async def get_lesson(lesson_id: str, request: Request):
     """Get a specific lesson with exercises"""
-    lesson = course_service.get_lesson_by_id(lesson_id)
-    if not lesson:
+    entry = catalog_responses.lesson(lesson_id)
+    if not entry:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    return lesson
+    return _catalog_response(request, entry)
 
 # === Practice Endpoint (Core Feature) ===
 
+async def _score_practice(
+    transcribed: str,
+    expectedText: str,
+    lessonId: str,
+    exerciseId: str,
+    userId: str,
+    practice_ms: int = 0,
+    next_audio: Optional[lesson_audio.AudioPrefetch] = None,
+) -> PracticeResponse:
+    """
+    Score a transcribed attempt, update progress and build the PracticeResponse.
+    `next_audio` is the next exercise's audio prefetch, started when the attempt arrived.
+    """
+    # 2. Evaluate pronunciation
+    with span("evaluate"):
+        score_data = await evaluate_pronunciation_async(expectedText, transcribed, "French")
+    pronunciation_score = PronunciationScore(**score_data)
+    
+    # 3. Determine if correct (threshold: 70%)
+    is_correct = pronunciation_score.overall >= 70.0
+    
+    # 4. Get encouragement message
+    if pronunciation_score.overall >= 90:
+        encouragement = "🎉 Perfect! Excellent pronunciation!"
+    elif pronunciation_score.overall >= 75:
+        encouragement = "✨ Great job! Well done!"
+    elif pronunciation_score.overall >= 60:
+        encouragement = "👍 Good effort! Keep practicing!"
+    else:
+        encouragement = "💪 Keep trying! You're learning!"
+    
+    with span("progress"):
+        # 5. Get next exercise (if this one was completed)
+        next_exercise = None
+        next_audio_url = None
+        if is_correct:
+            next_ex = course_service.get_next_exercise(lessonId, exerciseId)
+            if next_ex:
+                next_exercise = next_ex.get("id")
+                if next_audio is not None:
+                    next_audio_url = await next_audio.url()
+            else:
+                # Lesson complete!
+                def complete_lesson(progress: Dict):
+                    if lessonId not in progress["completedLessons"]:
+                        progress["completedLessons"].append(lessonId)
+                await run_blocking("store", _update_user_progress, userId, _course_for_lesson(lessonId), complete_lesson)
+        
+        # 6. Update user progress stats
+        await run_blocking("store", _record_attempt, userId, _course_for_lesson(lessonId), lessonId, exerciseId,
+                           pronunciation_score.overall, practice_ms)
+    
+    return PracticeResponse(
+        transcribedText=transcribed,
+        expectedText=expectedText,
+        pronunciationScore=pronunciation_score,
+        isCorrect=is_correct,
+        encouragement=encouragement,
+        nextExerciseId=next_exercise,
+        nextExerciseAudioUrl=next_audio_url
+    )
+
 @app.post("/api/practice", response_model=PracticeResponse)
 async def practice_exercise(
     file: UploadFile = File(...),
@@ -106,69 +337,96 @@ async def practice_exercise(
     - Return feedback and next exercise
     """
     try:
+        # Warm the next phrase's audio in parallel with STT and scoring
+        next_audio = lesson_audio.prefetch_next(lessonId, exerciseId)
+        
         # 1. Transcribe the audio
         transcribed, confidence, provider = await transcribe_audio(file, languageCode)
+        practice_ms = await _upload_duration_ms(file)
+        return await _score_practice(transcribed, expectedText, lessonId, exerciseId, userId, practice_ms, next_audio)
         
-        # 2. Evaluate pronunciation
-        score_data = evaluate_pronunciation(expectedText, transcribed, "French")
-        pronunciation_score = PronunciationScore(**score_data)
-        
-        # 3. Determine if correct (threshold: 70%)
-        is_correct = pronunciation_score.overall >= 70.0
-        
-        # 4. Get encouragement message
-        if pronunciation_score.overall >= 90:
-            encouragement = "🎉 Perfect! Excellent pronunciation!"
-        elif pronunciation_score.overall >= 75:
-            encouragement = "✨ Great job! Well done!"
-        elif pronunciation_score.overall >= 60:
-            encouragement = "👍 Good effort! Keep practicing!"
-        else:
-            encouragement = "💪 Keep trying! You're learning!"
-        
-        # 5. Get next exercise (if this one was completed)
-        next_exercise = None
-        if is_correct:
-            next_ex = course_service.get_next_exercise(lessonId, exerciseId)
-            if next_ex:
-                next_exercise = next_ex.get("id")
-            else:
-                # Lesson complete!
-                progress = _get_user_progress(userId, lessonId.split("-lesson-")[0] if "lesson" in lessonId else "")
-                if lessonId not in progress.completedLessons:
-                    progress.completedLessons.append(lessonId)
-        
-        # 6. Update user progress stats
-        progress = _get_user_progress(userId)
-        # Update average score (simple rolling average)
-        current_avg = progress.averageScore
-        total_scores = len(progress.completedLessons) or 1
-        progress.averageScore = (current_avg * (total_scores - 1) + pronunciation_score.overall) / total_scores
-        
-        return PracticeResponse(
-            transcribedText=transcribed,
-            expectedText=expectedText,
-            pronunciationScore=pronunciation_score,
-            isCorrect=is_correct,
-            encouragement=encouragement,
-            nextExerciseId=next_exercise
-        )
-        
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Practice error: {str(e)}")
+
+@app.post("/api/practice/batch", response_model=List[PracticeResponse])
+async def practice_batch(
+    files: List[UploadFile] = File(...),
+    items: str = Form(...),
+    userId: str = "default-user",
+    languageCode: str = "fr"
+):
+    """
+    Submit several attempts at once. `items` is a JSON array of
+    {lessonId, exerciseId, expectedText}, one per uploaded file, in order.
+    Attempts are transcribed concurrently and scored in one batched evaluation.
+    """
+    try:
+        batch = [PracticeBatchItem(**item) for item in json.loads(items)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid items: {e}")
+    if len(batch) != len(files):
+        raise HTTPException(status_code=400, detail=f"Got {len(files)} files for {len(batch)} items")
+    
+    try:
+        prefetches = [lesson_audio.prefetch_next(item.lessonId, item.exerciseId) for item in batch]
+        transcripts = await asyncio.gather(*(transcribe_audio(f, languageCode) for f in files))
+        durations = [await _upload_duration_ms(f) for f in files]
+        return await asyncio.gather(*(
+            _score_practice(transcribed, item.expectedText, item.lessonId, item.exerciseId, userId, practice_ms, next_audio)
+            for (transcribed, _, _), item, practice_ms, next_audio in zip(transcripts, batch, durations, prefetches)
+        ))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Practice error: {str(e)}")
 
+@app.websocket("/ws/practice")
+async def practice_stream(
+    websocket: WebSocket,
+    lessonId: str = "",
+    exerciseId: str = "",
+    expectedText: str = "",
+    userId: str = "default-user",
+    languageCode: str = "fr",
+    sampleRate: int = 16000,
+    channels: int = 1,
+):
+    """
+    Streaming practice: client streams 16-bit PCM while recording, receives
+    partial transcripts, then {"type": "final"} and {"type": "result"} with
+    the PracticeResponse right after end-of-speech (or {"type": "stop"}).
+    """
+    await websocket.accept()
+    try:
+        next_audio = lesson_audio.prefetch_next(lessonId, exerciseId)
+        result = await stream_transcript(websocket, languageCode, sampleRate, channels)
+        if result is None:
+            return
+        transcribed, confidence, provider, audio_ms = result
+        await websocket.send_json({"type": "final", "text": transcribed, "confidence": confidence, "provider": provider})
+        practice = await _score_practice(transcribed, expectedText, lessonId, exerciseId, userId, audio_ms, next_audio)
+        await websocket.send_json({"type": "result", "practice": jsonable_encoder(practice)})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": f"Practice error: {e}"})
+        await websocket.close(code=1011)
+
 # === Progress Endpoints ===
 
-@app.get("/api/progress/{user_id}")
+@app.get("/api/progress/{user_id}", response_model=UserProgress)
 async def get_user_progress(user_id: str):
     """Get user's overall progress"""
-    progress = _get_user_progress(user_id)
+    progress = await run_blocking("store", _get_user_progress, user_id)
     return progress
 
-@app.get("/api/progress/{user_id}/course/{course_id}")
+@app.get("/api/progress/{user_id}/course/{course_id}", response_model=UserProgress)
 async def get_course_progress(user_id: str, course_id: str):
     """Get user's progress for specific course"""
-    progress = _get_user_progress(user_id, course_id)
+    progress = await run_blocking("store", _get_user_progress, user_id, course_id)
     return progress
 
 # === STT & TTS Endpoints ===
@@ -178,27 +436,302 @@ async def stt_endpoint(file: UploadFile = File(...), languageCode: str = "en"):
     try:
         text, confidence, provider = await transcribe_audio(file, languageCode)
         return TranscriptResponse(text=text, confidence=confidence, provider=provider)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"STT error: {e}")
 
+@app.websocket("/ws/stt")
+async def stt_stream_endpoint(websocket: WebSocket, languageCode: str = "en", sampleRate: int = 16000, channels: int = 1):
+    """
+    Streaming STT: binary 16-bit PCM frames in (a leading WAV header is accepted),
+    {"type": "partial"} messages out while speaking, then one {"type": "final"}.
+    """
+    await websocket.accept()
+    try:
+        result = await stream_transcript(websocket, languageCode, sampleRate, channels)
+        if result is None:
+            return
+        text, confidence, provider, _ = result
+        await websocket.send_json({"type": "final", "text": text, "confidence": confidence, "provider": provider})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": f"STT error: {e}"})
+        await websocket.close(code=1011)
+
 @app.post("/api/tts", response_model=TTSResponse)
 async def tts_endpoint(req: TTSRequest):
     try:
-        b64, fmt, dur, provider = synthesize(req.text, req.voice, req.languageCode, req.provider)
+        b64, fmt, dur, provider = await synthesize_async(req.text, req.voice, req.languageCode, req.provider)
         return TTSResponse(audioBase64=b64, format=fmt, durationMs=dur, provider=provider)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"TTS error: {e}")
 
+def _negotiate_audio_format(accept: str, requested: str | None) -> str:
+    """Pick mp3 or opus from an explicit ?format= or the Accept header (q-values honoured)"""
+    if requested:
+        if requested not in tts.STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {requested}")
+        return requested
+    best, best_q = tts.TTS_FORMAT, 0.0
+    for part in (accept or "").split(","):
+        media, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media = media.strip().lower()
+        fmt = {"audio/mpeg": "mp3", "audio/mp3": "mp3", "audio/ogg": "opus", "audio/opus": "opus"}.get(media)
+        if fmt and q > best_q:
+            best, best_q = fmt, q
+    return best
+
+def _cached_audio_response(request: Request, audio: bytes, fmt: str, key: str) -> Response:
+    """Serve cached audio with ETag and single-range (206) support"""
+    headers = {"ETag": f'"{key}"', "Accept-Ranges": "bytes", "Cache-Control": "public, max-age=86400", "Vary": "Accept"}
+    media_type = tts.STREAM_FORMATS[fmt]
+    if _etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    range_header = request.headers.get("range", "")
+    if range_header.startswith("bytes=") and "," not in range_header:
+        start_s, _, end_s = range_header[6:].strip().partition("-")
+        size = len(audio)
+        try:
+            if start_s:
+                start, end = int(start_s), int(end_s) if end_s else size - 1
+            else:
+                start, end = max(0, size - int(end_s)), size - 1  # suffix range: last N bytes
+        except ValueError:
+            start, end = 0, -1
+        if start > end or start >= size:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        end = min(end, size - 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(audio[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+    return Response(audio, media_type=media_type, headers=headers)
+
+async def _tts_stream_response(request: Request, text: str, voice: str | None, languageCode: str, fmt: str | None) -> Response:
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+    fmt = _negotiate_audio_format(request.headers.get("accept", ""), fmt)
+    key = tts.cache_key(text, voice, languageCode, fmt=fmt)
+    # Memory, then the disk tier and lesson audio files: off the event loop
+    audio = await run_blocking("tts", tts.get_cached_audio, key, fmt)
+    if audio is not None:
+        return _cached_audio_response(request, audio, fmt, key)
+    if not tts.stream_available():
+        raise HTTPException(status_code=503, detail="TTS provider unavailable")
+    try:
+        # Opened (first chunk in hand) before the response starts, so failures are still a 5xx
+        chunks = await tts.stream_speech(text, voice, languageCode, fmt)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"TTS error: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"TTS error: {e}")
+    return StreamingResponse(
+        chunks,
+        media_type=tts.STREAM_FORMATS[fmt],
+        headers={"Cache-Control": "no-store", "Vary": "Accept", "X-TTS-Cache": "miss"},
+    )
+
+@app.get("/api/tts/stream")
+async def tts_stream_get(request: Request, text: str, languageCode: str = "fr", voice: str | None = None, format: str | None = None):
+    """
+    Binary TTS audio streamed as the provider produces it (playable by URL).
+    Format comes from ?format= (mp3|opus) or the Accept header; cached clips
+    support ETag revalidation and Range requests.
+    """
+    return await _tts_stream_response(request, text, voice, languageCode, format)
+
+@app.post("/api/tts/stream")
+async def tts_stream_post(request: Request, req: TTSRequest, format: str | None = None):
+    """Same as GET /api/tts/stream, with a TTSRequest JSON body"""
+    return await _tts_stream_response(request, req.text, req.voice, req.languageCode, format)
+
+@app.get("/audio/{filename}")
+async def lesson_audio_file(filename: str, request: Request):
+    """Pre-synthesized phrase audio (Phrase.audioUrl); content-addressed, so cached forever"""
+    found = lesson_audio.path_for_filename(filename)
+    if not found:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    key, path = found
+    headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if _etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=tts.STREAM_FORMATS[tts.TTS_FORMAT], headers=headers)
+
+# === Conversation Endpoints ===
+
+# Turns of one session run one at a time in this worker, each seeing the history the
+# previous one saved (entries go away with the last turn holding them)
+_turn_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _turn_lock(session_id: str) -> asyncio.Lock:
+    lock = _turn_locks.get(session_id)
+    if lock is None:
+        lock = _turn_locks[session_id] = asyncio.Lock()
+    return lock
+
+async def _chat_turn(session_id: str, text: str, target_language: str, proficiency: str | None):
+    """
+    One streamed tutor turn as (event, payload) pairs: "reply" deltas, then
+    "corrections" / "suggestions" / "nextPrompt" as each completes, then
+    "done" with the full ChatResponse. The turn is saved to the session history
+    with an atomic store update, so concurrent turns (even from other workers)
+    are all kept.
+    """
+    async with _turn_lock(session_id):
+        session = await run_blocking("store", _ensure_session, session_id)
+        async for event in stream_chat(text, target_language, proficiency, session.get("history", []), session.get("summary")):
+            if event["type"] == "delta":
+                yield "reply", {"text": event["text"]}
+            elif event["type"] == "field":
+                yield event["field"], {"value": event["value"]}
+            else:
+                response = ChatResponse(**event["result"])
+                await run_blocking("store", STORE.update_session, session_id, new_session(),
+                                   lambda data: append_turn(data, text, response.reply))
+                yield "done", response.model_dump()
+
+def _sse(event: str, payload: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@app.post("/api/chat")
+async def chat(req: ChatRequest):
+    """
+    Conversation practice, streamed as Server-Sent Events: `reply` events carry
+    reply text as it is generated, `corrections` / `suggestions` / `nextPrompt`
+    arrive as soon as each is complete, and `done` carries the ChatResponse.
+    """
+    if not req.text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+
+    async def events():
+        async for event, payload in _chat_turn(req.sessionId, req.text, req.targetLanguage, req.proficiency):
+            yield _sse(event, payload)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/ws/chat")
+async def chat_stream(websocket: WebSocket, sessionId: str, targetLanguage: str = "French", proficiency: str | None = None):
+    """
+    Conversation over a websocket: send {"text": ...} per turn; receive the same
+    events as /api/chat as {"type": <event>, ...payload} messages.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": 'Send {"text": ...} per turn'})
+                continue
+            text = str(message.get("text", "")).strip()
+            if not text:
+                await websocket.send_json({"type": "error", "detail": "Text is required"})
+                continue
+            async for event, payload in _chat_turn(sessionId, text, targetLanguage, proficiency):
+                await websocket.send_json({"type": event, **payload})
+    except WebSocketDisconnect:
+        pass
+
 @app.post("/api/session", response_model=SessionCreateResponse)
 async def create_session():
     import uuid
     session_id = f"sess-{uuid.uuid4().hex[:8]}"
-    _ensure_session(session_id)
+    await run_blocking("store", _ensure_session, session_id)
     return SessionCreateResponse(sessionId=session_id)
 
+# === Background Jobs ===
+
+@app.post("/api/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(req: JobRequest):
+    """
+    Queue a long-running job and return its id straight away. Kinds:
+    `tts` {text, voice?, languageCode?}, `course_audio` {courseId} (all of a
+    course's phrase audio) and `evaluate` {expectedText, transcribedText, language?}.
+    """
+    try:
+        return await jobs.submit(req.kind, req.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/jobs/audio", response_model=List[JobStatus], status_code=202)
+async def submit_audio_jobs(
+    files: List[UploadFile] = File(...),
+    kind: str = Form("practice"),
+    items: str = Form("[]"),
+    languageCode: str = "fr",
+    language: str = "French"
+):
+    """
+    Queue one `stt` or `practice` (transcribe + score) job per uploaded file.
+    `items` is an optional JSON array of per-file params, in order
+    (`practice` needs {expectedText}).
+    """
+    try:
+        per_file = json.loads(items) or [{}] * len(files)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid items: {e}")
+    if not isinstance(per_file, list) or len(per_file) != len(files) or not all(isinstance(i, dict) for i in per_file):
+        raise HTTPException(status_code=400, detail=f"items must be a JSON array of {len(files)} objects")
+
+    try:
+        # Read (and size-check) everything before queueing anything
+        uploads = [(await read_upload(f), os.path.splitext(f.filename or "")[1] or ".wav") for f in files]
+        return [
+            await jobs.submit(kind, {"languageCode": languageCode, "language": language, "suffix": suffix, **item}, audio)
+            for (audio, suffix), item in zip(uploads, per_file)
+        ]
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, wait: float = Query(0, ge=0)):
+    """
+    Job status, with the result once it has succeeded. `wait` long-polls:
+    the response comes as soon as the job finishes, or after `wait` seconds
+    (at most JOB_MAX_WAIT_SECONDS) with the job still queued or running.
+    """
+    job = await jobs.wait(job_id, wait) if wait > 0 else await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text format: request/stage latency histograms, provider calls, fallbacks, in-flight gauges"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health():
-    return {"status": "ok", "courses": len(course_service.get_all_courses())}
+    return {
+        "status": "ok",
+        "courses": len(course_service.get_all_courses()),
+        "catalog": course_service.get_stats(),
+        "catalogResponses": catalog_responses.get_stats(),
+        "sttCache": get_stt_cache_stats(),
+        "ttsCache": get_tts_cache_stats(),
+        "audioPreprocess": get_preprocess_stats(),
+        "evalCache": pronunciation.get_cache_stats(),
+        "evalBatching": pronunciation.get_batch_stats(),
+        "store": await run_blocking("store", STORE.stats),
+        "breakers": get_breaker_stats(),
+        "prompts": prompts.get_stats(),
+        "providerClient": provider_client.get_stats(),
+        "jobs": await jobs.get_stats(),
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -51,12 +51,19 @@ class TranscriptResponse(BaseModel):
     confidence: float = 0.0
     provider: str = "stub"
 
+class WordError(BaseModel):
+    type: str  # "mispronounced", "missing", "extra"
+    expected: Optional[str] = None
+    heard: Optional[str] = None
+    position: int  # index of the expected word the error is aligned to
+
 class PronunciationScore(BaseModel):
     accuracy: float  # 0-100
     fluency: float  # 0-100
     completeness: float  # 0-100
     overall: float  # 0-100
     feedback: str
+    wordErrors: List[WordError] = []
 
 class PracticeRequest(BaseModel):
     lessonId: str
@@ -64,6 +71,11 @@ class PracticeRequest(BaseModel):
     expectedText: str  # The French phrase they should say
     userId: str
 
+class PracticeBatchItem(BaseModel):
+    lessonId: str = ""
+    exerciseId: str = ""
+    expectedText: str = ""
+
 class PracticeResponse(BaseModel):
     transcribedText: str
     expectedText: str
@@ -71,6 +83,7 @@ class PracticeResponse(BaseModel):
     isCorrect: bool
     encouragement: str
     nextExerciseId: Optional[str] = None
+    nextExerciseAudioUrl: Optional[str] = None  # ready-to-play phrase audio for nextExerciseId
 
 class TTSRequest(BaseModel):
     text: str
@@ -84,6 +97,20 @@ class TTSResponse(BaseModel):
     durationMs: Optional[int] = None
     provider: str = "stub"
 
+class ScoreStats(BaseModel):
+    attempts: int = 0
+    meanScore: float = 0.0
+    stdDev: float = 0.0
+    bestScore: float = 0.0
+    practiceSeconds: int = 0
+    histogram: List[int] = []  # attempt counts per 10-point score bucket (0-9, ..., 90-100)
+
+class ProgressStats(BaseModel):
+    overall: ScoreStats
+    courses: Dict[str, ScoreStats] = {}  # only on overall progress
+    lessons: Dict[str, ScoreStats] = {}
+    lastExerciseScores: Dict[str, float] = {}
+
 class UserProgress(BaseModel):
     userId: str
     courseId: str
@@ -91,7 +118,45 @@ class UserProgress(BaseModel):
     currentLessonId: Optional[str] = None
     averageScore: float = 0.0
     totalPracticeTime: int = 0  # minutes
+    stats: Optional[ProgressStats] = None
+
+# === Conversation Models ===
+
+class ChatRequest(BaseModel):
+    sessionId: str
+    text: str  # what the learner said (transcript) or typed
+    targetLanguage: str = "French"
+    proficiency: Optional[str] = None
+
+class Correction(BaseModel):
+    original: str
+    corrected: str
+    note: Optional[str] = None
+
+class ChatResponse(BaseModel):
+    reply: str
+    corrections: List[Correction] = []
+    suggestions: List[str] = []
+    nextPrompt: Optional[str] = None
+    meta: Dict = {}
 
 class SessionCreateResponse(BaseModel):
     sessionId: str
     created: bool = True
+
+# === Background Job Models ===
+
+class JobRequest(BaseModel):
+    kind: str  # "tts", "course_audio" or "evaluate"; audio jobs go to /api/jobs/audio
+    params: Dict = {}
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str  # "queued", "running", "succeeded", "failed"
+    attempts: int = 0
+    maxAttempts: int = 1
+    result: Optional[Dict] = None  # once succeeded
+    error: Optional[str] = None  # last failed attempt
+    createdAt: str
+    updatedAt: str
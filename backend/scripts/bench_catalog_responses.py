@@ -0,0 +1,77 @@
+"""
+Requests-per-second benchmark: catalog endpoints before/after pre-serialization.
+
+    cd backend && python scripts/bench_catalog_responses.py [--requests 2000]
+
+"before" is a copy of the previous handlers (return the catalog dicts and let
+FastAPI validate them through response_model and re-encode JSON per request).
+"after" is the real app: pre-serialized bodies, measured for a plain 200,
+a gzip 200 and an If-None-Match revalidation (304). Requests go through
+Starlette's in-process TestClient, so numbers exclude network cost and are
+best compared with each other.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from models import Course, Lesson  # noqa: E402
+from services import course_service  # noqa: E402
+
+
+def legacy_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/courses", response_model=List[Course])
+    async def get_courses():
+        return course_service.get_all_courses()
+
+    @app.get("/api/courses/{course_id}/lessons", response_model=List[Lesson])
+    async def get_course_lessons(course_id: str):
+        return course_service.get_lessons_by_course(course_id)
+
+    @app.get("/api/lessons/{lesson_id}", response_model=Lesson)
+    async def get_lesson(lesson_id: str):
+        return course_service.get_lesson_by_id(lesson_id)
+
+    return app
+
+
+def rps(client: TestClient, path: str, n: int, headers=None) -> float:
+    client.get(path, headers=headers)  # warm the cache / connection
+    start = time.perf_counter()
+    for _ in range(n):
+        r = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - start
+    assert r.status_code in (200, 304), (path, r.status_code)
+    return n / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per measurement")
+    args = parser.parse_args()
+
+    course = course_service.get_all_courses()[0]
+    lesson = course_service.get_lessons_by_course(course["id"])[0]
+    paths = ["/api/courses", f"/api/courses/{course['id']}/lessons", f"/api/lessons/{lesson['id']}"]
+
+    before = TestClient(legacy_app())
+    after = TestClient(main.app)
+    print(f"{'path':<40} {'before':>9} {'after':>9} {'gzip':>9} {'304':>9}   (requests/s)")
+    for path in paths:
+        etag = after.get(path).headers["etag"]
+        row = [
+            rps(before, path, args.requests, {"accept-encoding": "identity"}),
+            rps(after, path, args.requests, {"accept-encoding": "identity"}),
+            rps(after, path, args.requests, {"accept-encoding": "gzip"}),
+            rps(after, path, args.requests, {"if-none-match": etag}),
+        ]
+        print(f"{path:<40} " + " ".join(f"{v:>9,.0f}" for v in row))
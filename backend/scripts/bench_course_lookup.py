@@ -0,0 +1,97 @@
+"""
+Micro-benchmark: indexed course catalog lookups vs. the old linear scans.
+
+    cd backend && python scripts/bench_course_lookup.py [--lessons 10000]
+
+Builds synthetic catalogs of increasing size and times get_lesson_by_id,
+get_next_exercise and get_lessons_by_course against both implementations.
+Indexed lookups should stay flat as the catalog grows.
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import course_service  # noqa: E402
+
+
+def make_catalog(n_lessons: int, lessons_per_course: int = 20, exercises_per_lesson: int = 5):
+    courses, lessons = [], []
+    n_courses = max(1, n_lessons // lessons_per_course)
+    for c in range(n_courses):
+        courses.append({"id": f"course-{c}", "title": f"Course {c}", "description": "",
+                        "targetLanguage": "French", "difficulty": "beginner",
+                        "topicCategory": "general", "lessonsCount": lessons_per_course})
+    for i in range(n_lessons):
+        lesson_id = f"course-{i % n_courses}-lesson-{i}"
+        lessons.append({
+            "id": lesson_id, "title": f"Lesson {i}", "description": "",
+            "courseId": f"course-{i % n_courses}", "order": random.randint(1, 1000),
+            "exercises": [{"id": f"{lesson_id}-ex-{e}", "type": "listen_repeat",
+                           "phrase": {"id": f"p-{i}-{e}", "english": "hi", "target": "salut"}}
+                          for e in range(exercises_per_lesson)],
+        })
+    return {"courses": courses, "lessons": lessons}
+
+
+# --- Previous implementation (linear scans), kept here for comparison ---
+
+def linear_lesson(data, lesson_id):
+    for lesson in data["lessons"]:
+        if lesson["id"] == lesson_id:
+            return lesson
+    return None
+
+def linear_next_exercise(data, lesson_id, exercise_id):
+    lesson = linear_lesson(data, lesson_id)
+    if not lesson:
+        return None
+    exercises = lesson["exercises"]
+    for i, ex in enumerate(exercises):
+        if ex["id"] == exercise_id:
+            return exercises[i + 1] if i + 1 < len(exercises) else None
+    return None
+
+def linear_lessons_by_course(data, course_id):
+    return sorted([l for l in data["lessons"] if l["courseId"] == course_id], key=lambda x: x["order"])
+
+
+def bench(n_lessons: int, number: int):
+    data = make_catalog(n_lessons)
+    course_service._catalog = course_service._Catalog(data)
+    course_service.RELOAD_INTERVAL = 0
+    targets = random.sample(data["lessons"], min(100, n_lessons))
+    probes = [(l["id"], l["exercises"][2]["id"], l["courseId"]) for l in targets]
+
+    def run(fn):
+        t = timeit.timeit(lambda: [fn(*p) for p in probes], number=number)
+        return t / (number * len(probes)) * 1e6  # µs per call
+
+    rows = [
+        ("get_lesson_by_id",
+         run(lambda l, e, c: linear_lesson(data, l)),
+         run(lambda l, e, c: course_service.get_lesson_by_id(l))),
+        ("get_next_exercise",
+         run(lambda l, e, c: linear_next_exercise(data, l, e)),
+         run(lambda l, e, c: course_service.get_next_exercise(l, e))),
+        ("get_lessons_by_course",
+         run(lambda l, e, c: linear_lessons_by_course(data, c)),
+         run(lambda l, e, c: course_service.get_lessons_by_course(c))),
+    ]
+    for name, linear_us, indexed_us in rows:
+        print(f"{n_lessons:>7} lessons  {name:<22} linear {linear_us:>10.2f} µs   "
+              f"indexed {indexed_us:>6.3f} µs   x{linear_us / indexed_us:,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, default=10000, help="largest synthetic catalog size")
+    parser.add_argument("--number", type=int, default=20, help="timeit repetitions per probe set")
+    args = parser.parse_args()
+    random.seed(0)
+    sizes = sorted({s for s in (100, 1000, args.lessons) if s <= args.lessons})
+    for size in sizes:
+        bench(size, args.number)
@@ -0,0 +1,72 @@
+"""
+Benchmark the audio preprocessing stage (decode, mono 16 kHz, VAD trim).
+
+    cd backend && python scripts/bench_preprocess.py [folder-of-wavs]
+
+Without a folder, synthetic 44.1 kHz stereo clips with leading/trailing
+silence are generated. Reports per-clip time, bytes saved and speech duration.
+"""
+import argparse
+import io
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.preprocess import preprocess_audio  # noqa: E402
+
+
+def synthetic_clip(speech_s: float, silence_s: float, rate: int = 44100, channels: int = 2) -> bytes:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(speech_s * rate)) / rate
+    speech = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    pad = rng.normal(0, 0.002, int(silence_s * rate))
+    mono = np.concatenate([pad, speech, pad])
+    frames = np.repeat(mono[:, None], channels, axis=1)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((frames * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def load_clips(folder):
+    if folder:
+        return [(p.name, p.read_bytes()) for p in sorted(Path(folder).glob("*.wav"))]
+    return [
+        ("synthetic-1s-speech", synthetic_clip(1.0, 1.0)),
+        ("synthetic-3s-speech", synthetic_clip(3.0, 1.5)),
+        ("synthetic-8s-speech", synthetic_clip(8.0, 2.0)),
+        ("synthetic-silence", synthetic_clip(0.0, 3.0)),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", help="folder of .wav samples")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    clips = load_clips(args.folder)
+    if not clips:
+        sys.exit(f"No .wav files in {args.folder}")
+    total_in = total_out = 0
+    print(f"{'clip':<28}{'in KB':>9}{'out KB':>9}{'saved':>8}{'speech ms':>11}{'ms/clip':>9}")
+    for name, data in clips:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = preprocess_audio(data, ".wav")
+        elapsed_ms = (time.perf_counter() - start) * 1000 / args.repeat
+        total_in += result.original_bytes
+        total_out += result.processed_bytes
+        saved = 1 - result.processed_bytes / result.original_bytes
+        speech = result.speech_ms if result.has_speech else "none"
+        print(f"{name[:27]:<28}{result.original_bytes / 1024:>9.1f}{result.processed_bytes / 1024:>9.1f}"
+              f"{saved:>8.0%}{speech:>11}{elapsed_ms:>9.2f}")
+    print(f"total: {total_in / 1024:.1f} KB -> {total_out / 1024:.1f} KB ({1 - total_out / total_in:.0%} saved)")
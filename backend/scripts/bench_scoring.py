@@ -0,0 +1,67 @@
+"""
+Local pronunciation scorer: throughput benchmark and golden-set agreement.
+
+    cd backend && python scripts/bench_scoring.py
+
+The golden set (data/scoring_golden.json, also asserted by tests/test_scoring.py)
+pairs (expected, transcribed) with the pass/fail verdict
+(overall >= 70, the /api/practice threshold) the GPT evaluator gives.
+Every local result is also checked against the PronunciationScore format.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import PronunciationScore  # noqa: E402
+from services import pronunciation  # noqa: E402
+from services.scoring import char_similarity, score_locally  # noqa: E402
+
+PASS = 70.0
+GOLDEN_PATH = Path(__file__).resolve().parent.parent / "data" / "scoring_golden.json"
+
+# (expected, transcribed, GPT verdict)
+GOLDEN = [(case["expected"], case["transcribed"], case["pass"])
+          for case in json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))]
+
+
+def check_format(result):
+    PronunciationScore(**result)
+    for field in ("accuracy", "fluency", "completeness", "overall"):
+        assert 0.0 <= result[field] <= 100.0, (field, result[field])
+    assert isinstance(result["feedback"], str) and result["feedback"]
+
+
+def agreement():
+    agree = escalated = 0
+    for expected, transcribed, verdict in GOLDEN:
+        result = score_locally(expected, transcribed)
+        check_format(result)
+        ok = (result["overall"] >= PASS) == verdict
+        ambiguous = pronunciation.ESCALATE_LOW <= result["overall"] < pronunciation.ESCALATE_HIGH
+        agree += ok
+        escalated += ambiguous
+        mark = "ok " if ok else "MISS"
+        print(f"  {mark} {result['overall']:>5.1f} {'(escalate)' if ambiguous else '          '} "
+              f"{expected!r} / {transcribed!r}")
+    print(f"agreement: {agree}/{len(GOLDEN)} ({agree / len(GOLDEN):.0%}), "
+          f"tiered mode would escalate {escalated}/{len(GOLDEN)} to GPT")
+
+
+def throughput(seconds: float = 2.0):
+    pairs = [(e, t) for e, t, _ in GOLDEN]
+    char_similarity.cache_clear()
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for e, t in pairs:
+            score_locally(e, t)
+        calls += len(pairs)
+    elapsed = time.perf_counter() - start
+    print(f"throughput: {calls / elapsed:,.0f} scores/s ({elapsed / calls * 1e6:.1f} µs per score)")
+
+
+if __name__ == "__main__":
+    agreement()
+    throughput()
@@ -0,0 +1,156 @@
+"""
+Memory per request on the upload -> transcription path, old vs. new.
+
+    cd backend && python scripts/bench_upload_memory.py [--concurrency 32] [--size-mb 1]
+
+Runs --concurrency simultaneous transcriptions of a speech-like WAV upload
+of --size-mb through the real stt path (read, preprocess, provider upload)
+against an in-process fake Whisper client, once with the previous
+implementation (whole read, temp-file write, reopen for the upload) and
+once with the current one (bounded in-memory read, bytes handed to the
+SDK). Each variant runs in a fresh subprocess so peak RSS is its own.
+Reports peak RSS growth and peak Python allocations, total and per request.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def speech_like_wav(size_bytes: int, rate: int = 16000) -> bytes:
+    frames = max(rate, (size_bytes - 44) // 2)
+    samples = (int(8000 * math.sin(2 * math.pi * 220 * i / rate) * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * i / rate)))
+               for i in range(frames))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(struct.pack(f"<{frames}h", *samples))
+    return buf.getvalue()
+
+
+class _FakeWhisper:
+    """Consumes the upload the way the SDK's multipart encoder does (file objects in chunks)"""
+
+    def with_options(self, **kwargs):
+        return self
+
+    @property
+    def audio(self):
+        return self
+
+    @property
+    def transcriptions(self):
+        return self
+
+    def create(self, file, **kwargs):
+        if isinstance(file, tuple):
+            sent = len(file[1])
+        else:
+            sent = 0
+            while chunk := file.read(64 * 1024):
+                sent += len(chunk)
+        time.sleep(0.05)  # provider latency keeps all requests in flight together
+        return type("Transcription", (), {"text": f"{sent} bytes", "segments": None})()
+
+
+def _old_whisper_transcribe(contents: bytes, suffix: str, language: str):
+    """Previous implementation: spool the clip to a temp file and reopen it for the upload"""
+    from services.provider_client import get_client
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+            temp_file.write(contents)
+            temp_file.flush()
+            temp_path = temp_file.name
+        with open(temp_path, "rb") as audio_file:
+            response = get_client().audio.transcriptions.create(model="whisper-1", file=audio_file)
+        return response.text, 0.9
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+async def _old_transcribe_audio(file, language: str):
+    from services import stt
+    contents = await file.read()
+    return await stt.transcribe_bytes(contents, language, ".wav")
+
+
+def _upload(wav: bytes):
+    from starlette.datastructures import UploadFile
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)  # as Starlette's multipart parser does
+    spooled.write(wav)
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=len(wav), filename="clip.wav")
+
+
+async def _run(variant: str, concurrency: int, wav: bytes) -> None:
+    from services import provider_client, stt
+    provider_client.set_client(_FakeWhisper())
+    if variant == "old":
+        stt._whisper_transcribe = _old_whisper_transcribe
+        transcribe = _old_transcribe_audio
+    else:
+        transcribe = stt.transcribe_audio
+    uploads = [_upload(wav) for _ in range(concurrency)]
+
+    await transcribe(_upload(wav), "fr")  # warm pools and imports outside the measurement
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(transcribe(u, "fr") for u in uploads))
+    elapsed = time.perf_counter() - start
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kib = 1 if sys.platform != "darwin" else 1 / 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+    print(json.dumps({
+        "variant": variant,
+        "providers": sorted({r[2] for r in results}),
+        "seconds": round(elapsed, 3),
+        "rssGrowthMiB": round((peak_rss - base_rss) * kib / 1024, 1),
+        "peakAllocMiB": round(peak_alloc / 2 ** 20, 1),
+    }))
+
+
+def main(args) -> None:
+    size = int(args.size_mb * 1024 * 1024)
+    print(f"{args.concurrency} concurrent uploads of {size / 2 ** 20:.1f} MiB")
+    print(f"{'variant':<8} {'seconds':>8} {'RSS growth':>11} {'per req':>8} {'peak alloc':>11} {'per req':>8}")
+    for variant in ("old", "new"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, "--concurrency", str(args.concurrency),
+             "--size-mb", str(args.size_mb)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        r = json.loads(out)
+        n = args.concurrency
+        print(f"{variant:<8} {r['seconds']:>8.2f} {r['rssGrowthMiB']:>9.1f}Mi {r['rssGrowthMiB'] / n:>6.2f}Mi "
+              f"{r['peakAllocMiB']:>9.1f}Mi {r['peakAllocMiB'] / n:>6.2f}Mi   {','.join(r['providers'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--variant", choices=("old", "new"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.variant:
+        asyncio.run(_run(args.variant, args.concurrency, speech_like_wav(int(args.size_mb * 1024 * 1024))))
+    else:
+        main(args)
@@ -0,0 +1,211 @@
+"""
+Local stand-in for the OpenAI endpoints the backend calls, for load testing.
+
+    cd backend && python scripts/fake_openai.py --port 8100 --stt-ms 400 --chat-ms 700 --error-rate 0.01
+
+Point the backend at it (the OpenAI SDK reads OPENAI_BASE_URL):
+
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=fake uvicorn main:app
+
+Implements POST /v1/audio/transcriptions (verbose_json), /v1/audio/speech
+(chunked audio bytes) and /v1/chat/completions: pronunciation-evaluation
+JSON (single or batched) for scoring prompts, tutor-turn JSON otherwise,
+sent as chat.completion.chunk SSE events (paced by --chat-token-ms) when
+the request sets `stream`. Each call sleeps for a log-normally distributed
+latency (the median per endpoint, spread set by --sigma) and fails with a
+500 or 429 at the configured rates, so the real client code paths
+(retries, fallbacks, thread pools) are exercised without network or cost.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from typing import Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake OpenAI")
+
+CONFIG: Dict = {
+    "stt_ms": 400.0,
+    "tts_ms": 250.0,
+    "chat_ms": 700.0,
+    "chat_token_ms": 15.0,
+    "sigma": 0.4,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "transcript": "bonjour",
+    "tts_bytes": 24000,
+    "tts_chunk_ms": 20.0,
+}
+COUNTS: Dict[str, int] = {}
+
+
+def _latency(median_ms: float) -> float:
+    if median_ms <= 0:
+        return 0.0
+    return random.lognormvariate(math.log(median_ms / 1000.0), CONFIG["sigma"])
+
+
+def _injected_error():
+    roll = random.random()
+    if roll < CONFIG["rate_limit_rate"]:
+        return JSONResponse({"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}},
+                            status_code=429, headers={"retry-after": "0"})
+    if roll < CONFIG["rate_limit_rate"] + CONFIG["error_rate"]:
+        return JSONResponse({"error": {"message": "Internal error (fake)", "type": "server_error", "code": None}}, status_code=500)
+    return None
+
+
+async def _call(name: str, median_ms: float):
+    COUNTS[name] = COUNTS.get(name, 0) + 1
+    await asyncio.sleep(_latency(median_ms))
+    return _injected_error()
+
+
+@app.post("/v1/audio/transcriptions")
+async def transcriptions(request: Request):
+    await request.form()  # consume the upload like the real API
+    error = await _call("transcriptions", CONFIG["stt_ms"])
+    if error:
+        return error
+    text = CONFIG["transcript"]
+    return {
+        "task": "transcribe",
+        "language": "french",
+        "duration": 1.5,
+        "text": text,
+        "segments": [{"id": 0, "seek": 0, "start": 0.0, "end": 1.5, "text": text, "tokens": [],
+                      "temperature": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.0, "no_speech_prob": 0.05}],
+    }
+
+
+@app.post("/v1/audio/speech")
+async def speech(request: Request):
+    body = await request.json()
+    error = await _call("speech", CONFIG["tts_ms"])
+    if error:
+        return error
+    total, chunk = CONFIG["tts_bytes"], 4096
+
+    async def audio():
+        # Deterministic filler bytes, paced like a provider streaming synthesis
+        seed = body.get("input", "").encode("utf-8") or b"\x00"
+        for offset in range(0, total, chunk):
+            yield (seed * (chunk // len(seed) + 1))[:min(chunk, total - offset)]
+            await asyncio.sleep(CONFIG["tts_chunk_ms"] / 1000.0)
+
+    media = "audio/ogg" if body.get("response_format") == "opus" else "audio/mpeg"
+    return StreamingResponse(audio(), media_type=media)
+
+
+_ATTEMPT_RE = re.compile(r'^(\d+)\. Expected: "(.*)" \| Transcribed: "(.*)"$', re.M)
+
+
+def _score() -> Dict:
+    overall = random.randint(55, 95)
+    return {"accuracy": overall, "fluency": min(100, overall + 5), "completeness": 100,
+            "overall": overall, "feedback": "Nice work, keep practicing!"}
+
+
+def _tutor_turn() -> Dict:
+    # "reply" first, as the tutor prompt asks, so the backend can stream it
+    return {
+        "reply": random.choice(["Très bien ! Qu'as-tu fait ce week-end ?", "Bonne phrase. Et ensuite, qu'est-ce qui s'est passé ?",
+                                "Presque ! On dit « je suis allée ». Tu peux répéter ?"]),
+        "corrections": [{"original": "je suis allé", "corrected": "je suis allée", "note": "Accord du participe passé"}],
+        "suggestions": ["Utilise le passé composé.", "Ajoute un détail sur le lieu."],
+        "nextPrompt": "Décris ta journée d'hier.",
+    }
+
+
+def _usage(prompt: str, text: str) -> Dict:
+    return {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+            "total_tokens": (len(prompt) + len(text)) // 4}
+
+
+def _stream(completion_id: str, model: str, prompt: str, text: str, include_usage: bool):
+    """chat.completion.chunk SSE events: role, content a few characters at a time, finish, usage"""
+    def event(choices, **extra) -> str:
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": model, "choices": choices, **extra}
+        return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+    async def events():
+        yield event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        for start in range(0, len(text), 4):
+            yield event([{"index": 0, "delta": {"content": text[start:start + 4]}, "finish_reason": None}])
+            await asyncio.sleep(CONFIG["chat_token_ms"] / 1000.0)
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if include_usage:
+            yield event([], usage=_usage(prompt, text))
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    error = await _call("chat", CONFIG["chat_ms"])
+    if error:
+        return error
+    messages = body.get("messages", [])
+    prompt = "\n".join(m.get("content") or "" for m in messages)
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    attempts = _ATTEMPT_RE.findall(prompt)
+    if attempts:
+        content = {"results": [{"id": int(n), **_score()} for n, _, _ in attempts]}
+    elif "pronunciation expert" in system:
+        content = _score()
+    elif body.get("response_format", {}).get("type") == "json_object":
+        content = _tutor_turn()
+    else:
+        content = None
+    text = json.dumps(content, ensure_ascii=False) if content is not None else "Très bien ! Continuons."
+    completion_id = f"chatcmpl-fake-{COUNTS['chat']}"
+    model = body.get("model", "gpt-4o-mini")
+    if body.get("stream"):
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return _stream(completion_id, model, prompt, text, include_usage)
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+        "usage": _usage(prompt, text),
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return {"calls": COUNTS, "config": CONFIG}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--stt-ms", type=float, default=CONFIG["stt_ms"], help="median transcription latency")
+    parser.add_argument("--tts-ms", type=float, default=CONFIG["tts_ms"], help="median time to first speech byte")
+    parser.add_argument("--chat-ms", type=float, default=CONFIG["chat_ms"], help="median chat completion latency")
+    parser.add_argument("--chat-token-ms", type=float, default=CONFIG["chat_token_ms"],
+                        help="delay between streamed chat chunks")
+    parser.add_argument("--sigma", type=float, default=CONFIG["sigma"], help="log-normal spread (0 = fixed latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls failing with 429")
+    parser.add_argument("--transcript", default=CONFIG["transcript"], help="text every transcription returns")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    CONFIG.update(stt_ms=args.stt_ms, tts_ms=args.tts_ms, chat_ms=args.chat_ms, chat_token_ms=args.chat_token_ms, sigma=args.sigma,
+                  error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, transcript=args.transcript)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
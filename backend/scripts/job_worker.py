@@ -0,0 +1,44 @@
+"""
+Run background jobs outside the API server.
+
+    cd backend && python scripts/job_worker.py [--workers 4]
+
+Claims jobs from the same queue database (JOBS_PATH) as the API processes,
+so API servers can run with JOB_WORKERS=0 and leave bulk synthesis and
+transcription to dedicated processes on the same host. Stop with Ctrl-C;
+jobs in progress are put back on the queue.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from services import jobs, provider_client  # noqa: E402
+from services.concurrency import shutdown_executors  # noqa: E402
+
+
+async def run(workers: int) -> None:
+    jobs.start(workers)
+    print(f"Job worker {jobs.WORKER_ID}: {workers} workers, limits {jobs.JOB_CONCURRENCY}, queue {jobs.JOBS_PATH}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await jobs.stop()
+        provider_client.close_client()
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=max(1, jobs.JOB_WORKERS))
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,229 @@
+"""
+Load-test harness: throughput and tail latency per endpoint, with a stored baseline.
+
+    # 1. fake provider           python scripts/fake_openai.py --port 8100
+    # 2. backend against it      OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=fake uvicorn main:app --port 8000
+    # 3. drive it
+    cd backend && python scripts/load_test.py --url http://127.0.0.1:8000 --concurrency 32 --requests 500 \\
+        --save-baseline scripts/baselines/load_test.json
+    python scripts/load_test.py --baseline scripts/baselines/load_test.json   # later: compare
+
+Scenarios: courses, lesson (catalog reads), tts, stt and practice (multipart
+WAV upload), and chat (one streamed tutor turn over /api/chat, timed to the
+final `done` event; a stream that ends without one counts as an error). Each runs --requests requests across --concurrency workers and
+reports RPS, p50/p95/p99 latency and error count. With --baseline, a
+scenario regresses when its p95 grows or its RPS drops by more than
+--tolerance; the exit status is 1 if any scenario regressed.
+--cache-bust makes every request miss the backend caches, so provider latency
+is measured instead of cache hits: TTS text is unique per request, uploads get
+a random near-silent tail (new audio bytes, same speech) and practice attempts
+a unique expected text. Transcript cache hits seen during the stt and practice
+scenarios are reported in their own column; without --cache-bust nearly every
+upload after the first is one.
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import math
+import random
+import struct
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+
+SCENARIOS = ["courses", "lesson", "tts", "stt", "practice", "chat"]
+# Scenarios that upload audio, whose transcript cache hits are reported separately
+UPLOAD_SCENARIOS = {"stt", "practice"}
+
+
+SAMPLE_RATE = 16000
+
+
+def speech_like_frames(seconds: float = 1.5, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Amplitude-modulated tone with silence either side, so the VAD keeps it (16-bit mono PCM)"""
+    frames = bytearray()
+    pad = int(0.2 * sample_rate)
+    voiced = int(seconds * sample_rate)
+    frames += b"\x00\x00" * pad
+    for i in range(voiced):
+        t = i / sample_rate
+        envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * t)
+        sample = int(9000 * envelope * math.sin(2 * math.pi * 220 * t))
+        frames += struct.pack("<h", sample)
+    frames += b"\x00\x00" * pad
+    return bytes(frames)
+
+
+def to_wav(frames: bytes, sample_rate: int = SAMPLE_RATE) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+def noise_tail(seed: int, seconds: float = 0.05, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """A few random samples far below the VAD threshold: unique bytes, no extra speech"""
+    rng = random.Random(seed)
+    return struct.pack(f"<{int(seconds * sample_rate)}h", *(rng.randint(-8, 8) for _ in range(int(seconds * sample_rate))))
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def transcript_cache_hits(client: httpx.AsyncClient) -> int:
+    """Requests served openai-whisper-cache (or cached no-speech) so far, from /health"""
+    return (await client.get("/health")).json().get("sttCache", {}).get("hits", 0)
+
+
+async def discover(client: httpx.AsyncClient) -> Dict:
+    courses = (await client.get("/api/courses")).json()
+    lessons = (await client.get(f"/api/courses/{courses[0]['id']}/lessons")).json()
+    lesson = lessons[0]
+    exercise = lesson["exercises"][0]
+    return {"lesson_id": lesson["id"], "exercise_id": exercise["id"], "expected": exercise["phrase"]["target"]}
+
+
+def build_requests(target: Dict, frames: bytes, cache_bust: bool) -> Dict[str, Callable[[httpx.AsyncClient, int], "asyncio.Future"]]:
+    wav = to_wav(frames)
+    # Unique per request across warm-up and measured runs, and across reruns against one server
+    salt, sequence = random.getrandbits(32), itertools.count()
+
+    def text(base: str) -> str:
+        return f"{base} {salt}-{next(sequence)}" if cache_bust else base
+
+    def upload():
+        audio = to_wav(frames + noise_tail(salt + next(sequence))) if cache_bust else wav
+        return {"file": ("attempt.wav", audio, "audio/wav")}
+
+    return {
+        "courses": lambda c, n: c.get("/api/courses"),
+        "lesson": lambda c, n: c.get(f"/api/lessons/{target['lesson_id']}"),
+        "tts": lambda c, n: c.post("/api/tts", json={"text": text(target["expected"]), "languageCode": "fr"}),
+        "stt": lambda c, n: c.post("/stt", params={"languageCode": "fr"}, files=upload()),
+        "practice": lambda c, n: c.post("/api/practice", params={
+            "lessonId": target["lesson_id"], "exerciseId": target["exercise_id"],
+            "expectedText": text(target["expected"]), "userId": f"load-{n % 50}", "languageCode": "fr",
+        }, files=upload()),
+        "chat": lambda c, n: c.post("/api/chat", json={
+            "sessionId": f"load-chat-{n % 50}", "text": text("Je suis allé au marché samedi."), "targetLanguage": "French",
+        }),
+    }
+
+
+def succeeded(response: httpx.Response) -> bool:
+    """Status below 400 and, for event streams (whose errors arrive after the 200), a final done event"""
+    if response.status_code >= 400:
+        return False
+    return not response.headers.get("content-type", "").startswith("text/event-stream") or "event: done" in response.text
+
+
+async def run_scenario(client: httpx.AsyncClient, send, total: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            start = time.perf_counter()
+            try:
+                response = await send(client, n)
+                ok = succeeded(response)
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50": round(percentile(latencies, 50), 1),
+        "p95": round(percentile(latencies, 95), 1),
+        "p99": round(percentile(latencies, 99), 1),
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if base["p95"] and current["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95']} -> {current['p95']} ms")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']} -> {current['rps']}")
+    return regressions
+
+
+async def main(args) -> int:
+    frames = speech_like_frames()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        target = await discover(client)
+        requests = build_requests(target, frames, args.cache_bust)
+        results = {}
+        print(f"{'scenario':<10} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'stt cached':>11}")
+        for name in args.scenarios:
+            if args.warmup:
+                await run_scenario(client, requests[name], args.warmup, min(args.concurrency, args.warmup))
+            hits_before = await transcript_cache_hits(client) if name in UPLOAD_SCENARIOS else 0
+            result = results[name] = await run_scenario(client, requests[name], args.requests, args.concurrency)
+            if name in UPLOAD_SCENARIOS:
+                result["sttCacheHits"] = await transcript_cache_hits(client) - hits_before
+            print(f"{name:<10} {result['rps']:>8.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+                  f"{result['p99']:>9.1f} {result['errors']:>7} {result.get('sttCacheHits', ''):>11}")
+        provider = (await client.get("/health")).json().get("providerClient") or {}
+
+    if provider.get("requests"):
+        print(f"provider client: init {provider['initSeconds']}s, {provider['requests']} requests over "
+              f"{provider['connectionsOpened']} connections (reuse {provider['reuseRate']:.1%})")
+    report = {"url": args.url, "concurrency": args.concurrency, "requests": args.requests,
+              "cacheBust": args.cache_bust, "timestamp": int(time.time()), "scenarios": results,
+              "providerClient": provider}
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline written to {path}")
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests before each scenario")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--cache-bust", action="store_true", help="make every request miss the backend caches")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare results against a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95/RPS regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
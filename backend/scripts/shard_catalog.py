@@ -0,0 +1,66 @@
+"""
+Split data/courses.json into the sharded catalog read by CATALOG_MODE=lean.
+
+    cd backend && python scripts/shard_catalog.py [--source data/courses.json] [--out data/catalog]
+
+Writes <out>/lessons/<course id>.json (one course's lessons each) and then
+<out>/index.json (course summaries plus a lesson -> course map). The index
+is written last and atomically, so a running server hot-reloads onto a
+complete set of shards. Shards of courses no longer in the catalog are removed.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import course_service  # noqa: E402
+
+
+def _write_json(path: Path, data) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def shard(source: Path, out: Path) -> Dict:
+    data = json.loads(source.read_text(encoding="utf-8"))
+    courses: List[Dict] = data.get("courses", [])
+    known = {c["id"] for c in courses}
+    by_course: Dict[str, List[Dict]] = {c["id"]: [] for c in courses}
+    orphans = 0
+    for lesson in data.get("lessons", []):
+        if lesson["courseId"] in known:
+            by_course[lesson["courseId"]].append(lesson)
+        else:
+            orphans += 1
+
+    course_service.CATALOG_DIR = out
+    (out / "lessons").mkdir(parents=True, exist_ok=True)
+    written = set()
+    for course_id, lessons in by_course.items():
+        path = course_service.shard_path(course_id)
+        _write_json(path, lessons)
+        written.add(path.name)
+    _write_json(out / "index.json", {
+        "courses": courses,
+        "lessonCourse": {l["id"]: course_id for course_id, lessons in by_course.items() for l in lessons},
+    })
+    removed = 0
+    for stale in (out / "lessons").glob("*.json"):
+        if stale.name not in written:
+            stale.unlink()
+            removed += 1
+    return {"courses": len(courses), "lessons": sum(len(l) for l in by_course.values()),
+            "orphanLessons": orphans, "removedShards": removed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=course_service.DATA_PATH)
+    parser.add_argument("--out", type=Path, default=course_service.CATALOG_DIR)
+    args = parser.parse_args()
+    print(f"{shard(args.source, args.out)} -> {args.out}")
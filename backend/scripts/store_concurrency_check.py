@@ -0,0 +1,71 @@
+"""
+Hammer one user's progress from several worker processes through the
+SQLite store and verify no update is lost.
+
+    cd backend && python scripts/store_concurrency_check.py [--workers 4 --updates 2000]
+
+Each process queues `updates` increments (write-behind) plus one
+completed lesson; the final record must contain every one of them.
+"""
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.store import SQLiteStore  # noqa: E402
+
+KEY = "hammer-user"
+DEFAULT = {"userId": KEY, "courseId": "", "completedLessons": [], "averageScore": 0.0, "totalPracticeTime": 0}
+
+
+def increment(progress):
+    progress["totalPracticeTime"] += 1
+
+
+def worker(db_path: str, worker_id: int, updates: int) -> None:
+    store = SQLiteStore(Path(db_path), flush_interval_ms=5)
+    lesson = f"lesson-{worker_id}"
+
+    def complete(progress):
+        if lesson not in progress["completedLessons"]:
+            progress["completedLessons"].append(lesson)
+
+    for _ in range(updates):
+        store.update_progress(KEY, DEFAULT, increment)
+    store.update_progress(KEY, DEFAULT, complete)
+    store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "store.db")
+        SQLiteStore(Path(db_path)).close()  # create schema / WAL before workers race
+        start = time.perf_counter()
+        procs = [multiprocessing.Process(target=worker, args=(db_path, i, args.updates)) for i in range(args.workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        store = SQLiteStore(Path(db_path))
+        final = store.get_progress(KEY)
+        store.close()
+
+    expected = args.workers * args.updates
+    lessons = sorted(final["completedLessons"])
+    print(f"{args.workers} workers x {args.updates} updates in {elapsed:.2f}s "
+          f"({expected / elapsed:,.0f} updates/s)")
+    print(f"totalPracticeTime={final['totalPracticeTime']} (expected {expected}), completedLessons={lessons}")
+    ok = final["totalPracticeTime"] == expected and len(lessons) == args.workers
+    print("OK" if ok else "LOST UPDATES")
+    sys.exit(0 if ok else 1)
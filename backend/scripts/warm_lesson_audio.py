@@ -0,0 +1,33 @@
+"""
+Pre-synthesize audio for every phrase in data/courses.json.
+
+    cd backend && python scripts/warm_lesson_audio.py [--workers 8]
+
+Files are written content-addressed to LESSON_AUDIO_DIR and served from
+/audio/<key>.mp3 (filled into Phrase.audioUrl). Phrases that already have
+audio are skipped, so re-running after catalog edits is incremental.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services import course_service, lesson_audio  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=lesson_audio.WORKERS, help="parallel TTS requests")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # The full catalog file, whatever CATALOG_MODE the server runs with
+    data = json.loads(course_service.DATA_PATH.read_text(encoding="utf-8"))
+    stats = lesson_audio.warm(data, workers=args.workers)
+    print(f"{stats} in {time.perf_counter() - start:.1f}s -> {lesson_audio.AUDIO_DIR}")
+    sys.exit(1 if stats["failed"] else 0)
@@ -0,0 +1,59 @@
+import io
+import struct
+import sys
+import wave
+from array import array
+from typing import Optional, Tuple
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = 16000, channels: int = 1) -> bytes:
+    """Wrap raw 16-bit little-endian PCM in a WAV container"""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(SAMPLE_WIDTH)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+def parse_wav_header(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """
+    Parse a streamed WAV header. Returns (sample_rate, channels, data_offset)
+    or None if `data` does not start with a 16-bit PCM RIFF/WAVE header.
+    """
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    pos = 12
+    sample_rate = channels = None
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack("<I", data[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt " and pos + 24 <= len(data):
+            fmt, channels, sample_rate = struct.unpack("<HHI", data[pos + 8:pos + 16])
+            bits = struct.unpack("<H", data[pos + 22:pos + 24])[0]
+            if fmt != 1 or bits != 16:
+                return None
+        elif chunk_id == b"data":
+            if sample_rate is None:
+                return None
+            return sample_rate, channels, pos + 8
+        pos += 8 + size + (size & 1)
+    return None
+
+def pcm_rms(pcm: bytes) -> float:
+    """Root-mean-square level of 16-bit PCM, normalized to 0..1"""
+    samples = array("h")
+    samples.frombytes(pcm[: len(pcm) - (len(pcm) % SAMPLE_WIDTH)])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return (sum(s * s for s in samples) / len(samples)) ** 0.5 / 32768.0
+
+def wav_duration_ms(header: bytes, total_size: int) -> int:
+    """Duration of a 16-bit PCM WAV from its leading bytes and total size (0 if not WAV)"""
+    parsed = parse_wav_header(header)
+    if not parsed:
+        return 0
+    sample_rate, channels, offset = parsed
+    return int(max(0, total_size - offset) / (sample_rate * channels * SAMPLE_WIDTH) * 1000)
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+def content_key(*parts: str) -> str:
+    """Stable content-addressed key (sha256 hex) for a tuple of strings"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update((part or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU bounded by item count and total bytes."""
+
+    def __init__(self, max_items: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        size = len(value)
+        if self.max_items <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = value
+            self._bytes += size
+            while len(self._data) > self.max_items or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "items": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class TTLCache:
+    """
+    Thread-safe LRU of JSON-serializable values with a per-entry time-to-live.
+    Can be snapshotted to / restored from a JSON file so entries survive restarts.
+    """
+
+    def __init__(self, max_items: int = 10000, ttl_seconds: float = 86400.0):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.time():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any, expires_at: Optional[float] = None) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at or time.time() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def save(self, path: Path) -> None:
+        """Write unexpired entries to `path` (atomic replace)"""
+        now = time.time()
+        with self._lock:
+            entries = [[k, exp, v] for k, (exp, v) in self._data.items() if exp > now]
+        tmp = Path(f"{path}.tmp")
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(entries), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Cache snapshot write error ({path}): {e}")
+
+    def load(self, path: Path) -> int:
+        """Restore entries saved by `save`; returns how many were loaded"""
+        try:
+            entries = json.loads(Path(path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"Cache snapshot read error ({path}): {e}")
+            return 0
+        now = time.time()
+        loaded = 0
+        for key, expires_at, value in entries:
+            if expires_at > now:
+                self.put(key, value, expires_at)
+                loaded += 1
+        return loaded
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "items": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class DiskCache:
+    """
+    Content-addressed file cache with a total size cap.
+    Files live at <root>/<key[:2]>/<key><suffix>; least recently used files
+    (by mtime, refreshed on read) are evicted once the cap is exceeded.
+    Several kinds of file (`suffixes`, e.g. audio formats) can share one
+    directory and one cap; get/put pick one, `suffix` by default.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 256 * 1024 * 1024, suffix: str = "",
+                 suffixes: Tuple[str, ...] = ()):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.suffixes = (suffix,) + tuple(s for s in suffixes if s != suffix)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._enabled = max_bytes > 0
+        if self._enabled:
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                self._bytes = sum(p.stat().st_size for p in self._files())
+            except OSError as e:
+                print(f"Disk cache disabled ({self.root}): {e}")
+                self._enabled = False
+
+    def path_for(self, key: str, suffix: Optional[str] = None) -> Path:
+        suffix = self.suffix if suffix is None else suffix
+        if suffix not in self.suffixes:
+            raise ValueError(f"unknown disk cache suffix {suffix!r}")
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _files(self):
+        for suffix in self.suffixes:
+            yield from self.root.glob(f"*/*{suffix}")
+
+    def get(self, key: str, suffix: Optional[str] = None) -> Optional[bytes]:
+        if not self._enabled:
+            return None
+        path = self.path_for(key, suffix)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, value: bytes, suffix: Optional[str] = None) -> None:
+        if not self._enabled or len(value) > self.max_bytes:
+            return
+        path = self.path_for(key, suffix)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existing = path.stat().st_size if path.exists() else 0
+            tmp.write_bytes(value)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Disk cache write error: {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._bytes += len(value) - existing
+            over = self._bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used files until back under the size cap"""
+        with self._lock:
+            entries = []
+            for p in self._files():
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.evictions += 1
+            self._bytes = total
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from models import Course, Lesson
+from services import course_service
+
+# Bodies smaller than this are sent uncompressed (gzip framing would outweigh the savings)
+GZIP_MIN_BYTES = 512
+
+_courses_adapter = TypeAdapter(List[Course])
+_lessons_adapter = TypeAdapter(List[Lesson])
+
+
+class SerializedResponse(NamedTuple):
+    body: bytes
+    gzipped: Optional[bytes]
+    etag: str  # strong, quoted; derived from the body so all workers agree
+
+    @property
+    def gzip_etag(self) -> str:
+        """The gzipped body is a different representation, so it gets its own strong ETag"""
+        return f'{self.etag[:-1]}-gz"'
+
+
+def _serialize(body: bytes) -> SerializedResponse:
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+    if gzipped is not None and len(gzipped) >= len(body):
+        gzipped = None
+    return SerializedResponse(body, gzipped, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+_entries: Dict[str, SerializedResponse] = {}
+_entries_version = -1
+_lock = threading.Lock()
+builds = 0
+
+
+def _cached(key: str, build: Callable[[], Optional[bytes]]) -> Optional[SerializedResponse]:
+    """
+    Serialized response for `key`, built at most once per catalog version.
+    The version is read before building, so a concurrent in-place catalog
+    change leaves the entry stale (and rebuilt) rather than wrongly current.
+    """
+    global _entries_version, builds
+    version = course_service.catalog_version()
+    with _lock:
+        if version != _entries_version:
+            _entries.clear()
+            _entries_version = version
+        entry = _entries.get(key)
+    if entry is not None:
+        return entry
+    body = build()
+    if body is None:
+        return None
+    entry = _serialize(body)
+    with _lock:
+        builds += 1
+        if _entries_version == version:
+            _entries[key] = entry
+    return entry
+
+
+def courses() -> SerializedResponse:
+    return _cached("courses", lambda: _courses_adapter.dump_json(
+        _courses_adapter.validate_python(course_service.get_all_courses())))
+
+
+def course(course_id: str) -> Optional[SerializedResponse]:
+    def build():
+        found = course_service.get_course_by_id(course_id)
+        return Course.model_validate(found).model_dump_json().encode() if found else None
+    return _cached(f"course:{course_id}", build)
+
+
+def course_lessons(course_id: str) -> SerializedResponse:
+    # Unknown course ids share one empty-list entry so arbitrary ids can't grow the cache
+    key = f"lessons:{course_id}" if course_service.get_lessons_by_course(course_id) else "lessons:"
+    return _cached(key, lambda: _lessons_adapter.dump_json(
+        _lessons_adapter.validate_python(course_service.get_lessons_by_course(course_id))))
+
+
+def courses_page(filters: Dict[str, str], limit: Optional[int], cursor: Optional[str]) -> Tuple[SerializedResponse, course_service.Page]:
+    """
+    One page of filtered courses. Entries are keyed on the normalized filters
+    and the resolved page offset (not the raw cursor), and filters that match
+    nothing share one key, so request variety can't grow the cache unboundedly.
+    """
+    page = course_service.find_courses(filters, limit, cursor)
+    if page.items:
+        normalized = "&".join(f"{k}={v.strip().lower()}" for k, v in sorted(filters.items()))
+        key = f"courses?{normalized}&start={page.start}&limit={len(page.items)}"
+    else:
+        key = "courses?empty"
+    entry = _cached(key, lambda: _courses_adapter.dump_json(_courses_adapter.validate_python(page.items)))
+    return entry, page
+
+
+def course_lessons_page(course_id: str, limit: Optional[int], cursor: Optional[str]) -> Tuple[SerializedResponse, course_service.Page]:
+    page = course_service.page_lessons(course_id, limit, cursor)
+    key = f"lessons:{course_id}?start={page.start}&limit={len(page.items)}" if page.items else "lessons:"
+    entry = _cached(key, lambda: _lessons_adapter.dump_json(_lessons_adapter.validate_python(page.items)))
+    return entry, page
+
+
+def lesson(lesson_id: str) -> Optional[SerializedResponse]:
+    def build():
+        found = course_service.get_lesson_by_id(lesson_id)
+        return Lesson.model_validate(found).model_dump_json().encode() if found else None
+    return _cached(f"lesson:{lesson_id}", build)
+
+
+def get_stats() -> Dict:
+    with _lock:
+        return {
+            "version": _entries_version,
+            "entries": len(_entries),
+            "bytes": sum(len(e.body) + len(e.gzipped or b"") for e in _entries.values()),
+            "builds": builds,
+        }
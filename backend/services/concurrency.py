@@ -0,0 +1,55 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Max concurrent blocking calls per provider. Calls beyond the limit queue
+# without holding the event loop, so a worker can keep many requests in flight.
+PROVIDER_LIMITS: Dict[str, int] = {
+    "stt": int(os.getenv("STT_MAX_CONCURRENCY", "32")),
+    "tts": int(os.getenv("TTS_MAX_CONCURRENCY", "32")),
+    "eval": int(os.getenv("EVAL_MAX_CONCURRENCY", "64")),
+    # Streaming chat holds a worker per open completion stream
+    "chat": int(os.getenv("CHAT_MAX_CONCURRENCY", "64")),
+    # Local CPU work (audio decoding/VAD), not a remote provider
+    "audio": int(os.getenv("AUDIO_MAX_CONCURRENCY", str(os.cpu_count() or 4))),
+    # Session/progress store I/O (SQLite), kept off the event loop
+    "store": int(os.getenv("STORE_MAX_CONCURRENCY", "8")),
+    # Job queue I/O (SQLite); job handlers run on their providers' pools
+    "jobs": int(os.getenv("JOB_QUEUE_MAX_CONCURRENCY", "4")),
+}
+DEFAULT_LIMIT = 16
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+def _executor(provider: str) -> ThreadPoolExecutor:
+    executor = _executors.get(provider)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(provider)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max(1, PROVIDER_LIMITS.get(provider, DEFAULT_LIMIT)),
+                    thread_name_prefix=f"{provider}-worker",
+                )
+                _executors[provider] = executor
+    return executor
+
+async def run_blocking(provider: str, fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking provider call on that provider's bounded thread pool"""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context (e.g. request timing spans) into the worker thread
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor(provider), functools.partial(ctx.run, fn, *args, **kwargs))
+
+def shutdown_executors() -> None:
+    with _lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
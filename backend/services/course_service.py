@@ -1,73 +1,423 @@
+import base64
+import bisect
 import json
 import os
-from typing import List, Optional, Dict
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator, List, NamedTuple, Optional, Dict, Tuple
 from pathlib import Path
+from urllib.parse import quote
 
 # Load courses data from JSON file
 DATA_PATH = Path(__file__).parent.parent / "data" / "courses.json"
 
-_courses_data: Optional[Dict] = None
+# How often (seconds) to check courses.json for edits; 0 disables hot reload
+RELOAD_INTERVAL = float(os.getenv("COURSES_RELOAD_INTERVAL", "2.0"))
+
+# "full": all of courses.json resident (default)
+# "lean": only course summaries resident; each course's lessons are read from
+#         its shard on first use and kept in an LRU (build shards with
+#         scripts/shard_catalog.py)
+CATALOG_MODE = os.getenv("CATALOG_MODE", "full")
+CATALOG_DIR = Path(os.getenv("CATALOG_DIR", Path(__file__).parent.parent / "data" / "catalog"))
+# Courses whose lessons stay resident in lean mode
+LESSON_SHARD_CACHE = int(os.getenv("LESSON_SHARD_CACHE", "32"))
+
+# Course fields with a secondary index (filterable on /api/courses)
+FILTER_FIELDS = ("targetLanguage", "difficulty", "topicCategory")
+# Largest `limit` accepted by the paginated catalog endpoints
+MAX_PAGE_SIZE = int(os.getenv("CATALOG_MAX_PAGE_SIZE", "100"))
+
+
+def _index_value(value) -> str:
+    return str(value or "").strip().lower()
+
+def shard_path(course_id: str) -> Path:
+    """Lesson shard file of one course in CATALOG_DIR"""
+    return CATALOG_DIR / "lessons" / f"{quote(course_id, safe='')}.json"
+
+
+class _Lessons:
+    """Lessons (of the whole catalog, or of one course shard) with lookup indexes"""
+
+    def __init__(self, lessons: List[Dict]):
+        self.lesson_by_id: Dict[str, Dict] = {}
+        self.lessons_by_course: Dict[str, List[Dict]] = {}
+        # lesson id -> {exercise id -> position in lesson["exercises"]}
+        self.exercise_pos: Dict[str, Dict[str, int]] = {}
+        # lesson id -> position in its course's sorted lesson list
+        self.lesson_pos: Dict[str, int] = {}
+
+        for lesson in lessons:
+            self.lesson_by_id[lesson["id"]] = lesson
+            self.lessons_by_course.setdefault(lesson["courseId"], []).append(lesson)
+            self.exercise_pos[lesson["id"]] = {
+                ex["id"]: i for i, ex in enumerate(lesson.get("exercises", []))
+            }
+        for course_lessons in self.lessons_by_course.values():
+            course_lessons.sort(key=lambda x: x["order"])
+            self.lesson_pos.update((lesson["id"], i) for i, lesson in enumerate(course_lessons))
+
+
+class _Catalog:
+    """Immutable snapshot of courses.json with lookup indexes built once"""
+
+    def __init__(self, data: Dict, mtime_ns: int = 0):
+        self._data = data
+        self._index_courses(data.get("courses", []), mtime_ns)
+        self._lessons = _Lessons(data.get("lessons", []))
+
+    def _index_courses(self, courses: List[Dict], mtime_ns: int) -> None:
+        self.mtime_ns = mtime_ns
+        self.courses: List[Dict] = courses
+        self.course_by_id: Dict[str, Dict] = {c["id"]: c for c in courses}
+        self.course_pos: Dict[str, int] = {c["id"]: i for i, c in enumerate(courses)}
+        self._all_positions = list(range(len(courses)))
+        # field -> normalized value -> ascending positions in self.courses
+        self.course_index: Dict[str, Dict[str, List[int]]] = {field: {} for field in FILTER_FIELDS}
+        for i, course in enumerate(courses):
+            for field in FILTER_FIELDS:
+                self.course_index[field].setdefault(_index_value(course.get(field)), []).append(i)
+
+    @property
+    def data(self) -> Dict:
+        return self._data
+
+    @property
+    def lesson_count(self) -> int:
+        return len(self._lessons.lesson_by_id)
+
+    def lessons_of_course(self, course_id: str) -> _Lessons:
+        return self._lessons
+
+    def lessons_of_lesson(self, lesson_id: str) -> _Lessons:
+        return self._lessons
+
+    def find(self, filters: Dict[str, str]) -> List[int]:
+        """Ascending positions of courses matching every filter (intersection of index lists)"""
+        lists = [self.course_index[field].get(_index_value(value), []) for field, value in filters.items()]
+        if not lists:
+            return self._all_positions
+        lists.sort(key=len)
+        matches = lists[0]
+        for other in lists[1:]:
+            members = set(other)
+            matches = [pos for pos in matches if pos in members]
+        return matches
+
+    def stats(self) -> Dict:
+        return {"mode": "full", "courses": len(self.courses), "lessons": self.lesson_count}
+
+
+class _LeanCatalog(_Catalog):
+    """
+    Course summaries plus a lesson -> course map from CATALOG_DIR/index.json;
+    lesson bodies load per course from their shard and stay in an LRU of
+    LESSON_SHARD_CACHE courses.
+    """
+
+    def __init__(self, index: Dict, mtime_ns: int = 0, max_shards: int = LESSON_SHARD_CACHE):
+        self._index_courses(index.get("courses", []), mtime_ns)
+        self.lesson_course: Dict[str, str] = index.get("lessonCourse", {})
+        self.max_shards = max(1, max_shards)
+        self._shards: "OrderedDict[str, _Lessons]" = OrderedDict()
+        self._shards_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def data(self) -> Dict:
+        """Course summaries and the lessons currently resident"""
+        with self._shards_lock:
+            shards = list(self._shards.values())
+        return {"courses": self.courses, "lessons": [l for shard in shards for l in shard.lesson_by_id.values()]}
+
+    @property
+    def lesson_count(self) -> int:
+        return len(self.lesson_course)
+
+    def lessons_of_course(self, course_id: str) -> _Lessons:
+        with self._shards_lock:
+            shard = self._shards.get(course_id)
+            if shard is not None:
+                self._shards.move_to_end(course_id)
+                self.hits += 1
+                return shard
+            self.misses += 1
+        if course_id not in self.course_by_id:
+            return _EMPTY_LESSONS
+        shard = _load_shard(course_id, self.courses)
+        if shard is None:
+            return _EMPTY_LESSONS
+        with self._shards_lock:
+            # A concurrent load of the same course may have won; keep one copy
+            shard = self._shards.setdefault(course_id, shard)
+            self._shards.move_to_end(course_id)
+            while len(self._shards) > self.max_shards:
+                self._shards.popitem(last=False)
+                self.evictions += 1
+        return shard
+
+    def lessons_of_lesson(self, lesson_id: str) -> _Lessons:
+        course_id = self.lesson_course.get(lesson_id)
+        return self.lessons_of_course(course_id) if course_id else _EMPTY_LESSONS
+
+    def stats(self) -> Dict:
+        with self._shards_lock:
+            return {
+                "mode": "lean",
+                "courses": len(self.courses),
+                "lessons": self.lesson_count,
+                "residentCourses": len(self._shards),
+                "maxResidentCourses": self.max_shards,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_EMPTY_LESSONS = _Lessons([])
+
+
+def _read_shard(course_id: str) -> Optional[List[Dict]]:
+    try:
+        with open(shard_path(course_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Lesson shard for {course_id} unavailable: {e}")
+        return None
+
+def _load_shard(course_id: str, courses: List[Dict]) -> Optional[_Lessons]:
+    lessons = _read_shard(course_id)
+    if lessons is None:
+        return None
+    # Shard listeners (e.g. audio URL annotation) run before the lessons become visible
+    for listener in list(_shard_listeners):
+        try:
+            listener({"courses": courses, "lessons": lessons})
+        except Exception as e:
+            print(f"Lesson shard listener error: {e}")
+    return _Lessons(lessons)
+
+
+_catalog: Optional[_Catalog] = None
+_last_check = 0.0
+# Bumped on every (re)load and in-place annotation, so derived caches know when to rebuild
+_version = 0
+_reload_lock = threading.Lock()
+# Called with the raw catalog data after every (re)load
+_reload_listeners: List[Callable[[Dict], None]] = []
+# Lean mode: called with {"courses": ..., "lessons": <one course's lessons>} per shard load
+_shard_listeners: List[Callable[[Dict], None]] = []
+
+def add_reload_listener(listener: Callable[[Dict], None]) -> None:
+    """Register a callback for catalog (re)loads; runs immediately if already loaded"""
+    _reload_listeners.append(listener)
+    if _catalog is not None:
+        listener(_catalog.data)
+
+def add_shard_listener(listener: Callable[[Dict], None]) -> None:
+    """Register a callback for lesson shards loaded on demand in lean mode"""
+    _shard_listeners.append(listener)
+
+def catalog_version() -> int:
+    """Monotonic counter identifying the current catalog contents"""
+    _get_catalog()
+    return _version
+
+def mark_changed() -> None:
+    """Signal that catalog dicts were modified in place (e.g. audio URLs filled in)"""
+    global _version
+    _version += 1
+
+def _notify(catalog: _Catalog) -> None:
+    for listener in list(_reload_listeners):
+        try:
+            listener(catalog.data)
+        except Exception as e:
+            print(f"Course catalog listener error: {e}")
+
+def _source_path() -> Path:
+    # Lean mode reloads when index.json changes (shard_catalog.py writes it last)
+    return CATALOG_DIR / "index.json" if CATALOG_MODE == "lean" else DATA_PATH
+
+def _read_catalog() -> _Catalog:
+    path = _source_path()
+    mtime_ns = path.stat().st_mtime_ns
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return _LeanCatalog(data, mtime_ns) if CATALOG_MODE == "lean" else _Catalog(data, mtime_ns)
+
+def _maybe_reload():
+    """Rebuild the catalog if courses.json changed on disk since it was loaded"""
+    global _catalog, _last_check
+    with _reload_lock:
+        _last_check = time.monotonic()
+        try:
+            if _source_path().stat().st_mtime_ns == _catalog.mtime_ns:
+                return
+            new_catalog = _read_catalog()
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the previous snapshot (e.g. editor mid-save)
+            print(f"Course catalog reload failed: {e}")
+            return
+        _catalog = new_catalog  # single reference swap: readers see old or new, never half-built
+        mark_changed()
+        print(f"Course catalog reloaded: {len(new_catalog.courses)} courses, {new_catalog.lesson_count} lessons")
+    _notify(new_catalog)
+
+def _get_catalog() -> _Catalog:
+    """Return the current catalog snapshot, loading or hot-reloading as needed"""
+    global _catalog, _last_check
+    if _catalog is None:
+        loaded = None
+        with _reload_lock:
+            if _catalog is None:
+                _catalog = loaded = _read_catalog()
+                _last_check = time.monotonic()
+                mark_changed()
+        if loaded is not None:
+            _notify(loaded)
+    elif RELOAD_INTERVAL > 0 and time.monotonic() - _last_check >= RELOAD_INTERVAL:
+        _maybe_reload()
+    return _catalog
 
 def _load_data():
     """Load courses data from JSON file (cached)"""
-    global _courses_data
-    if _courses_data is None:
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            _courses_data = json.load(f)
-    return _courses_data
+    return _get_catalog().data
+
+def iter_catalog_data() -> Iterator[Dict]:
+    """
+    The whole catalog for bulk tools, as {"courses": ..., "lessons": ...}
+    chunks: all of it at once in full mode, one course at a time from the
+    shards on disk in lean mode (without making them resident).
+    """
+    catalog = _get_catalog()
+    if not isinstance(catalog, _LeanCatalog):
+        yield catalog.data
+        return
+    for course in catalog.courses:
+        lessons = _read_shard(course["id"])
+        if lessons:
+            yield {"courses": catalog.courses, "lessons": lessons}
 
 def get_all_courses() -> List[Dict]:
     """Get all available courses"""
-    data = _load_data()
-    return data.get("courses", [])
+    return _get_catalog().courses
 
 def get_course_by_id(course_id: str) -> Optional[Dict]:
     """Get a specific course by ID"""
-    courses = get_all_courses()
-    for course in courses:
-        if course["id"] == course_id:
-            return course
-    return None
+    return _get_catalog().course_by_id.get(course_id)
 
 def get_lessons_by_course(course_id: str) -> List[Dict]:
-    """Get all lessons for a specific course"""
-    data = _load_data()
-    lessons = data.get("lessons", [])
-    course_lessons = [l for l in lessons if l["courseId"] == course_id]
-    # Sort by order
-    return sorted(course_lessons, key=lambda x: x["order"])
+    """Get all lessons for a specific course (sorted by order)"""
+    return _get_catalog().lessons_of_course(course_id).lessons_by_course.get(course_id, [])
 
 def get_lesson_by_id(lesson_id: str) -> Optional[Dict]:
     """Get a specific lesson by ID"""
-    data = _load_data()
-    lessons = data.get("lessons", [])
-    for lesson in lessons:
-        if lesson["id"] == lesson_id:
-            return lesson
-    return None
+    return _get_catalog().lessons_of_lesson(lesson_id).lesson_by_id.get(lesson_id)
 
 def get_exercise_by_id(lesson_id: str, exercise_id: str) -> Optional[Dict]:
     """Get a specific exercise from a lesson"""
-    lesson = get_lesson_by_id(lesson_id)
-    if not lesson:
+    lessons = _get_catalog().lessons_of_lesson(lesson_id)
+    pos = lessons.exercise_pos.get(lesson_id, {}).get(exercise_id)
+    if pos is None:
         return None
-    
-    exercises = lesson.get("exercises", [])
-    for exercise in exercises:
-        if exercise["id"] == exercise_id:
-            return exercise
-    return None
+    return lessons.lesson_by_id[lesson_id]["exercises"][pos]
 
 def get_next_exercise(lesson_id: str, current_exercise_id: str) -> Optional[Dict]:
     """Get the next exercise in a lesson, or None if this is the last one"""
-    lesson = get_lesson_by_id(lesson_id)
-    if not lesson:
+    lessons = _get_catalog().lessons_of_lesson(lesson_id)
+    pos = lessons.exercise_pos.get(lesson_id, {}).get(current_exercise_id)
+    if pos is None:
         return None
-    
-    exercises = lesson.get("exercises", [])
-    for i, exercise in enumerate(exercises):
-        if exercise["id"] == current_exercise_id:
-            if i + 1 < len(exercises):
-                return exercises[i + 1]
-            return None
+    exercises = lessons.lesson_by_id[lesson_id].get("exercises", [])
+    if pos + 1 < len(exercises):
+        return exercises[pos + 1]
     return None
+
+# --- Filtering and cursor pagination ---
+
+class Page(NamedTuple):
+    items: List[Dict]
+    start: int                  # offset of items[0] in the full (filtered) result
+    total: int                  # size of the full (filtered) result
+    next_cursor: Optional[str]  # None on the last page
+
+def encode_cursor(scope: str, position: int, item_id: str) -> str:
+    raw = json.dumps([scope, position, item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, scope: str) -> Tuple[int, str]:
+    """
+    (position, id) of the last item already returned; ValueError if malformed
+    or if the cursor was issued for a different listing (`scope`)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_scope, position, item_id = json.loads(raw)
+        position, item_id = int(position), str(item_id)
+        if position < 0:
+            raise ValueError("negative position")
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+    if cursor_scope != scope:
+        raise ValueError("cursor belongs to a different listing")
+    return position, item_id
+
+def _resume_at(cursor: Optional[str], scope: str, positions: Callable[[str], Optional[int]]) -> int:
+    """
+    Position to continue after. Cursors name the last item seen, so a reload
+    that moves items doesn't skip or repeat them; if that item is gone from
+    the listing, the items after it have moved up into its recorded position,
+    so paging continues from there.
+    """
+    if not cursor:
+        return -1
+    position, item_id = decode_cursor(cursor, scope)
+    current = positions(item_id)
+    return position - 1 if current is None else current
+
+def _courses_scope(filters: Dict[str, str]) -> str:
+    return "courses?" + "&".join(f"{field}={_index_value(filters[field])}" for field in sorted(filters))
+
+def find_courses(filters: Dict[str, str], limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """
+    Courses matching every filter (case-insensitive equality on FILTER_FIELDS),
+    in catalog order, `limit` at a time after `cursor`. Cursors are only valid
+    with the filters they were issued for.
+    """
+    catalog = _get_catalog()
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"cannot filter courses by {sorted(unknown)}")
+    scope = _courses_scope(filters)
+    matches = catalog.find(filters)
+    # Cursor positions are catalog positions, mapped into the filtered list
+    start = bisect.bisect_right(matches, _resume_at(cursor, scope, catalog.course_pos.get))
+    end = len(matches) if limit is None else min(len(matches), start + limit)
+    items = [catalog.courses[pos] for pos in matches[start:end]]
+    next_cursor = encode_cursor(scope, matches[end - 1], items[-1]["id"]) if items and end < len(matches) else None
+    return Page(items, start, len(matches), next_cursor)
+
+def page_lessons(course_id: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """A course's lessons in order, `limit` at a time after `cursor` (issued for this course)"""
+    lessons = _get_catalog().lessons_of_course(course_id)
+    course_lessons = lessons.lessons_by_course.get(course_id, [])
+
+    def position(lesson_id: str) -> Optional[int]:
+        # lesson_pos spans every course in full mode; only this course's lessons count
+        lesson = lessons.lesson_by_id.get(lesson_id)
+        return lessons.lesson_pos[lesson_id] if lesson and lesson["courseId"] == course_id else None
+
+    scope = f"lessons:{course_id}"
+    start = _resume_at(cursor, scope, position) + 1
+    end = len(course_lessons) if limit is None else min(len(course_lessons), start + limit)
+    items = course_lessons[start:end]
+    next_cursor = encode_cursor(scope, end - 1, items[-1]["id"]) if items and end < len(course_lessons) else None
+    return Page(items, start, len(course_lessons), next_cursor)
+
+def get_stats() -> Dict:
+    return _get_catalog().stats()
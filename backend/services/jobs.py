@@ -0,0 +1,434 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services import course_service, lesson_audio, metrics, pronunciation, stt, tts
+from services.concurrency import run_blocking
+from services.metrics import Counter
+from services.provider_client import get_client
+from services.store import BUSY_TIMEOUT_MS, STORE_PATH
+
+# Job queue database; WAL mode, shared by every worker process on the host
+JOBS_PATH = Path(os.getenv("JOBS_PATH", STORE_PATH.parent / "jobs.db"))
+# Jobs run concurrently by this process (0 = submit only; run scripts/job_worker.py elsewhere)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Concurrent jobs per provider, so a bulk upload can't take every slot from the others
+JOB_CONCURRENCY: Dict[str, int] = {
+    "tts": int(os.getenv("JOB_TTS_CONCURRENCY", "2")),
+    "stt": int(os.getenv("JOB_STT_CONCURRENCY", "2")),
+    "eval": int(os.getenv("JOB_EVAL_CONCURRENCY", "4")),
+}
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Retry backoff: base * 2^(attempt - 1), capped
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "900"))
+# A running job whose worker hasn't finished it by then is handed to another worker
+JOB_LEASE_SECONDS = JOB_TIMEOUT_SECONDS + 60
+# How often idle workers look for jobs submitted by other processes
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# Finished jobs (and their results) are deleted after this long
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "604800"))
+# Longest a status request may long-poll
+MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "30"))
+
+FINAL_STATUSES = ("succeeded", "failed")
+# Bad input: retrying can't help
+_PERMANENT_ERRORS = (ValueError, KeyError, TypeError)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+JOBS = Counter("natulang_jobs_total", "Background job attempts by kind and outcome (succeeded, retried, failed)")
+metrics.register(JOBS)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+
+class JobQueue:
+    """
+    Persistent job queue in SQLite. Workers claim jobs inside BEGIN IMMEDIATE
+    transactions, so any number of processes can share one database without
+    running a job twice; a claim is a lease, and a job whose worker died is
+    claimed again once its lease runs out. All methods block on SQLite; call
+    them on the "jobs" pool.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, params TEXT NOT NULL, audio BLOB, "
+            "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "run_after REAL NOT NULL, lease_until REAL, worker TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs (status, run_after)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly where needed
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, kind: str, params: Dict, audio: Optional[bytes] = None,
+               max_attempts: int = JOB_MAX_ATTEMPTS) -> Dict:
+        now = time.time()
+        job_id = f"job-{uuid.uuid4().hex}"
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, status, params, audio, max_attempts, run_after, created_at, updated_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params), audio, max(1, max_attempts), now, now, now),
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Public view of a job (no audio), or None if unknown or expired"""
+        row = self._conn().execute(
+            "SELECT id, kind, status, attempts, max_attempts, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "kind": row[1], "status": row[2], "attempts": row[3], "maxAttempts": row[4],
+            "result": json.loads(row[5]) if row[5] else None, "error": row[6],
+            "createdAt": _iso(row[7]), "updatedAt": _iso(row[8]),
+        }
+
+    def claim(self, kinds: List[str], worker: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Dict]:
+        """Lease the oldest runnable job of one of `kinds` to `worker`"""
+        if not kinds:
+            return None
+        conn = self._conn()
+        now = time.time()
+        marks = ",".join("?" * len(kinds))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT id, kind, params, audio, attempts, max_attempts FROM jobs WHERE kind IN ({marks}) AND "
+                "((status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until < ?)) "
+                "ORDER BY run_after LIMIT 1",
+                (*kinds, now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ?",
+                (worker, now + lease_seconds, now, row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return {"id": row[0], "kind": row[1], "params": json.loads(row[2]), "audio": row[3],
+                "attempts": row[4] + 1, "maxAttempts": row[5]}
+
+    def finish(self, job_id: str, worker: str, result: Dict) -> bool:
+        """Record success; False if the lease was lost to another worker meanwhile"""
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, audio = NULL, lease_until = NULL, "
+            "updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (json.dumps(result), time.time(), job_id, worker),
+        )
+        return cur.rowcount > 0
+
+    def fail(self, job_id: str, worker: str, error: str, retry_at: Optional[float] = None) -> bool:
+        """Record a failed attempt: requeued for `retry_at`, or failed for good when None"""
+        if retry_at is not None:
+            sql = ("UPDATE jobs SET status = 'queued', error = ?, run_after = ?, lease_until = NULL, updated_at = ? "
+                   "WHERE id = ? AND worker = ? AND status = 'running'")
+            args = (error, retry_at, time.time(), job_id, worker)
+        else:
+            sql = ("UPDATE jobs SET status = 'failed', error = ?, audio = NULL, lease_until = NULL, updated_at = ? "
+                   "WHERE id = ? AND worker = ? AND status = 'running'")
+            args = (error, time.time(), job_id, worker)
+        return self._conn().execute(sql, args).rowcount > 0
+
+    def release(self, job_ids: List[str], worker: str) -> None:
+        """Requeue interrupted jobs (worker shutdown) without counting the attempt"""
+        self._conn().executemany(
+            "UPDATE jobs SET status = 'queued', attempts = attempts - 1, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            [(time.time(), job_id, worker) for job_id in job_ids],
+        )
+
+    def sweep(self, retention_seconds: float = JOB_RETENTION_SECONDS) -> int:
+        cur = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+            (time.time() - retention_seconds,),
+        )
+        return max(cur.rowcount, 0)
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+# --- Handlers: the same service calls the synchronous endpoints make ---
+
+Handler = Callable[[Dict, Optional[bytes]], Awaitable[Dict]]
+
+
+def _degraded(provider: str) -> bool:
+    # Without a provider client stub results are the expected dev behaviour, not a failure to retry
+    return provider == "stub" and get_client() is not None
+
+
+async def _tts_job(params: Dict, audio: Optional[bytes]) -> Dict:
+    b64, fmt, duration_ms, provider = await tts.synthesize_async(
+        params["text"], params.get("voice"), params.get("languageCode", "fr"), params.get("provider"))
+    if _degraded(provider):
+        raise RuntimeError("TTS provider unavailable")
+    return {"audioBase64": b64, "format": fmt, "durationMs": duration_ms, "provider": provider}
+
+
+async def _course_audio_job(params: Dict, audio: Optional[bytes]) -> Dict:
+    course_id = params["courseId"]
+    course = course_service.get_course_by_id(course_id)
+    if course is None:
+        raise ValueError(f"Unknown course {course_id}")
+    data = {"courses": [course], "lessons": course_service.get_lessons_by_course(course_id)}
+    # Existing phrase audio is skipped, so a retry only synthesizes what failed
+    stats = await run_blocking("tts", lesson_audio.warm, data, JOB_CONCURRENCY["tts"])
+    if stats["failed"]:
+        raise RuntimeError(f"{stats['failed']} of {stats['missing']} phrases failed to synthesize")
+    return stats
+
+
+async def _transcribe(params: Dict, audio: Optional[bytes]) -> Tuple[str, float, str]:
+    text, confidence, provider = await stt.transcribe_upload_bytes(
+        audio or b"", params.get("languageCode", "fr"), params.get("suffix", ".wav"))
+    if _degraded(provider):
+        raise RuntimeError("STT provider unavailable")
+    return text, confidence, provider
+
+
+async def _stt_job(params: Dict, audio: Optional[bytes]) -> Dict:
+    text, confidence, provider = await _transcribe(params, audio)
+    return {"text": text, "confidence": confidence, "provider": provider}
+
+
+async def _evaluate_job(params: Dict, audio: Optional[bytes]) -> Dict:
+    score = await pronunciation.evaluate_pronunciation_async(
+        params["expectedText"], params["transcribedText"], params.get("language", "French"))
+    return {"pronunciationScore": score}
+
+
+async def _practice_job(params: Dict, audio: Optional[bytes]) -> Dict:
+    text, confidence, provider = await _transcribe(params, audio)
+    score = await pronunciation.evaluate_pronunciation_async(params["expectedText"], text, params.get("language", "French"))
+    return {"transcribedText": text, "confidence": confidence, "provider": provider, "pronunciationScore": score}
+
+
+# kind -> (provider whose job concurrency it counts against, handler, required params, takes audio)
+HANDLERS: Dict[str, Tuple[str, Handler, Tuple[str, ...], bool]] = {
+    "tts": ("tts", _tts_job, ("text",), False),
+    "course_audio": ("tts", _course_audio_job, ("courseId",), False),
+    "stt": ("stt", _stt_job, (), True),
+    "practice": ("stt", _practice_job, ("expectedText",), True),
+    "evaluate": ("eval", _evaluate_job, ("expectedText", "transcribedText"), False),
+}
+
+
+def validate(kind: str, params: Dict, audio: Optional[bytes]) -> None:
+    """Raise ValueError for a job that could never succeed"""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(HANDLERS)}")
+    _, _, required, takes_audio = HANDLERS[kind]
+    missing = [name for name in required if not isinstance(params.get(name), str)]
+    if missing:
+        raise ValueError(f"{kind} jobs need string params: {', '.join(missing)}")
+    if takes_audio and not audio:
+        raise ValueError(f"{kind} jobs need an audio file")
+    if audio and not takes_audio:
+        raise ValueError(f"{kind} jobs take no audio")
+
+
+# --- Worker pool ---
+
+class JobRunner:
+    """
+    In-process worker pool: one dispatcher task claims jobs while this
+    process has capacity (JOB_WORKERS in total, JOB_CONCURRENCY per
+    provider) and runs each on the event loop. Failed attempts are retried
+    with exponential backoff up to the job's max attempts.
+    """
+
+    def __init__(self, queue: JobQueue, workers: int = JOB_WORKERS, limits: Optional[Dict[str, int]] = None):
+        self.queue = queue
+        self.workers = workers
+        self.limits = dict(JOB_CONCURRENCY if limits is None else limits)
+        self.running: Dict[str, int] = {provider: 0 for provider in self.limits}
+        self._active: Dict[asyncio.Task, str] = {}  # task -> job id
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._last_sweep = 0.0
+
+    def start(self) -> None:
+        if self.workers > 0 and self._dispatcher is None:
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def stop(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        interrupted = list(self._active.values())
+        for task in list(self._active):
+            task.cancel()
+        await asyncio.gather(*self._active, return_exceptions=True)
+        if interrupted:
+            await run_blocking("jobs", self.queue.release, interrupted, WORKER_ID)
+
+    def wake(self) -> None:
+        """A job was submitted in this process: claim it now instead of at the next poll"""
+        self._wake.set()
+
+    def _open_kinds(self) -> List[str]:
+        if sum(self.running.values()) >= self.workers:
+            return []
+        return [kind for kind, (provider, *_) in HANDLERS.items()
+                if self.running.get(provider, 0) < self.limits.get(provider, self.workers)]
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._wake.clear()
+            job = None
+            kinds = self._open_kinds()
+            if kinds:
+                try:
+                    job = await run_blocking("jobs", self.queue.claim, kinds, WORKER_ID)
+                except sqlite3.Error as e:
+                    print(f"Job claim error: {e}")
+            if job is not None:
+                provider = HANDLERS[job["kind"]][0]
+                self.running[provider] = self.running.get(provider, 0) + 1
+                task = asyncio.ensure_future(self._run(job))
+                self._active[task] = job["id"]
+                task.add_done_callback(lambda t, p=provider: self._done(t, p))
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            if time.monotonic() - self._last_sweep >= 60:
+                self._last_sweep = time.monotonic()
+                try:
+                    await run_blocking("jobs", self.queue.sweep)
+                except sqlite3.Error as e:
+                    print(f"Job sweep error: {e}")
+
+    def _done(self, task: asyncio.Task, provider: str) -> None:
+        self._active.pop(task, None)
+        self.running[provider] -= 1
+        self._wake.set()  # capacity freed
+
+    async def _run(self, job: Dict) -> None:
+        kind = job["kind"]
+        _, handler, _, _ = HANDLERS[kind]
+        try:
+            if job["attempts"] > job["maxAttempts"]:
+                raise TimeoutError("worker lost on the final attempt")  # lease expired, nothing left to retry
+            result = await asyncio.wait_for(handler(job["params"], job["audio"]), JOB_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            retry = not isinstance(e, _PERMANENT_ERRORS) and job["attempts"] < job["maxAttempts"]
+            delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1))
+            error = f"{type(e).__name__}: {e}"
+            print(f"Job {job['id']} ({kind}) attempt {job['attempts']} failed: {error}")
+            JOBS.inc(kind=kind, outcome="retried" if retry else "failed")
+            await run_blocking("jobs", self.queue.fail, job["id"], WORKER_ID, error,
+                               time.time() + delay if retry else None)
+        else:
+            JOBS.inc(kind=kind, outcome="succeeded")
+            await run_blocking("jobs", self.queue.finish, job["id"], WORKER_ID, result)
+        self._notify()
+
+    def _notify(self) -> None:
+        # Long-polls in this process wake on any finished job and re-check their own
+        finished, self._finished = self._finished, asyncio.Event()
+        finished.set()
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """The job once it finishes, or as it stands after `timeout` seconds"""
+        deadline = time.monotonic() + max(0.0, min(timeout, MAX_WAIT_SECONDS))
+        while True:
+            finished = self._finished
+            job = await run_blocking("jobs", self.queue.get, job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINAL_STATUSES or remaining <= 0:
+                return job
+            # Jobs run by other processes are only seen by polling
+            try:
+                await asyncio.wait_for(finished.wait(), min(remaining, JOB_POLL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+
+    async def stats(self) -> Dict:
+        return {"worker": WORKER_ID, "workers": self.workers, "running": dict(self.running),
+                "limits": self.limits, "queue": await run_blocking("jobs", self.queue.counts)}
+
+
+_runner: Optional[JobRunner] = None
+
+
+def _get_runner() -> JobRunner:
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(JobQueue(JOBS_PATH))
+    return _runner
+
+
+def start(workers: Optional[int] = None) -> None:
+    runner = _get_runner()
+    if workers is not None:
+        runner.workers = workers
+    runner.start()
+
+
+async def stop() -> None:
+    if _runner is not None:
+        await _runner.stop()
+
+
+async def submit(kind: str, params: Dict, audio: Optional[bytes] = None) -> Dict:
+    """Queue a job; raises ValueError if it is malformed. Returns its status."""
+    validate(kind, params, audio)
+    runner = _get_runner()
+    job = await run_blocking("jobs", runner.queue.submit, kind, params, audio)
+    runner.wake()
+    return job
+
+
+async def get(job_id: str) -> Optional[Dict]:
+    return await run_blocking("jobs", _get_runner().queue.get, job_id)
+
+
+async def wait(job_id: str, timeout: float) -> Optional[Dict]:
+    return await _get_runner().wait(job_id, timeout)
+
+
+async def get_stats() -> Dict:
+    return await _get_runner().stats()
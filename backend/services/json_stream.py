@@ -0,0 +1,160 @@
+import json
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Events produced by IncrementalJSONParser.feed():
+#   ("delta", key, text)  - newly decoded characters of a streamed top-level string field
+#   ("field", key, value) - a top-level field whose value just completed
+Event = Tuple[str, str, Any]
+
+_WS = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for one top-level JSON object arriving in chunks
+    (e.g. a streamed LLM completion). Each top-level field is reported as
+    soon as its value closes; string fields named in `stream_keys` are also
+    reported character-by-character while still open, so a reply can be
+    shown before the rest of the object exists. Text outside the object
+    (code fences, prose) is ignored. Work is linear in the input size.
+    """
+
+    def __init__(self, stream_keys: Iterable[str] = ()):
+        self.stream_keys = set(stream_keys)
+        self.fields = {}
+        self._buf = ""
+        self._pos = 0            # next character of _buf to scan
+        self._state = "start"    # start | key | colon | value | after | done
+        self._key: Optional[str] = None
+        self._key_start = 0
+        self._value_start = 0
+        self._depth = 0          # nesting inside the current value
+        self._in_string = False
+        self._escape = False
+        self._string_value = False  # current value is a top-level string
+        self._emitted = 0        # raw offset inside a streamed string already decoded
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[Event]:
+        self._buf += chunk
+        events: List[Event] = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf) and self._state != "done":
+            c = buf[i]
+            state = self._state
+            if state == "start":
+                if c == "{":
+                    self._state = "key"
+            elif state == "key":
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif c == "\\":
+                        self._escape = True
+                    elif c == '"':
+                        self._in_string = False
+                        self._key = json.loads(buf[self._key_start:i + 1])
+                        self._state = "colon"
+                elif c == '"':
+                    self._in_string = True
+                    self._key_start = i
+                elif c == "}":
+                    self._state = "done"
+            elif state == "colon":
+                if c == ":":
+                    self._state = "value"
+                    self._value_start = -1
+            elif state == "value":
+                if self._value_start < 0:
+                    if c in _WS:
+                        i += 1
+                        continue
+                    self._value_start = i
+                    self._string_value = c == '"'
+                    self._emitted = i + 1
+                    self._depth = 0
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif c == "\\":
+                        self._escape = True
+                    elif c == '"':
+                        self._in_string = False
+                        if self._string_value and self._depth == 0:
+                            self._flush_delta(i, events)
+                            self._finish_value(i + 1, events)
+                elif c == '"':
+                    self._in_string = True
+                elif c in "{[":
+                    self._depth += 1
+                elif c in "}]":
+                    if self._depth == 0:
+                        # End of the top-level object right after a scalar value
+                        self._finish_value(i, events)
+                        self._state = "done"
+                    else:
+                        self._depth -= 1
+                        if self._depth == 0:
+                            self._finish_value(i + 1, events)
+                elif c == "," and self._depth == 0:
+                    self._finish_value(i, events)
+                    self._state = "key"
+            elif state == "after":
+                if c == ",":
+                    self._state = "key"
+                elif c == "}":
+                    self._state = "done"
+            i += 1
+        self._pos = i
+        if self._state == "value" and self._in_string and self._string_value and self._value_start >= 0:
+            self._flush_delta(i, events)
+        return events
+
+    def _flush_delta(self, end: int, events: List[Event]) -> None:
+        """Decode raw string content up to `end` that is safe to decode on its own"""
+        if self._key not in self.stream_keys:
+            return
+        raw = self._buf[self._emitted:end]
+        safe = _safe_prefix(raw)
+        if safe:
+            events.append(("delta", self._key, json.loads(f'"{raw[:safe]}"')))
+            self._emitted += safe
+
+    def _finish_value(self, end: int, events: List[Event]) -> None:
+        raw = self._buf[self._value_start:end].strip()
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = None
+        self.fields[self._key] = value
+        events.append(("field", self._key, value))
+        # A closed string/container may still be followed by "," or "}"
+        if self._state == "value":
+            self._state = "after"
+        self._value_start = -1
+
+
+def _safe_prefix(raw: str) -> int:
+    """Length of `raw` that ends on a complete escape (and not mid surrogate pair)"""
+    n = len(raw)
+    i = 0  # raw always starts on an escape boundary
+    while i < n:
+        if raw[i] != "\\":
+            i += 1
+        elif i + 1 >= n:
+            return i
+        elif raw[i + 1] != "u":
+            i += 2
+        elif i + 6 > n:
+            return i
+        elif 0xD800 <= int(raw[i + 2:i + 6], 16) <= 0xDBFF:
+            if i + 12 > n:
+                return i  # high surrogate: wait for its low half
+            i += 12
+        else:
+            i += 6
+    return n
@@ -0,0 +1,298 @@
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from services import course_service, tts
+from services.resilience import call_with_deadline
+
+# Pre-synthesized curriculum audio, stored content-addressed by TTS cache key
+AUDIO_DIR = Path(os.getenv("LESSON_AUDIO_DIR", Path(__file__).parent.parent / "cache" / "lesson_audio"))
+URL_PREFIX = "/audio"
+WORKERS = int(os.getenv("LESSON_AUDIO_WORKERS", "8"))
+# Synthesize missing phrase audio in the background at startup and after catalog edits
+AUTO_WARM = os.getenv("LESSON_AUDIO_WARMUP", "0") == "1"
+# Start synthesizing the next exercise's phrase while a practice attempt is scored
+PREFETCH_ENABLED = os.getenv("NEXT_AUDIO_PREFETCH", "1") != "0"
+# How long a practice response may wait for an unfinished prefetch before
+# handing out the streaming URL instead (0: never hold the response back)
+PREFETCH_WAIT_MS = float(os.getenv("NEXT_AUDIO_PREFETCH_WAIT_MS", "0"))
+
+LANGUAGE_CODES = {
+    "french": "fr",
+    "spanish": "es",
+    "german": "de",
+    "english": "en",
+    "italian": "it",
+    "portuguese": "pt",
+}
+
+_FILENAME_RE = re.compile(r"^([0-9a-f]{64})\.mp3$")
+
+_available: Optional[Set[str]] = None
+_available_lock = threading.Lock()
+_annotate_lock = threading.Lock()
+_warm_lock = threading.Lock()
+_warm_again = False
+
+def language_code(target_language: str) -> str:
+    name = (target_language or "").strip().lower()
+    return LANGUAGE_CODES.get(name, name[:2] or "en")
+
+def audio_path(key: str) -> Path:
+    return AUDIO_DIR / key[:2] / f"{key}.{tts.TTS_FORMAT}"
+
+def path_for_filename(filename: str) -> Optional[Tuple[str, Path]]:
+    """Validate a requested /audio filename; returns (key, path) if the file exists"""
+    match = _FILENAME_RE.match(filename)
+    if not match:
+        return None
+    path = audio_path(match.group(1))
+    return (match.group(1), path) if path.is_file() else None
+
+def _available_keys() -> Set[str]:
+    global _available
+    if _available is None:
+        with _available_lock:
+            if _available is None:
+                _available = {p.stem for p in AUDIO_DIR.glob(f"*/*.{tts.TTS_FORMAT}")} if AUDIO_DIR.exists() else set()
+    return _available
+
+def has_audio(key: str) -> bool:
+    """
+    Whether phrase audio exists for `key`. Misses are checked on disk, so
+    files written by other worker processes since the startup scan count too.
+    """
+    available = _available_keys()
+    if key in available:
+        return True
+    if audio_path(key).is_file():
+        available.add(key)
+        return True
+    return False
+
+def read_audio(key: str, fmt: str = tts.TTS_FORMAT) -> Optional[bytes]:
+    """Stored phrase audio for a TTS cache key (None if not synthesized)"""
+    if fmt != tts.TTS_FORMAT or not has_audio(key):
+        return None
+    try:
+        return audio_path(key).read_bytes()
+    except OSError:
+        return None
+
+def _iter_phrases(data: Dict) -> Iterator[Tuple[Dict, str]]:
+    """Yield (phrase dict, language code) for every exercise phrase in the catalog"""
+    languages = {c["id"]: language_code(c.get("targetLanguage", "")) for c in data.get("courses", [])}
+    for lesson in data.get("lessons", []):
+        lang = languages.get(lesson.get("courseId"), "en")
+        for exercise in lesson.get("exercises", []):
+            phrase = exercise.get("phrase")
+            if phrase and phrase.get("target"):
+                yield phrase, lang
+
+def phrase_key(text: str, lang: str) -> str:
+    return tts.cache_key(text, None, lang)
+
+def audio_url(key: str) -> str:
+    return f"{URL_PREFIX}/{key}.{tts.TTS_FORMAT}"
+
+def annotate(data: Dict, mark_changed: bool = True) -> None:
+    """
+    Fill phrase audioUrl for every phrase whose audio exists (explicit URLs in
+    courses.json win). The only writer of catalog audio URLs: runs are
+    serialized, and the catalog version only moves if a URL actually changed.
+    """
+    changed = False
+    with _annotate_lock:
+        for phrase, lang in _iter_phrases(data):
+            current = phrase.get("audioUrl")
+            if current and not current.startswith(URL_PREFIX):
+                continue
+            key = phrase_key(phrase["target"], lang)
+            url = audio_url(key) if has_audio(key) else None
+            if current != url:
+                phrase["audioUrl"] = url
+                changed = True
+    if changed and mark_changed:
+        course_service.mark_changed()
+
+def _synthesize_one(key: str, text: str, lang: str) -> bool:
+    try:
+        # Stored here only; the TTS cache finds it through read_audio()
+        audio, _ = tts.synthesize_bytes(text, None, lang, cache=False)
+    except Exception as e:
+        print(f"Lesson audio error for {text!r}: {e}")
+        return False
+    path = audio_path(key)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(audio)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Lesson audio write error ({path}): {e}")
+        return False
+    _available_keys().add(key)
+    return True
+
+def warm(data: Optional[Dict] = None, workers: int = WORKERS) -> Dict:
+    """
+    Synthesize audio for every catalog phrase that has none yet, with a
+    bounded worker pool. Existing files are skipped, so re-running after
+    catalog edits only synthesizes new or changed phrases. Without `data`
+    the whole catalog is covered, including lean-mode shards not resident.
+    """
+    chunks = [data] if data is not None else course_service.iter_catalog_data()
+    pending: Dict[str, Tuple[str, str]] = {}
+    keys = set()
+    total = 0
+    for chunk in chunks:
+        for phrase, lang in _iter_phrases(chunk):
+            total += 1
+            key = phrase_key(phrase["target"], lang)
+            keys.add(key)
+            if key not in pending and not has_audio(key):
+                pending[key] = (phrase["target"], lang)
+
+    stats = {"phrases": total, "unique": len(keys), "missing": len(pending), "synthesized": 0, "failed": 0}
+    if pending and not tts.stream_available():
+        print("Lesson audio warm-up skipped: TTS provider unavailable")
+        stats["failed"] = len(pending)
+        return stats
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="lesson-audio") as pool:
+        results = pool.map(lambda item: _synthesize_one(item[0], *item[1]), pending.items())
+        for ok in results:
+            stats["synthesized" if ok else "failed"] += 1
+    # Shards loaded later are annotated by _on_shard_load
+    annotate(data if data is not None else course_service._load_data())
+    return stats
+
+def _warm_in_background() -> None:
+    """Run warm() on a daemon thread; a reload during a run queues one more pass"""
+    global _warm_again
+    if not _warm_lock.acquire(blocking=False):
+        _warm_again = True
+        return
+
+    def run():
+        global _warm_again
+        try:
+            while True:
+                _warm_again = False
+                stats = warm()
+                print(f"Lesson audio warm-up: {stats}")
+                if not _warm_again:
+                    break
+        finally:
+            _warm_lock.release()
+
+    threading.Thread(target=run, name="lesson-audio-warmup", daemon=True).start()
+
+def _on_shard_load(data: Dict) -> None:
+    # The shard isn't visible yet, so no cached response can depend on it
+    annotate(data, mark_changed=False)
+
+def _on_catalog_load(data: Dict) -> None:
+    annotate(data)
+    if AUTO_WARM:
+        _warm_in_background()
+
+# --- Next-exercise prefetch ---
+
+_prefetching: Dict[str, "asyncio.Future[bool]"] = {}
+_background: Set["asyncio.Future[bool]"] = set()  # strong refs so unawaited prefetches finish
+
+def stream_url(text: str, lang: str) -> str:
+    """Streaming TTS URL for a phrase; serves the cached clip once it exists"""
+    return f"/api/tts/stream?{urlencode({'text': text, 'languageCode': lang})}"
+
+def _phrase_language(lesson_id: str) -> str:
+    lesson = course_service.get_lesson_by_id(lesson_id) or {}
+    course = course_service.get_course_by_id(lesson.get("courseId", "")) or {}
+    return language_code(course.get("targetLanguage", ""))
+
+async def _synthesize_shared(key: str, text: str, lang: str) -> bool:
+    """Synthesize into the lesson audio store; concurrent requests for a key share one call"""
+    future = _prefetching.get(key)
+    if future is None:
+        async def run() -> bool:
+            try:
+                return await call_with_deadline("tts", _synthesize_one, key, text, lang)
+            except Exception as e:
+                print(f"Lesson audio prefetch skipped for {text!r}: {e}")
+                return False
+        future = _prefetching[key] = asyncio.ensure_future(run())
+        future.add_done_callback(lambda _: _prefetching.pop(key, None))
+    return await asyncio.shield(future)
+
+
+class AudioPrefetch:
+    """Background synthesis of one exercise phrase, started before it is needed"""
+
+    def __init__(self, phrase: Dict, lang: str):
+        self.text = phrase["target"]
+        self.lang = lang
+        self.key = phrase_key(self.text, lang)
+        current = phrase.get("audioUrl")
+        # Explicit URLs from courses.json need no synthesis
+        self.explicit_url = current if current and not current.startswith(URL_PREFIX) else None
+        self.task = None
+        if self.explicit_url is None:
+            self.task = asyncio.ensure_future(self._run())
+            _background.add(self.task)
+            self.task.add_done_callback(_background.discard)
+
+    async def _run(self) -> bool:
+        # The catalog phrase is left as is: the URL goes out in the practice
+        # response only, and the catalog picks it up at its next annotate()
+        if has_audio(self.key):
+            return True
+        return tts.stream_available() and await _synthesize_shared(self.key, self.text, self.lang)
+
+    async def url(self, wait_ms: float = PREFETCH_WAIT_MS) -> Optional[str]:
+        """
+        Ready-to-play reference: the immutable /audio URL once synthesized,
+        or the streaming TTS URL if synthesis is still running after `wait_ms`
+        (the task keeps running and fills the cache either way).
+        """
+        if self.explicit_url:
+            return self.explicit_url
+        if has_audio(self.key):
+            return audio_url(self.key)
+        if wait_ms <= 0 and not self.task.done():
+            return stream_url(self.text, self.lang)
+        try:
+            ready = await asyncio.wait_for(asyncio.shield(self.task), wait_ms / 1000.0)
+        except asyncio.TimeoutError:
+            return stream_url(self.text, self.lang)
+        except Exception:
+            ready = False
+        if ready:
+            return audio_url(self.key)
+        return stream_url(self.text, self.lang) if tts.stream_available() else None
+
+
+def prefetch_next(lesson_id: str, exercise_id: str) -> Optional[AudioPrefetch]:
+    """Start warming the audio of the exercise after `exercise_id` (None if nothing to do)"""
+    if not PREFETCH_ENABLED:
+        return None
+    next_exercise = course_service.get_next_exercise(lesson_id, exercise_id)
+    phrase = (next_exercise or {}).get("phrase") or {}
+    if not phrase.get("target"):
+        return None
+    return AudioPrefetch(phrase, _phrase_language(lesson_id))
+
+def start() -> None:
+    """
+    Annotate catalog phrases with audio URLs now and after every catalog
+    reload, and serve stored phrase audio through the TTS cache lookups
+    """
+    tts.add_audio_source(read_audio)
+    course_service.add_reload_listener(_on_catalog_load)
+    course_service.add_shard_listener(_on_shard_load)
+    course_service.get_all_courses()
@@ -1,25 +1,22 @@
 import os
 import json
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List
 
-try:
-    from openai import OpenAI
-    _llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-except Exception:
-    _llm_client = None
+from services.concurrency import run_blocking
+from services.json_stream import IncrementalJSONParser
+from services import prompts
+from services.metrics import FALLBACKS, provider_call
+from services.provider_client import get_client
+from services.resilience import BREAKERS, PROVIDER_TIMEOUTS, bounded
 
-SYSTEM_PROMPT = """You are a patient language tutor. Provide:
-- reply: natural response advancing conversation.
-- corrections: array of {original, corrected, note} only if needed.
-- suggestions: short actionable next practice tips.
-- nextPrompt: a suggested next user prompt.
-Respond strictly in JSON.
-"""
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
+# Top-level string fields streamed to the client character by character
+STREAMED_FIELDS = ("reply",)
 
-def build_user_prompt(transcript: str, target_language: str, proficiency: str | None, history: List[Dict]) -> str:
-    history_text = "\n".join([f"User: {h['user']}\nAI: {h['ai']}" for h in history[-6:]])
-    prof_line = f"Proficiency: {proficiency}" if proficiency else ""
-    return f"Conversation so far:\n{history_text}\nCurrent user input: {transcript}\nTarget language: {target_language}\n{prof_line}\nReturn valid JSON."
+def _prompt(transcript: str, target_language: str, proficiency: str | None, history: List[Dict], summary: str | None) -> prompts.Prompt:
+    prompt = prompts.chat_prompt(transcript, target_language, proficiency, history, summary)
+    prompts.record("chat", prompt)
+    return prompt
 
 def parse_llm_json(raw: str) -> Dict:
     try:
@@ -41,22 +38,23 @@ def parse_llm_json(raw: str) -> Dict:
         "meta": {"fallback": True}
     }
 
-def generate_chat(transcript: str, target_language: str, proficiency: str | None, history: List[Dict]) -> Dict:
-    if _llm_client:
-        try:
-            prompt = build_user_prompt(transcript, target_language, proficiency, history)
-            # Pseudocode for chat completion; adjust to actual SDK method.
-            # response = _llm_client.chat.completions.create(model="gpt-4o-mini", messages=[{"role":"system","content":SYSTEM_PROMPT},{"role":"user","content":prompt}])
-            # raw = response.choices[0].message.content
-            raw = "{\"reply\": \"(stub LLM reply)\", \"corrections\": [], \"suggestions\": [\"Try past tense.\"], \"nextPrompt\": \"Describe your morning.\", \"meta\": {\"provider\": \"openai\"}}"
-            data = parse_llm_json(raw)
-            data.setdefault("meta", {})
-            data["meta"].update({"provider": "openai"})
-            return data
-        except Exception:
-            pass
+def _normalize(data: Dict) -> Dict:
+    """Coerce a model answer into the ChatResponse shape (models don't always comply)"""
+    corrections = data.get("corrections")
+    suggestions = data.get("suggestions")
+    next_prompt = data.get("nextPrompt")
+    return {
+        "reply": str(data.get("reply") or ""),
+        "corrections": [
+            {"original": str(c.get("original", "")), "corrected": str(c.get("corrected", "")), "note": c.get("note")}
+            for c in corrections if isinstance(c, dict)
+        ] if isinstance(corrections, list) else [],
+        "suggestions": [str(s) for s in suggestions] if isinstance(suggestions, list) else [],
+        "nextPrompt": str(next_prompt) if next_prompt else None,
+        "meta": dict(data.get("meta") or {}),
+    }
 
-    # Fallback stub
+def _stub_reply(transcript: str, target_language: str) -> Dict:
     return {
         "reply": f"You said: '{transcript}'. Let's practice {target_language} more.",
         "corrections": [],
@@ -64,3 +62,102 @@ def generate_chat(transcript: str, target_language: str, proficiency: str | None
         "nextPrompt": "Describe what you did yesterday.",
         "meta": {"provider": "stub"}
     }
+
+def generate_chat(transcript: str, target_language: str, proficiency: str | None, history: List[Dict], summary: str | None = None) -> Dict:
+    client = get_client()
+    if client:
+        try:
+            with BREAKERS["chat"].guard(), provider_call("chat"):
+                response = bounded(client).chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=_prompt(transcript, target_language, proficiency, history, summary).messages,
+                    response_format={"type": "json_object"},
+                )
+            prompts.record_usage("chat", response.usage)
+            data = _normalize(parse_llm_json(response.choices[0].message.content or ""))
+            data["meta"].update({"provider": "openai"})
+            return data
+        except Exception as e:
+            print(f"Chat completion error: {e}")
+
+    # Fallback stub
+    FALLBACKS.inc(kind="chat_stub")
+    return _stub_reply(transcript, target_language)
+
+def _open_stream(messages: List[Dict]):
+    return get_client().with_options(timeout=PROVIDER_TIMEOUTS["chat"], max_retries=0).chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        response_format={"type": "json_object"},
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+
+def _chunk_text(chunk) -> str:
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+async def stream_chat(transcript: str, target_language: str, proficiency: str | None, history: List[Dict],
+                      summary: str | None = None) -> AsyncIterator[Dict]:
+    """
+    Streamed tutor turn. Yields, as they become available:
+      {"type": "delta", "field": "reply", "text": ...}   reply characters
+      {"type": "field", "field": name, "value": ...}     each completed JSON field
+      {"type": "done", "result": {...}}                  the full ChatResponse dict (always last)
+    Falls back to the stub reply if the provider is unavailable or fails before
+    any output; a stream cut off midway finishes with what was received.
+    """
+    parser = IncrementalJSONParser(STREAMED_FIELDS)
+    raw: List[str] = []
+    streamed = {name: "" for name in STREAMED_FIELDS}
+    partial = False
+
+    if get_client() and not BREAKERS["chat"].is_open():
+        stream = None
+        try:
+            # Breaker and latency metrics cover time to first token
+            with BREAKERS["chat"].guard(), provider_call("chat"):
+                messages = _prompt(transcript, target_language, proficiency, history, summary).messages
+                stream = await run_blocking("chat", _open_stream, messages)
+                chunks = iter(stream)
+                chunk = await run_blocking("chat", next, chunks, None)
+            while chunk is not None:
+                if getattr(chunk, "usage", None):
+                    prompts.record_usage("chat", chunk.usage)
+                text = _chunk_text(chunk)
+                if text:
+                    raw.append(text)
+                    for kind, name, value in parser.feed(text):
+                        if kind == "delta":
+                            streamed[name] += value
+                            yield {"type": "delta", "field": name, "text": value}
+                        elif name not in STREAMED_FIELDS:
+                            yield {"type": "field", "field": name, "value": value}
+                chunk = await run_blocking("chat", next, chunks, None)
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            partial = bool(raw)
+        finally:
+            if stream is not None:
+                await run_blocking("chat", stream.close)
+
+    if not raw:
+        FALLBACKS.inc(kind="chat_stub")
+        result = _stub_reply(transcript, target_language)
+        yield {"type": "delta", "field": "reply", "text": result["reply"]}
+        for name in ("corrections", "suggestions", "nextPrompt"):
+            yield {"type": "field", "field": name, "value": result[name]}
+        yield {"type": "done", "result": result}
+        return
+
+    if parser.fields or any(streamed.values()):
+        data = {**streamed, **parser.fields}
+    else:
+        # Model ignored the JSON format entirely
+        data = parse_llm_json("".join(raw))
+        if data.get("reply"):
+            yield {"type": "delta", "field": "reply", "text": data["reply"]}
+    result = _normalize(data)
+    result["meta"].update({"provider": "openai", **({"partial": True} if partial else {})})
+    yield {"type": "done", "result": result}
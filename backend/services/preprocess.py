@@ -0,0 +1,128 @@
+import io
+import os
+import threading
+import wave
+from typing import Dict, NamedTuple
+
+from services.audio import pcm_to_wav
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PREPROCESS_ENABLED = os.getenv("AUDIO_PREPROCESS", "1") != "0"
+TARGET_RATE = 16000
+FRAME_MS = 30
+# A frame is speech if louder than this floor and than the clip's noise floor + margin
+# (capped at peak - margin so clips with no pauses at all still count as speech)
+MIN_SPEECH_DBFS = float(os.getenv("VAD_MIN_SPEECH_DBFS", "-45"))
+NOISE_MARGIN_DB = float(os.getenv("VAD_NOISE_MARGIN_DB", "10"))
+MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "150"))
+PAD_MS = int(os.getenv("VAD_PAD_MS", "200"))
+
+
+class PreprocessResult(NamedTuple):
+    audio: bytes          # 16 kHz mono 16-bit WAV, or the original bytes if not decodable
+    suffix: str
+    has_speech: bool
+    speech_ms: int
+    original_bytes: int
+    processed_bytes: int
+
+
+_stats = {"clips": 0, "decoded": 0, "rejected": 0, "bytesIn": 0, "bytesOut": 0, "speechMs": 0}
+_stats_lock = threading.Lock()
+
+def _record(result: PreprocessResult, decoded: bool) -> PreprocessResult:
+    with _stats_lock:
+        _stats["clips"] += 1
+        _stats["decoded"] += int(decoded)
+        _stats["rejected"] += int(not result.has_speech)
+        _stats["bytesIn"] += result.original_bytes
+        _stats["bytesOut"] += result.processed_bytes
+        _stats["speechMs"] += result.speech_ms
+    return result
+
+def get_preprocess_stats() -> Dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["bytesSaved"] = stats["bytesIn"] - stats["bytesOut"]
+    return stats
+
+def _decode_wav(contents: bytes):
+    """Decode PCM WAV into (float32 mono samples in -1..1, sample rate)"""
+    with wave.open(io.BytesIO(contents), "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        frames = w.readframes(w.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"unsupported sample width {width}")
+    samples = samples[: len(samples) - len(samples) % channels]
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+def _resample(samples, rate: int):
+    """Linear-interpolation resample to TARGET_RATE with a box pre-filter when downsampling"""
+    if rate == TARGET_RATE or len(samples) == 0:
+        return samples
+    if rate > TARGET_RATE:
+        width = int(round(rate / TARGET_RATE))
+        if width > 1:
+            samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    n_out = int(len(samples) * TARGET_RATE / rate)
+    positions = np.arange(n_out, dtype=np.float64) * (rate / TARGET_RATE)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+def _speech_bounds(samples):
+    """Return (start, end) sample indices of detected speech, or None"""
+    frame = TARGET_RATE * FRAME_MS // 1000
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return None
+    frames = samples[: n_frames * frame].reshape(n_frames, frame)
+    db = 20.0 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10)
+    noise_floor = np.percentile(db, 10)
+    threshold = max(MIN_SPEECH_DBFS, min(noise_floor + NOISE_MARGIN_DB, db.max() - NOISE_MARGIN_DB))
+    speech = np.flatnonzero(db > threshold)
+    if speech.size * FRAME_MS < MIN_SPEECH_MS:
+        return None
+    pad = TARGET_RATE * PAD_MS // 1000
+    return max(0, speech[0] * frame - pad), min(len(samples), (speech[-1] + 1) * frame + pad)
+
+def preprocess_audio(contents: bytes, suffix: str = ".wav") -> PreprocessResult:
+    """
+    Decode, downmix to mono, resample to 16 kHz and trim leading/trailing
+    silence. Clips that cannot be decoded (non-WAV, or numpy missing) pass
+    through unchanged; clips with no detected speech have has_speech=False.
+    """
+    size = len(contents)
+    passthrough = PreprocessResult(contents, suffix, True, 0, size, size)
+    if not PREPROCESS_ENABLED or np is None or not contents:
+        return passthrough
+    try:
+        samples, rate = _decode_wav(contents)
+    except (wave.Error, EOFError, ValueError):
+        return _record(passthrough, False)
+
+    samples = _resample(samples, rate)
+    bounds = _speech_bounds(samples)
+    if bounds is None:
+        return _record(PreprocessResult(b"", ".wav", False, 0, size, 0), True)
+
+    start, end = bounds
+    pcm = (np.clip(samples[start:end], -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+    audio = pcm_to_wav(pcm, TARGET_RATE, 1)
+    speech_ms = int((end - start) * 1000 / TARGET_RATE)
+    return _record(PreprocessResult(audio, ".wav", True, speech_ms, size, len(audio)), True)
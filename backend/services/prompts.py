@@ -0,0 +1,245 @@
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from services import metrics
+from services.metrics import Counter, Histogram
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Prompt layout: every request is [static system prompt][variable user message].
+# System prompts are byte-identical per (kind, language), shared instructions
+# first and the language last. They are built and token-counted once for the
+# catalog languages. At ~100 tokens they are below the provider's 1024-token
+# minimum for prefix caching, so the saving is local work, not billed tokens.
+
+TOKENIZER_MODEL = os.getenv("PROMPT_TOKENIZER_MODEL", "gpt-4o-mini")
+# Input-token budget for a whole chat request (system + user message)
+CHAT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "1200"))
+# Longest single user utterance / history turn kept in a prompt
+MAX_INPUT_TOKENS = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "300"))
+# Fixed chat-format overhead per message (role markers etc.)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+PROMPT_TOKENS = Histogram("natulang_prompt_tokens", "Input tokens per provider request by endpoint",
+                          buckets=(50, 100, 200, 400, 800, 1200, 1600, 2400, 4000, 8000))
+PROMPT_TOKENS_TOTAL = Counter("natulang_prompt_tokens_total", "Input tokens sent, by endpoint and prompt part")
+PROVIDER_PROMPT_TOKENS = Counter("natulang_provider_prompt_tokens_total",
+                                 "Input tokens billed by the provider, by endpoint (cached = served from its prefix cache)")
+metrics.register(PROMPT_TOKENS, PROMPT_TOKENS_TOTAL, PROVIDER_PROMPT_TOKENS)
+
+CHAT_INSTRUCTIONS = """You are a patient language tutor. Provide:
+- reply: natural response advancing conversation.
+- corrections: array of {original, corrected, note} only if needed.
+- suggestions: short actionable next practice tips.
+- nextPrompt: a suggested next user prompt.
+Respond strictly in JSON, with "reply" as the first key.
+"""
+
+_SCORING_CRITERIA = """1. accuracy: how closely the transcribed text matches the expected (0-100)
+2. fluency: how natural/smooth the pronunciation sounds (0-100)
+3. completeness: whether all words were spoken (0-100)
+4. overall: weighted average score (0-100)
+"""
+
+EVAL_INSTRUCTIONS = f"""You are a pronunciation expert. Compare the expected phrase with what the user actually said.
+Score the pronunciation on:
+{_SCORING_CRITERIA}
+Also provide brief, encouraging feedback in English (1-2 sentences).
+
+Return ONLY valid JSON in this exact format:
+{{
+  "accuracy": <number>,
+  "fluency": <number>,
+  "completeness": <number>,
+  "overall": <number>,
+  "feedback": "<string>"
+}}
+"""
+
+EVAL_BATCH_INSTRUCTIONS = f"""You are a pronunciation expert. You will receive numbered attempts, each with the expected phrase and what the user actually said.
+Score each attempt independently on:
+{_SCORING_CRITERIA}
+Also provide brief, encouraging feedback in English (1-2 sentences) for each attempt.
+
+Return ONLY valid JSON in this exact format, with one entry per attempt:
+{{
+  "results": [
+    {{"id": <attempt number>, "accuracy": <number>, "fluency": <number>, "completeness": <number>, "overall": <number>, "feedback": "<string>"}}
+  ]
+}}
+"""
+
+_INSTRUCTIONS = {"chat": CHAT_INSTRUCTIONS, "eval": EVAL_INSTRUCTIONS, "eval_batch": EVAL_BATCH_INSTRUCTIONS}
+
+
+# --- Token counting ---
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+                except Exception as e:
+                    print(f"Tokenizer unavailable, estimating token counts: {e}")
+                    _encoding = False
+    return _encoding or None
+
+def count_tokens(text: str) -> int:
+    """Exact token count with tiktoken; ~4 characters per token estimate without it"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def truncate_tokens(text: str, limit: int, keep: str = "end") -> str:
+    """Cut `text` to at most `limit` tokens, keeping its start or (default) its end"""
+    if count_tokens(text) <= limit:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        kept = tokens[-limit:] if keep == "end" else tokens[:limit]
+        text = encoding.decode(kept)
+    else:
+        chars = max(0, limit * 4 - 1)
+        text = text[-chars:] if keep == "end" else text[:chars]
+    return f"…{text}" if keep == "end" else f"{text}…"
+
+
+# --- Static prefixes ---
+
+# Only languages passed to precompile() are kept; any other language (it comes
+# from the client) is built per request, so requests can't grow this
+_static: Dict[Tuple[str, str], Tuple[str, int]] = {}
+
+def _build(kind: str, language: str) -> Tuple[str, int]:
+    text = f"{_INSTRUCTIONS[kind]}\nTarget language: {language}"
+    return text, count_tokens(text)
+
+def system_prompt(kind: str, language: str) -> Tuple[str, int]:
+    """Byte-identical system prompt for (kind, language) and its token count"""
+    entry = _static.get((kind, language))
+    return entry if entry is not None else _build(kind, language)
+
+def is_precompiled(language: str) -> bool:
+    return ("chat", language) in _static
+
+def precompile(languages: Iterable[str]) -> int:
+    """Build every static prefix for the given languages up front (call at startup)"""
+    built = 0
+    for language in dict.fromkeys(languages):
+        for kind in _INSTRUCTIONS:
+            _static[(kind, language)] = _build(kind, language)
+            built += 1
+    return built
+
+
+# --- Prompt assembly ---
+
+class Prompt(NamedTuple):
+    messages: List[Dict]
+    static_tokens: int    # static system prefix
+    variable_tokens: int  # per-request user message
+    dropped_turns: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.static_tokens + self.variable_tokens
+
+
+def _prompt(kind: str, language: str, user: str, dropped_turns: int = 0) -> Prompt:
+    system, static_tokens = system_prompt(kind, language)
+    return Prompt(
+        [{"role": "system", "content": system}, {"role": "user", "content": user}],
+        static_tokens + MESSAGE_OVERHEAD_TOKENS,
+        count_tokens(user) + MESSAGE_OVERHEAD_TOKENS,
+        dropped_turns,
+    )
+
+def chat_prompt(transcript: str, language: str, proficiency: Optional[str], history: List[Dict],
+                summary: Optional[str] = None, budget: int = CHAT_TOKEN_BUDGET) -> Prompt:
+    """
+    Tutor prompt within `budget` input tokens. The current input and
+    proficiency always go in; then the most recent history turns that fit;
+    older turns are dropped first, and the running summary (itself already a
+    compression of older turns) is included only if room remains, trimmed
+    to fit.
+    """
+    _, static_tokens = system_prompt("chat", language)
+    current = truncate_tokens(transcript, MAX_INPUT_TOKENS, keep="start")
+    tail = f"Current user input: {current}\n" + (f"Proficiency: {proficiency}\n" if proficiency else "") + "Return valid JSON."
+    remaining = budget - static_tokens - 2 * MESSAGE_OVERHEAD_TOKENS - count_tokens(tail) - count_tokens("Conversation so far:\n")
+
+    turns: List[str] = []
+    for turn in reversed(history):
+        text = truncate_tokens(f"User: {turn['user']}\nAI: {turn['ai']}", MAX_INPUT_TOKENS)
+        cost = count_tokens(text) + 1
+        if cost > remaining:
+            break
+        turns.append(text)
+        remaining -= cost
+    turns.reverse()
+    dropped = len(history) - len(turns)
+
+    summary_line = ""
+    if summary:
+        prefix = "Earlier in the conversation (summary): "
+        room = remaining - count_tokens(prefix) - 1
+        if room > 20:
+            summary_line = f"{prefix}{truncate_tokens(summary, room)}\n"
+
+    history_text = "\n".join(turns)
+    user = f"{summary_line}Conversation so far:\n{history_text}\n{tail}"
+    return _prompt("chat", language, user, dropped)
+
+def eval_prompt(expected: str, transcribed: str, language: str) -> Prompt:
+    transcribed = truncate_tokens(transcribed, MAX_INPUT_TOKENS, keep="start")
+    user = f"""Expected: "{expected}"
+Transcribed: "{transcribed}"
+
+Evaluate the pronunciation."""
+    return _prompt("eval", language, user)
+
+def eval_batch_prompt(pairs: List[Tuple[str, str]], language: str) -> Prompt:
+    attempts = "\n".join(
+        f'{i}. Expected: "{expected}" | Transcribed: "{truncate_tokens(transcribed, MAX_INPUT_TOKENS, keep="start")}"'
+        for i, (expected, transcribed) in enumerate(pairs, 1)
+    )
+    user = f"""{attempts}
+
+Evaluate the pronunciation of all {len(pairs)} attempts."""
+    return _prompt("eval_batch", language, user)
+
+def record(endpoint: str, prompt: Prompt) -> None:
+    """Report a request's input tokens to /metrics"""
+    PROMPT_TOKENS.observe(prompt.tokens, endpoint=endpoint)
+    PROMPT_TOKENS_TOTAL.inc(prompt.static_tokens, endpoint=endpoint, part="static")
+    PROMPT_TOKENS_TOTAL.inc(prompt.variable_tokens, endpoint=endpoint, part="variable")
+
+def record_usage(endpoint: str, usage) -> None:
+    """Report the provider's own prompt-token accounting, including prefix-cache hits"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+    PROVIDER_PROMPT_TOKENS.inc(prompt_tokens - cached, endpoint=endpoint, cached="false")
+    PROVIDER_PROMPT_TOKENS.inc(cached, endpoint=endpoint, cached="true")
+
+def get_stats() -> Dict:
+    return {
+        "tokenizer": "tiktoken" if _get_encoding() is not None else "estimate",
+        "staticPrefixes": len(_static),
+        "chatTokenBudget": CHAT_TOKEN_BUDGET,
+    }
@@ -1,121 +1,224 @@
+import asyncio
 import os
 import json
-from typing import Dict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-try:
-    from openai import OpenAI
-    _eval_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-except Exception:
-    _eval_client = None
+from services import prompts
+from services.batching import MicroBatcher
+from services.cache import TTLCache
+from services.metrics import FALLBACKS, provider_call, span
+from services.provider_client import get_client
+from services.resilience import BREAKERS, bounded, call_with_deadline
+from services.scoring import normalize_words, score_locally
+
+# "tiered": local scorer, escalate to GPT only when the local score is ambiguous
+# "local":  never call GPT;  "llm": always call GPT (local score on error)
+SCORER_MODE = os.getenv("PRONUNCIATION_SCORER", "tiered")
+# Local overall scores in [LOW, HIGH) are ambiguous enough to ask GPT
+ESCALATE_LOW = float(os.getenv("PRONUNCIATION_ESCALATE_LOW", "45"))
+ESCALATE_HIGH = float(os.getenv("PRONUNCIATION_ESCALATE_HIGH", "85"))
+
+# Concurrent GPT escalations are coalesced into one batched prompt per language
+EVAL_BATCH_WINDOW_MS = float(os.getenv("EVAL_BATCH_WINDOW_MS", "20"))  # 0 disables batching
+EVAL_BATCH_MAX_SIZE = int(os.getenv("EVAL_BATCH_MAX_SIZE", "16"))
+
+# Memoized evaluations keyed on normalized (expected, transcribed, language)
+_result_cache = TTLCache(
+    max_items=int(os.getenv("EVAL_CACHE_MAX_ITEMS", "50000")),
+    ttl_seconds=float(os.getenv("EVAL_CACHE_TTL_SECONDS", "604800")),
+)
+# Evaluations in progress by cache key (async path)
+_evaluating: Dict[str, "asyncio.Future[Dict]"] = {}
+# Optional snapshot file so the cache survives restarts (empty = memory only)
+EVAL_CACHE_FILE = os.getenv("EVAL_CACHE_FILE", "")
+
+def _cache_key(expected_text: str, transcribed_text: str, language: str) -> str:
+    """Case, whitespace, accent and punctuation differences map to the same key"""
+    return "\x1f".join((language.lower(), " ".join(normalize_words(expected_text)),
+                        " ".join(normalize_words(transcribed_text))))
+
+def _cached(key: str) -> Optional[Dict]:
+    result = _result_cache.get(key)
+    return dict(result) if result is not None else None
+
+def get_cache_stats() -> Dict:
+    return _result_cache.stats()
+
+def load_cache() -> int:
+    return _result_cache.load(Path(EVAL_CACHE_FILE)) if EVAL_CACHE_FILE else 0
+
+def save_cache() -> None:
+    if EVAL_CACHE_FILE:
+        _result_cache.save(Path(EVAL_CACHE_FILE))
+
+NO_SPEECH_RESULT = {
+    "accuracy": 0.0,
+    "fluency": 0.0,
+    "completeness": 0.0,
+    "overall": 0.0,
+    "feedback": "No speech detected. Please try speaking again."
+}
+
+def _needs_llm(local: Dict) -> bool:
+    if not get_client() or SCORER_MODE == "local":
+        return False
+    if SCORER_MODE == "llm":
+        return True
+    return ESCALATE_LOW <= local["overall"] < ESCALATE_HIGH
+
+def _llm_evaluate(expected_text: str, transcribed_text: str, language: str) -> Dict:
+    """Blocking GPT evaluation; raises on provider or parse errors"""
+    prompt = prompts.eval_prompt(expected_text, transcribed_text, language)
+    prompts.record("eval", prompt)
+    with BREAKERS["eval"].guard(), provider_call("gpt_eval"):
+        response = bounded(get_client()).chat.completions.create(
+            model="gpt-4o-mini",
+            messages=prompt.messages,
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+    prompts.record_usage("eval", response.usage)
+
+    raw = response.choices[0].message.content
+    return _with_defaults(json.loads(raw))
+
+def _with_defaults(result: Dict) -> Dict:
+    # Ensure all required fields
+    result.setdefault("accuracy", 0.0)
+    result.setdefault("fluency", 0.0)
+    result.setdefault("completeness", 0.0)
+    result.setdefault("overall", 0.0)
+    result.setdefault("feedback", "Good try!")
+    return result
+
+def _llm_evaluate_batch(pairs: List[Tuple[str, str]], language: str) -> List[Dict]:
+    """Blocking GPT evaluation of several (expected, transcribed) attempts in one call"""
+    prompt = prompts.eval_batch_prompt(pairs, language)
+    prompts.record("eval_batch", prompt)
+    with BREAKERS["eval"].guard(), provider_call("gpt_eval"):
+        response = bounded(get_client()).chat.completions.create(
+            model="gpt-4o-mini",
+            messages=prompt.messages,
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+    prompts.record_usage("eval_batch", response.usage)
+
+    by_id = {}
+    for entry in json.loads(response.choices[0].message.content).get("results", []):
+        try:
+            by_id[int(entry.pop("id"))] = _with_defaults(entry)
+        except (KeyError, TypeError, ValueError):
+            continue
+    missing = [i for i in range(1, len(pairs) + 1) if i not in by_id]
+    if missing:
+        raise ValueError(f"batched evaluation missing attempts {missing}")
+    return [by_id[i] for i in range(1, len(pairs) + 1)]
+
+async def _evaluate_batch(language: str, pairs: List[Tuple[str, str]]) -> List[Dict]:
+    # Identical attempts within one window are only sent once
+    unique = list(dict.fromkeys(pairs))
+    if len(unique) == 1:
+        results = [await call_with_deadline("eval", _llm_evaluate, unique[0][0], unique[0][1], language, hedge=True)]
+    else:
+        results = await call_with_deadline("eval", _llm_evaluate_batch, unique, language, hedge=True)
+    by_pair = dict(zip(unique, results))
+    return [dict(by_pair[pair]) for pair in pairs]
+
+_batchers: Dict[str, MicroBatcher] = {}
+
+def _batcher(language: str) -> MicroBatcher:
+    batcher = _batchers.get(language)
+    if batcher is None:
+        batcher = MicroBatcher(
+            lambda pairs: _evaluate_batch(language, pairs),
+            max_size=EVAL_BATCH_MAX_SIZE,
+            max_wait_ms=EVAL_BATCH_WINDOW_MS,
+        )
+        _batchers[language] = batcher
+    return batcher
+
+def get_batch_stats() -> Dict:
+    return {language: b.stats() for language, b in _batchers.items()}
+
+def _merge(local: Dict, llm: Dict) -> Dict:
+    """GPT scores with the local per-word error spans attached"""
+    llm["wordErrors"] = local["wordErrors"]
+    return llm
 
 def evaluate_pronunciation(expected_text: str, transcribed_text: str, language: str = "French") -> Dict:
     """
-    Use GPT to evaluate pronunciation by comparing expected vs transcribed text.
-    Returns a PronunciationScore dict with accuracy, fluency, completeness, overall, and feedback.
+    Evaluate pronunciation by comparing expected vs transcribed text.
+    Scores locally (word/character alignment) and escalates to GPT only when
+    the local score is ambiguous (see PRONUNCIATION_SCORER).
+    Returns a PronunciationScore dict with accuracy, fluency, completeness, overall, feedback and wordErrors.
     """
     
     if not transcribed_text or transcribed_text.strip() == "":
-        return {
-            "accuracy": 0.0,
-            "fluency": 0.0,
-            "completeness": 0.0,
-            "overall": 0.0,
-            "feedback": "No speech detected. Please try speaking again."
-        }
+        return dict(NO_SPEECH_RESULT)
     
-    # If OpenAI is available, use GPT for intelligent evaluation
-    if _eval_client:
-        try:
-            system_prompt = f"""You are a {language} pronunciation expert. Compare the expected phrase with what the user actually said.
-Score the pronunciation on:
-1. accuracy: how closely the transcribed text matches the expected (0-100)
-2. fluency: how natural/smooth the pronunciation sounds (0-100)
-3. completeness: whether all words were spoken (0-100)
-4. overall: weighted average score (0-100)
-
-Also provide brief, encouraging feedback in English (1-2 sentences).
-
-Return ONLY valid JSON in this exact format:
-{{
-  "accuracy": <number>,
-  "fluency": <number>,
-  "completeness": <number>,
-  "overall": <number>,
-  "feedback": "<string>"
-}}"""
-
-            user_prompt = f"""Expected: "{expected_text}"
-Transcribed: "{transcribed_text}"
-
-Evaluate the pronunciation."""
-
-            response = _eval_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
-            
-            raw = response.choices[0].message.content
-            result = json.loads(raw)
-            
-            # Ensure all required fields
-            result.setdefault("accuracy", 0.0)
-            result.setdefault("fluency", 0.0)
-            result.setdefault("completeness", 0.0)
-            result.setdefault("overall", 0.0)
-            result.setdefault("feedback", "Good try!")
-            
-            return result
-            
-        except Exception as e:
-            print(f"GPT evaluation error: {e}")
-            # Fall through to simple evaluation
+    key = _cache_key(expected_text, transcribed_text, language)
+    cached = _cached(key)
+    if cached is not None:
+        return cached
     
-    # Fallback: Simple string similarity evaluation
-    expected_clean = expected_text.lower().strip()
-    transcribed_clean = transcribed_text.lower().strip()
-    
-    # Simple word-level comparison
-    expected_words = expected_clean.split()
-    transcribed_words = transcribed_clean.split()
-    
-    # Completeness: how many expected words are present
-    matched_words = sum(1 for w in expected_words if w in transcribed_clean)
-    completeness = (matched_words / len(expected_words) * 100) if expected_words else 0
-    
-    # Accuracy: exact match or Levenshtein-like similarity
-    if expected_clean == transcribed_clean:
-        accuracy = 100.0
-    elif transcribed_clean in expected_clean or expected_clean in transcribed_clean:
-        accuracy = 85.0
-    else:
-        # Simple ratio
-        accuracy = max(0, 100 - (abs(len(expected_clean) - len(transcribed_clean)) * 2))
+    with span("score_local"):
+        local = score_locally(expected_text, transcribed_text)
+    if not _needs_llm(local):
+        _result_cache.put(key, local)
+        return local
     
-    # Fluency: assume decent if words match
-    fluency = completeness * 0.8  # rough estimate
-    
-    # Overall
-    overall = (accuracy * 0.4 + fluency * 0.3 + completeness * 0.3)
+    try:
+        result = _merge(local, _llm_evaluate(expected_text, transcribed_text, language))
+    except Exception as e:
+        print(f"GPT evaluation error: {e}")
+        FALLBACKS.inc(kind="eval_error")
+        return local  # not cached: retry GPT next time
+    _result_cache.put(key, result)
+    return result
+
+async def evaluate_pronunciation_async(expected_text: str, transcribed_text: str, language: str = "French") -> Dict:
+    """
+    Async entry point: local scoring inline; GPT escalations are micro-batched
+    with other concurrent requests and run on the bounded "eval" thread pool.
+    """
+    if not transcribed_text or transcribed_text.strip() == "":
+        return dict(NO_SPEECH_RESULT)
     
-    # Feedback
-    if overall >= 90:
-        feedback = "Excellent pronunciation! Perfect!"
-    elif overall >= 75:
-        feedback = "Very good! Keep practicing."
-    elif overall >= 50:
-        feedback = "Good attempt. Try to pronounce more clearly."
-    else:
-        feedback = "Keep trying! Listen carefully and repeat."
+    key = _cache_key(expected_text, transcribed_text, language)
+    cached = _cached(key)
+    if cached is not None:
+        return cached
+
+    # Concurrent identical attempts (client retries) share one evaluation
+    future = _evaluating.get(key)
+    if future is None:
+        future = _evaluating[key] = asyncio.ensure_future(_evaluate_uncached(key, expected_text, transcribed_text, language))
+        future.add_done_callback(lambda _: _evaluating.pop(key, None))
+    return dict(await asyncio.shield(future))
+
+async def _evaluate_uncached(key: str, expected_text: str, transcribed_text: str, language: str) -> Dict:
+    with span("score_local"):
+        local = score_locally(expected_text, transcribed_text)
+    if not _needs_llm(local):
+        _result_cache.put(key, local)
+        return local
+    if BREAKERS["eval"].is_open():
+        FALLBACKS.inc(kind="eval_error")
+        return local  # provider degraded: don't wait out a batch window just to fail
     
-    return {
-        "accuracy": round(accuracy, 1),
-        "fluency": round(fluency, 1),
-        "completeness": round(completeness, 1),
-        "overall": round(overall, 1),
-        "feedback": feedback
-    }
+    try:
+        with span("gpt_eval_wait"):
+            # Batchers exist per catalog language only; other (client-supplied) languages go unbatched
+            if EVAL_BATCH_WINDOW_MS > 0 and prompts.is_precompiled(language):
+                llm = await _batcher(language).submit((expected_text, transcribed_text))
+            else:
+                llm = await call_with_deadline("eval", _llm_evaluate, expected_text, transcribed_text, language, hedge=True)
+        result = _merge(local, llm)
+    except Exception as e:
+        print(f"GPT evaluation error: {e}")
+        FALLBACKS.inc(kind="eval_error")
+        return local  # not cached: retry GPT next time
+    _result_cache.put(key, result)
+    return result
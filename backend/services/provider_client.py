@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from services import metrics
+from services.concurrency import PROVIDER_LIMITS
+from services.metrics import Counter, Gauge
+from services.resilience import PROVIDER_TIMEOUTS
+
+# One OpenAI client (and so one HTTP connection pool) shared by stt, tts,
+# pronunciation and llm. Built on first use, after .env has been loaded;
+# with_options() copies made per call share its pool.
+
+# Default pool size covers every remote provider's worker threads at once
+MAX_CONNECTIONS = int(os.getenv(
+    "PROVIDER_MAX_CONNECTIONS", str(sum(PROVIDER_LIMITS[p] for p in PROVIDER_TIMEOUTS))))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("PROVIDER_MAX_KEEPALIVE", "64"))
+KEEPALIVE_SECONDS = float(os.getenv("PROVIDER_KEEPALIVE_SECONDS", "30"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_CONNECT_TIMEOUT_SECONDS", "5"))
+
+CLIENT_INIT_SECONDS = Gauge("natulang_provider_client_init_seconds", "Time taken to build the shared provider client")
+HTTP_REQUESTS = Counter("natulang_provider_http_requests_total", "HTTP requests sent to the provider")
+CONNECTIONS_OPENED = Counter("natulang_provider_connections_opened_total",
+                             "New provider connections (requests minus these reused a keep-alive connection)")
+metrics.register(CLIENT_INIT_SECONDS, HTTP_REQUESTS, CONNECTIONS_OPENED)
+
+_UNSET = object()
+_client = _UNSET
+_owned = False  # built here (so closed here), as opposed to injected
+_lock = threading.Lock()
+_stats = {"initSeconds": None, "requests": 0, "connectionsOpened": 0}
+_stats_lock = threading.Lock()
+
+
+def _trace(event: str, info: Dict) -> None:
+    # httpcore reports connection setup only for requests that didn't reuse one
+    if event == "connection.connect_tcp.complete":
+        with _stats_lock:
+            _stats["connectionsOpened"] += 1
+        CONNECTIONS_OPENED.inc()
+
+
+def _on_request(request) -> None:
+    with _stats_lock:
+        _stats["requests"] += 1
+    HTTP_REQUESTS.inc()
+    request.extensions.setdefault("trace", _trace)
+
+
+def _build():
+    start = time.perf_counter()
+    try:
+        import httpx
+        from openai import DefaultHttpxClient, OpenAI
+
+        http_client = DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(max(PROVIDER_TIMEOUTS.values()), connect=CONNECT_TIMEOUT_SECONDS),
+            event_hooks={"request": [_on_request]},
+        )
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+    except Exception as e:
+        print(f"OpenAI client unavailable, using stub providers: {e}")
+        return None
+    elapsed = time.perf_counter() - start
+    _stats["initSeconds"] = round(elapsed, 4)
+    CLIENT_INIT_SECONDS.set(elapsed)
+    return client
+
+
+def get_client():
+    """The shared OpenAI client, built on first call; None when unavailable (no SDK or API key)"""
+    global _client, _owned
+    client = _client
+    if client is _UNSET:
+        with _lock:
+            if _client is _UNSET:
+                _client = _build()
+                _owned = _client is not None
+            client = _client
+    return client
+
+
+def set_client(client) -> None:
+    """
+    Replace the shared client, e.g. with one pointed at scripts/fake_openai.py
+    or a test double; None forces the stub providers. The caller keeps
+    ownership of an injected client.
+    """
+    global _client, _owned
+    with _lock:
+        previous, owned = _client, _owned
+        _client, _owned = client, False
+    if owned and previous is not _UNSET and previous is not None:
+        previous.close()
+
+
+def close_client() -> None:
+    """Close the pooled connections (FastAPI shutdown); the next get_client() builds a new client"""
+    global _client, _owned
+    with _lock:
+        client, owned = _client, _owned
+        _client, _owned = _UNSET, False
+    if owned and client is not None and client is not _UNSET:
+        client.close()
+
+
+def get_stats() -> Dict:
+    with _stats_lock:
+        requests, opened = _stats["requests"], _stats["connectionsOpened"]
+    return {
+        "state": "unbuilt" if _client is _UNSET else ("stub" if _client is None else "ready"),
+        "initSeconds": _stats["initSeconds"],
+        "maxConnections": MAX_CONNECTIONS,
+        "maxKeepalive": MAX_KEEPALIVE_CONNECTIONS,
+        "requests": requests,
+        "connectionsOpened": opened,
+        "reuseRate": round(1 - opened / requests, 4) if requests else None,
+    }
@@ -0,0 +1,288 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, TypeVar
+
+from services.concurrency import run_blocking
+from services import metrics
+from services.metrics import Counter, Gauge
+
+T = TypeVar("T")
+
+# Upper bound for one provider call (seconds); the request budget may cut it shorter
+PROVIDER_TIMEOUTS: Dict[str, float] = {
+    "stt": float(os.getenv("STT_TIMEOUT_SECONDS", "15")),
+    "tts": float(os.getenv("TTS_TIMEOUT_SECONDS", "10")),
+    "eval": float(os.getenv("EVAL_TIMEOUT_SECONDS", "8")),
+    "chat": float(os.getenv("CHAT_TIMEOUT_SECONDS", "30")),
+}
+# Calls slower than this count as failures for the circuit breaker
+SLOW_CALL_SECONDS: Dict[str, float] = {
+    "stt": float(os.getenv("STT_SLOW_CALL_SECONDS", "8")),
+    "tts": float(os.getenv("TTS_SLOW_CALL_SECONDS", "5")),
+    "eval": float(os.getenv("EVAL_SLOW_CALL_SECONDS", "5")),
+    # Streaming chat is judged on time to first token
+    "chat": float(os.getenv("CHAT_SLOW_CALL_SECONDS", "5")),
+}
+# Hedging for idempotent calls: start a second identical call if the first
+# hasn't answered after this many ms, use whichever finishes first (0 = off)
+HEDGE_AFTER_MS: Dict[str, float] = {
+    "tts": float(os.getenv("TTS_HEDGE_AFTER_MS", "0")),
+    "eval": float(os.getenv("EVAL_HEDGE_AFTER_MS", "0")),
+}
+
+# Whole-request budget for HTTP handlers; provider calls stop in time to leave
+# DEADLINE_RESERVE_SECONDS for the fallback path and bookkeeping
+REQUEST_BUDGET_SECONDS = float(os.getenv("REQUEST_BUDGET_SECONDS", "25"))
+DEADLINE_RESERVE_SECONDS = float(os.getenv("DEADLINE_RESERVE_SECONDS", "0.5"))
+
+# Breaker trips when, over the last BREAKER_WINDOW calls (at least
+# BREAKER_MIN_CALLS), the failed-or-slow fraction reaches BREAKER_FAILURE_RATE
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+BREAKER_STATE = Gauge("natulang_breaker_state", "Circuit breaker state per provider (0 closed, 1 half-open, 2 open)")
+BREAKER_REJECTIONS = Counter("natulang_breaker_rejections_total", "Provider calls short-circuited by an open breaker")
+HEDGES = Counter("natulang_hedged_calls_total", "Hedged calls by provider: second attempts started, and which attempt won")
+DEADLINES = Counter("natulang_deadline_exceeded_total", "Provider calls abandoned at their deadline")
+metrics.register(BREAKER_STATE, BREAKER_REJECTIONS, HEDGES, DEADLINES)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half-open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The provider call's deadline passed before it answered"""
+
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker. Closed: calls flow, outcomes are recorded.
+    Open: calls fail fast with CircuitOpenError for `open_seconds`.
+    Half-open: a single probe call is let through; success closes the
+    breaker, failure re-opens it.
+    """
+
+    def __init__(self, name: str, slow_call_seconds: float, window: int = BREAKER_WINDOW,
+                 min_calls: int = BREAKER_MIN_CALLS, failure_rate: float = BREAKER_FAILURE_RATE,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self._outcomes: deque = deque(maxlen=max(1, window))  # True = failed or slow
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejections = 0
+        BREAKER_STATE.set(0, provider=name)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        BREAKER_STATE.set(_STATE_VALUES[state], provider=self.name)
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._set_state(HALF_OPEN)
+            self._probing = False
+        return self._state
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (does not consume the half-open probe)"""
+        with self._lock:
+            state = self._current_state()
+            return state == OPEN or (state == HALF_OPEN and self._probing)
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        self.reject()
+        return False
+
+    def reject(self) -> None:
+        """Count a call short-circuited because the breaker is open"""
+        with self._lock:
+            self.rejections += 1
+        BREAKER_REJECTIONS.inc(provider=self.name)
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        failed = not ok or elapsed >= self.slow_call_seconds
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._trip()
+                else:
+                    self._outcomes.clear()
+                    self._set_state(CLOSED)
+                return
+            if state == OPEN:
+                return  # late result from a call started before the trip
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+        self._set_state(OPEN)
+        print(f"Circuit breaker '{self.name}' opened for {self.open_seconds:g}s")
+
+    @contextmanager
+    def guard(self):
+        """Wrap one blocking provider call: fail fast while open, record outcome and latency"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "recentCalls": len(self._outcomes),
+                "recentFailures": sum(self._outcomes),
+                "trips": self.trips,
+                "rejections": self.rejections,
+            }
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(name, SLOW_CALL_SECONDS[name]) for name in PROVIDER_TIMEOUTS
+}
+
+
+def get_breaker_stats() -> Dict:
+    return {name: breaker.stats() for name, breaker in BREAKERS.items()}
+
+
+# --- Deadlines ---
+
+# Absolute time.monotonic() deadlines; both are copied into worker threads by run_blocking
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+_call_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("call_deadline", default=None)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the current provider call's deadline (None outside call_with_deadline)"""
+    deadline = _call_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bounded(client):
+    """
+    The OpenAI client with its timeout set to the current call deadline and
+    SDK retries disabled (they would overrun it; hedging covers idempotent calls).
+    """
+    remaining = time_left()
+    if remaining is None:
+        return client
+    return client.with_options(timeout=max(0.1, remaining), max_retries=0)
+
+
+def _consume(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()  # loser of a hedge: mark its outcome retrieved
+
+
+async def _hedged(provider: str, hedge_after: float, fn: Callable[..., T], *args) -> T:
+    attempts = {asyncio.ensure_future(run_blocking(provider, fn, *args)): "first"}
+    try:
+        done, pending = await asyncio.wait(attempts, timeout=hedge_after)
+        if not done and not BREAKERS[provider].is_open():
+            HEDGES.inc(provider=provider, result="started")
+            attempts[asyncio.ensure_future(run_blocking(provider, fn, *args))] = "hedge"
+            pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending or done:
+            for task in done:
+                if task.exception() is None:
+                    if len(attempts) > 1:
+                        HEDGES.inc(provider=provider, result=f"{attempts[task]}-won")
+                    return task.result()
+                error = task.exception()
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        raise error
+    finally:
+        # Abandoned attempts keep running on the pool; just don't leak their errors
+        for task in attempts:
+            if not task.done():
+                task.add_done_callback(_consume)
+
+
+async def call_with_deadline(provider: str, fn: Callable[..., T], *args, hedge: bool = False) -> T:
+    """
+    Run a blocking provider call on its pool with a deadline of
+    min(provider timeout, request deadline - reserve). Fails fast with
+    CircuitOpenError while the provider's breaker is open, raises
+    DeadlineExceeded when the deadline passes, and with hedge=True (for
+    idempotent calls) races a second attempt after HEDGE_AFTER_MS.
+    """
+    if BREAKERS[provider].is_open():
+        BREAKERS[provider].reject()
+        raise CircuitOpenError(f"{provider} circuit open")
+    now = time.monotonic()
+    deadline = now + PROVIDER_TIMEOUTS[provider]
+    request_deadline = _request_deadline.get()
+    if request_deadline is not None:
+        deadline = min(deadline, request_deadline - DEADLINE_RESERVE_SECONDS)
+    if deadline <= now:
+        DEADLINES.inc(provider=provider)
+        raise DeadlineExceeded(f"{provider}: request budget exhausted")
+
+    token = _call_deadline.set(deadline)
+    try:
+        hedge_after = HEDGE_AFTER_MS.get(provider, 0) / 1000.0 if hedge else 0
+        call = _hedged(provider, hedge_after, fn, *args) if hedge_after > 0 else run_blocking(provider, fn, *args)
+        try:
+            return await asyncio.wait_for(call, deadline - now)
+        except asyncio.TimeoutError:
+            DEADLINES.inc(provider=provider)
+            raise DeadlineExceeded(f"{provider}: no answer within {deadline - now:.1f}s") from None
+    finally:
+        _call_deadline.reset(token)
+
+
+class RequestBudgetMiddleware:
+    """ASGI middleware giving each HTTP request a deadline that provider calls respect"""
+
+    def __init__(self, app, budget_seconds: float = REQUEST_BUDGET_SECONDS):
+        self.app = app
+        self.budget = budget_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.budget <= 0:
+            await self.app(scope, receive, send)
+            return
+        token = _request_deadline.set(time.monotonic() + self.budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_deadline.reset(token)
@@ -0,0 +1,156 @@
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Weights match the original fallback scorer: overall = 0.4 acc + 0.3 fluency + 0.3 completeness
+ACCURACY_WEIGHT, FLUENCY_WEIGHT, COMPLETENESS_WEIGHT = 0.4, 0.3, 0.3
+# A substituted word this similar to the expected word still counts as "said"
+NEAR_MATCH = 0.75
+# Extra cost for aligning one word to two (split/merged words in the transcript)
+SPLIT_PENALTY = 0.1
+SPLIT_MIN_SIMILARITY = 0.85
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercase, strip accents and punctuation (apostrophes split words: j'ai -> j ai)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    chars = []
+    for ch in decomposed:
+        cat = unicodedata.category(ch)
+        if cat == "Mn":
+            continue
+        chars.append(" " if cat[0] in "PSZC" else ch)
+    return "".join(chars).split()
+
+
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+@lru_cache(maxsize=65536)
+def char_similarity(a: str, b: str) -> float:
+    """1 - normalized edit distance, in 0..1"""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    return 1.0 - levenshtein(a, b) / longest if longest else 1.0
+
+
+def align_words(expected: List[str], heard: List[str]) -> List[Tuple[str, str, str, int, float]]:
+    """
+    Weighted edit-distance alignment of word sequences. Gaps cost 1, a
+    substitution costs 1 - char similarity, and one expected word may align
+    to two heard words ("bonjour" / "bon jour") or two expected words to one
+    heard word ("m appelle" / "mapelle") for a small extra penalty when
+    the joined words are near-identical.
+    Returns ops (op, expected, heard, expected_word_count, similarity) with
+    op in match/sub/split/merge/del/ins.
+    """
+    n, m = len(expected), len(heard)
+    inf = float("inf")
+    cost = [[inf] * (m + 1) for _ in range(n + 1)]
+    back = [[None] * (m + 1) for _ in range(n + 1)]
+    cost[0][0] = 0.0
+    for i in range(n + 1):
+        for j in range(m + 1):
+            best, step = cost[i][j], back[i][j]
+            if i > 0 and cost[i - 1][j] + 1.0 < best:
+                best, step = cost[i - 1][j] + 1.0, ("del", 1, 0, 0.0)
+            if j > 0 and cost[i][j - 1] + 1.0 < best:
+                best, step = cost[i][j - 1] + 1.0, ("ins", 0, 1, 0.0)
+            if i > 0 and j > 0:
+                sim = char_similarity(expected[i - 1], heard[j - 1])
+                c = cost[i - 1][j - 1] + 1.0 - sim
+                if c < best:
+                    best, step = c, ("match" if sim == 1.0 else "sub", 1, 1, sim)
+            if i > 0 and j > 1:
+                sim = char_similarity(expected[i - 1], heard[j - 2] + heard[j - 1])
+                c = cost[i - 1][j - 2] + 1.0 - sim + SPLIT_PENALTY
+                if sim >= SPLIT_MIN_SIMILARITY and c < best:
+                    best, step = c, ("split", 1, 2, sim)
+            if i > 1 and j > 0:
+                sim = char_similarity(expected[i - 2] + expected[i - 1], heard[j - 1])
+                c = cost[i - 2][j - 1] + 2.0 * (1.0 - sim) + SPLIT_PENALTY
+                if sim >= SPLIT_MIN_SIMILARITY and c < best:
+                    best, step = c, ("merge", 2, 1, sim)
+            cost[i][j], back[i][j] = best, step
+
+    ops = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        op, di, dj, sim = back[i][j]
+        ops.append((op, " ".join(expected[i - di:i]), " ".join(heard[j - dj:j]), di, sim))
+        i, j = i - di, j - dj
+    ops.reverse()
+    return ops
+
+
+def _feedback(overall: float, errors: List[Dict]) -> str:
+    focus = next((e["expected"] for e in errors if e["expected"]), None)
+    tip = f' Focus on "{focus}".' if focus else ""
+    if overall >= 90:
+        return "Excellent pronunciation! Perfect!"
+    if overall >= 75:
+        return "Very good! Keep practicing." + tip
+    if overall >= 50:
+        return "Good attempt. Try to pronounce more clearly." + tip
+    return "Keep trying! Listen carefully and repeat." + tip
+
+
+def score_locally(expected_text: str, transcribed_text: str) -> Dict:
+    """
+    Score a transcript against the expected phrase without any provider call.
+    Returns the PronunciationScore dict plus per-word error spans in "wordErrors".
+    """
+    expected = normalize_words(expected_text)
+    heard = normalize_words(transcribed_text)
+    if not expected:
+        return {"accuracy": 0.0, "fluency": 0.0, "completeness": 0.0, "overall": 0.0,
+                "feedback": "Nothing to compare against.", "wordErrors": []}
+
+    ops = align_words(expected, heard)
+    errors = []
+    similarity_sum = 0.0
+    said = inserted = deleted = substituted = 0.0
+    position = 0
+    for op, e, h, count, sim in ops:
+        if op == "ins":
+            inserted += 1
+            errors.append({"type": "extra", "expected": None, "heard": h, "position": position})
+            continue
+        if op == "del":
+            deleted += 1
+            errors.append({"type": "missing", "expected": e, "heard": None, "position": position})
+        else:
+            similarity_sum += sim * count
+            said += count if sim >= NEAR_MATCH else 0
+            if sim < 1.0:
+                substituted += count * (1.0 - sim)
+                errors.append({"type": "mispronounced", "expected": e, "heard": h, "position": position})
+        position += count
+
+    n = len(expected)
+    word_accuracy = similarity_sum / (n + inserted)
+    # Spaceless comparison so word-boundary differences in the transcript don't count twice
+    phrase_similarity = char_similarity("".join(expected), "".join(heard))
+    accuracy = 100.0 * (0.5 * word_accuracy + 0.5 * phrase_similarity)
+    completeness = 100.0 * said / n
+    fluency = 100.0 * max(0.0, 1.0 - (inserted + 0.5 * deleted + 0.5 * substituted) / n)
+    overall = accuracy * ACCURACY_WEIGHT + fluency * FLUENCY_WEIGHT + completeness * COMPLETENESS_WEIGHT
+
+    return {
+        "accuracy": round(accuracy, 1),
+        "fluency": round(fluency, 1),
+        "completeness": round(completeness, 1),
+        "overall": round(overall, 1),
+        "feedback": _feedback(overall, errors),
+        "wordErrors": errors,
+    }
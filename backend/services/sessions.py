@@ -0,0 +1,40 @@
+import os
+from typing import Dict
+
+# Turns kept verbatim per session (the prompt builder only uses recent turns)
+HISTORY_TURNS = int(os.getenv("SESSION_HISTORY_TURNS", "6"))
+# Older turns are folded into a compact running summary of at most this many characters
+SUMMARY_MAX_CHARS = int(os.getenv("SESSION_SUMMARY_MAX_CHARS", "600"))
+TURN_MAX_CHARS = 200
+
+
+def new_session() -> Dict:
+    return {"history": [], "summary": "", "turns": 0}
+
+
+def _clip(text: str, limit: int = TURN_MAX_CHARS) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _fold(summary: str, turn: Dict) -> str:
+    """Append a turn to the summary, keeping only the most recent SUMMARY_MAX_CHARS"""
+    entry = f"User: {_clip(turn.get('user', ''), 80)} / AI: {_clip(turn.get('ai', ''), 80)}"
+    summary = f"{summary} | {entry}" if summary else entry
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = "…" + summary[-(SUMMARY_MAX_CHARS - 1):]
+    return summary
+
+
+def append_turn(session: Dict, user_text: str, ai_text: str) -> Dict:
+    """
+    Add a turn to a session's fixed-size history (at most HISTORY_TURNS).
+    Turns pushed out are folded into session["summary"], so memory per
+    session is bounded no matter how long the conversation runs.
+    """
+    history = session.setdefault("history", [])
+    history.append({"user": _clip(user_text), "ai": _clip(ai_text)})
+    session["turns"] = session.get("turns", 0) + 1
+    while len(history) > HISTORY_TURNS:
+        session["summary"] = _fold(session.get("summary", ""), history.pop(0))
+    return session
@@ -0,0 +1,91 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+# Score histogram: 10 buckets of width 10 (0-9.9, ..., 90-100)
+HISTOGRAM_BUCKETS = 10
+
+# An aggregate is a flat list, O(1) to update (the SQLite store keeps one column per element):
+# [attempts, mean, m2 (sum of squared deviations), best, practice_ms, bucket0..bucket9]
+_COUNT, _MEAN, _M2, _BEST, _PRACTICE_MS, _HIST = 0, 1, 2, 3, 4, 5
+
+
+def new_aggregate() -> List[float]:
+    return [0, 0.0, 0.0, 0.0, 0] + [0] * HISTOGRAM_BUCKETS
+
+
+def histogram_bucket(score: float) -> int:
+    return min(HISTOGRAM_BUCKETS - 1, max(0, int(score // 10)))
+
+
+def update_aggregate(agg: List[float], score: float, practice_ms: int = 0) -> None:
+    """Welford running mean/variance plus best score, practice time and histogram"""
+    agg[_COUNT] += 1
+    delta = score - agg[_MEAN]
+    agg[_MEAN] += delta / agg[_COUNT]
+    agg[_M2] += delta * (score - agg[_MEAN])
+    agg[_BEST] = max(agg[_BEST], score)
+    agg[_PRACTICE_MS] += int(practice_ms)
+    agg[_HIST + histogram_bucket(score)] += 1
+
+
+def summarize(agg: Optional[List[float]]) -> Dict:
+    agg = agg or new_aggregate()
+    count = agg[_COUNT]
+    variance = agg[_M2] / (count - 1) if count > 1 else 0.0
+    return {
+        "attempts": int(count),
+        "meanScore": round(agg[_MEAN], 1),
+        "stdDev": round(math.sqrt(variance), 1),
+        "bestScore": round(agg[_BEST], 1),
+        "practiceSeconds": int(agg[_PRACTICE_MS] // 1000),
+        "histogram": [int(n) for n in agg[_HIST:]],
+    }
+
+
+# Stats are stored as one aggregate row per (user, scope); an attempt updates
+# its overall, course, lesson and exercise rows. Each row also keeps the last score.
+# {scope: (aggregate, last score)}
+ScopeStats = Dict[str, Tuple[List[float], float]]
+
+
+def attempt_scopes(course_id: str, lesson_id: str, exercise_id: str) -> List[str]:
+    """The aggregate rows one practice attempt updates"""
+    scopes = ["all"]
+    if course_id:
+        scopes.append(f"c:{course_id}")
+    if lesson_id:
+        scopes.append(f"l:{lesson_id}")
+    if exercise_id:
+        scopes.append(f"x:{exercise_id}")
+    return scopes
+
+
+def summarize_user(rows: Optional[ScopeStats], course_id: Optional[str] = None,
+                   lesson_ids: Optional[List[str]] = None, exercise_ids: Optional[List[str]] = None) -> Dict:
+    """
+    Response-ready stats: overall (or one course's) aggregate, per-lesson
+    aggregates and last exercise scores. `lesson_ids` / `exercise_ids`
+    restrict those maps to one course.
+    """
+    rows = rows or {}
+    by_kind: Dict[str, Dict[str, Tuple[List[float], float]]] = {"c": {}, "l": {}, "x": {}}
+    for scope, row in rows.items():
+        kind, _, item_id = scope.partition(":")
+        if kind in by_kind:
+            by_kind[kind][item_id] = row
+    lessons, exercises = by_kind["l"], by_kind["x"]
+    if lesson_ids is not None:
+        wanted = set(lesson_ids)
+        lessons = {k: v for k, v in lessons.items() if k in wanted}
+    if exercise_ids is not None:
+        wanted = set(exercise_ids)
+        exercises = {k: v for k, v in exercises.items() if k in wanted}
+    overall = by_kind["c"].get(course_id) if course_id else rows.get("all")
+    summary = {
+        "overall": summarize(overall[0] if overall else None),
+        "lessons": {k: summarize(agg) for k, (agg, _) in lessons.items()},
+        "lastExerciseScores": {k: round(last, 1) for k, (_, last) in exercises.items()},
+    }
+    if not course_id:
+        summary["courses"] = {k: summarize(agg) for k, (agg, _) in by_kind["c"].items()}
+    return summary
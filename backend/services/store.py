@@ -0,0 +1,426 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services import stats
+from services.stats import ScopeStats
+
+# "sqlite" shares state between worker processes and survives restarts; "memory" is per-process
+STORE_BACKEND = os.getenv("STORE_BACKEND", "sqlite")
+STORE_PATH = Path(os.getenv("STORE_PATH", Path(__file__).parent.parent / "cache" / "natulang.db"))
+# Write-behind: progress updates are applied in one transaction every N ms (or every N updates)
+FLUSH_INTERVAL_MS = int(os.getenv("STORE_FLUSH_INTERVAL_MS", "200"))
+FLUSH_MAX_PENDING = int(os.getenv("STORE_FLUSH_MAX_PENDING", "500"))
+# How long a write waits for another process's transaction before failing
+BUSY_TIMEOUT_MS = int(os.getenv("STORE_BUSY_TIMEOUT_MS", "5000"))
+
+# Sessions idle longer than this are dropped; beyond the max count the least recently used go first
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "7200"))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+
+Mutation = Callable[[Dict], None]
+
+def _apply(mutate: Mutation, data: Dict) -> None:
+    try:
+        mutate(data)
+    except Exception as e:
+        # A broken mutation must not wedge the write-behind queue
+        print(f"Store mutation error: {e}")
+
+
+class MemoryStore:
+    """Process-local store (single worker only)"""
+
+    def __init__(self, session_ttl: float = SESSION_TTL_SECONDS, max_sessions: int = SESSION_MAX_COUNT):
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        # session id -> (last access, approx JSON bytes, data); ordered oldest access first
+        self._sessions: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()
+        self._session_bytes = 0
+        self._progress: Dict[str, Dict] = {}
+        self._scores: Dict[str, Dict[str, List]] = {}  # user -> scope -> [aggregate, last score]
+        self._lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self.expired_sessions = 0
+        self.evicted_sessions = 0
+
+    def _drop_session(self, session_id: str) -> None:
+        _, size, _ = self._sessions.pop(session_id)
+        self._session_bytes -= size
+
+    def _sweep_sessions(self, now: float) -> None:
+        # Oldest access first, so stop at the first session still within its TTL
+        while self._sessions:
+            session_id, (last_access, _, _) = next(iter(self._sessions.items()))
+            if now - last_access < self.session_ttl:
+                break
+            self._drop_session(session_id)
+            self.expired_sessions += 1
+        while len(self._sessions) > self.max_sessions:
+            self._drop_session(next(iter(self._sessions)))
+            self.evicted_sessions += 1
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        now = time.time()
+        with self._session_lock:
+            self._sweep_sessions(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1], entry[2])
+            self._sessions.move_to_end(session_id)
+            return entry[2]
+
+    def put_session(self, session_id: str, data: Dict) -> None:
+        size = len(json.dumps(data))
+        now = time.time()
+        with self._session_lock:
+            if session_id in self._sessions:
+                self._drop_session(session_id)
+            self._sessions[session_id] = (now, size, data)
+            self._session_bytes += size
+            self._sweep_sessions(now)
+
+    def update_session(self, session_id: str, default: Dict, mutate: Mutation) -> Dict:
+        """Apply `mutate` to the session (created from `default` if missing) atomically"""
+        now = time.time()
+        with self._session_lock:
+            self._sweep_sessions(now)
+            entry = self._sessions.get(session_id)
+            data = entry[2] if entry is not None else copy.deepcopy(default)
+            mutate(data)
+            if entry is not None:
+                self._drop_session(session_id)
+            size = len(json.dumps(data))
+            self._sessions[session_id] = (now, size, data)
+            self._session_bytes += size
+            self._sweep_sessions(now)
+            return data
+
+    def get_progress(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            data = self._progress.get(key)
+            return copy.deepcopy(data) if data is not None else None
+
+    def update_progress(self, key: str, default: Dict, mutate: Mutation) -> Dict:
+        with self._lock:
+            data = self._progress.setdefault(key, copy.deepcopy(default))
+            mutate(data)
+            return copy.deepcopy(data)
+
+    def record_score(self, user_id: str, scopes: List[str], score: float, practice_ms: int = 0) -> None:
+        with self._lock:
+            rows = self._scores.setdefault(user_id, {})
+            for scope in scopes:
+                row = rows.setdefault(scope, [stats.new_aggregate(), score])
+                stats.update_aggregate(row[0], score, practice_ms)
+                row[1] = score
+
+    def get_scores(self, user_id: str) -> ScopeStats:
+        with self._lock:
+            return {scope: (list(agg), last) for scope, (agg, last) in self._scores.get(user_id, {}).items()}
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict:
+        with self._session_lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "sessionBytes": self._session_bytes,
+                "expiredSessions": self.expired_sessions,
+                "evictedSessions": self.evicted_sessions,
+                "progress": len(self._progress),
+                "scoreRows": sum(len(rows) for rows in self._scores.values()),
+            }
+
+
+_HIST_COLUMNS = [f"h{i}" for i in range(stats.HISTOGRAM_BUCKETS)]
+_HIST_DDL = ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in _HIST_COLUMNS)
+_SCORE_COLUMNS = f"attempts, mean, m2, best, practice_ms, {', '.join(_HIST_COLUMNS)}, last"
+
+
+def _score_upsert(bucket: int) -> str:
+    """
+    One statement per (user, scope) row: Welford's update in SQL. The SET
+    expressions all see the row's previous values.
+    """
+    h = _HIST_COLUMNS[bucket]
+    return (
+        f"INSERT INTO score_stats (user, scope, attempts, mean, m2, best, practice_ms, {h}, last) "
+        "VALUES (:user, :scope, 1, :score, 0, :score, :ms, 1, :score) "
+        "ON CONFLICT(user, scope) DO UPDATE SET attempts = attempts + 1, "
+        "mean = mean + (:score - mean) / (attempts + 1), "
+        "m2 = m2 + (:score - mean) * ((:score - mean) - (:score - mean) / (attempts + 1)), "
+        f"best = MAX(best, :score), practice_ms = practice_ms + :ms, {h} = {h} + 1, last = :score"
+    )
+
+
+class _PendingProgress:
+    """Progress mutations for one key not yet flushed, and the local view with them applied"""
+    __slots__ = ("default", "mutations", "view")
+
+    def __init__(self, default: Dict, view: Dict):
+        self.default = default
+        self.mutations: List[Mutation] = []
+        self.view = view
+
+
+class SQLiteStore:
+    """
+    SQLite (WAL mode) store shared by all worker processes on a host.
+
+    Progress updates are queued as mutation callbacks and applied write-behind:
+    a background thread periodically runs every queued mutation inside one
+    BEGIN IMMEDIATE transaction, re-reading each row first, so concurrent
+    workers never lose each other's updates. Reads in this process see their
+    own queued mutations immediately. All methods block on SQLite; call them
+    off the event loop.
+    """
+
+    def __init__(self, path: Path, flush_interval_ms: int = FLUSH_INTERVAL_MS, max_pending: int = FLUSH_MAX_PENDING,
+                 session_ttl: float = SESSION_TTL_SECONDS, max_sessions: int = SESSION_MAX_COUNT):
+        self.path = Path(path)
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.expired_sessions = 0
+        self.evicted_sessions = 0
+        self._last_sweep = 0.0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self._local = threading.local()
+        self._pending: Dict[str, _PendingProgress] = {}
+        self._pending_count = 0
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self.flushes = 0
+        self.flushed_updates = 0
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS progress (key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS score_stats (user TEXT NOT NULL, scope TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL, mean REAL NOT NULL, m2 REAL NOT NULL, best REAL NOT NULL, "
+            f"practice_ms INTEGER NOT NULL, {_HIST_DDL}, last REAL NOT NULL, PRIMARY KEY (user, scope))"
+        )
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="store-flusher", daemon=True)
+        self._flusher.start()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly where needed
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    # --- Sessions (write-through) ---
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT data, updated_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if not row or now - row[1] >= self.session_ttl:
+            return None
+        # Touch for idle-TTL purposes; cheap single-row update
+        conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+        return json.loads(row[0])
+
+    def put_session(self, session_id: str, data: Dict) -> None:
+        self._conn().execute(
+            "INSERT INTO sessions (id, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (session_id, json.dumps(data), time.time()),
+        )
+
+    def update_session(self, session_id: str, default: Dict, mutate: Mutation) -> Dict:
+        """
+        Apply `mutate` to the session (created from `default` if missing or
+        expired) in one write transaction, so concurrent updates from any
+        worker are applied in turn rather than overwriting each other
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT data, updated_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            data = json.loads(row[0]) if row and now - row[1] < self.session_ttl else copy.deepcopy(default)
+            mutate(data)
+            conn.execute(
+                "INSERT INTO sessions (id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (session_id, json.dumps(data), now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return data
+
+    # --- Progress (write-behind) ---
+
+    def _read_progress(self, conn: sqlite3.Connection, key: str) -> Optional[Dict]:
+        row = conn.execute("SELECT data FROM progress WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_progress(self, key: str) -> Optional[Dict]:
+        with self._pending_lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                return copy.deepcopy(entry.view)
+        # Not pending: everything queued for it has been committed
+        return self._read_progress(self._conn(), key)
+
+    def update_progress(self, key: str, default: Dict, mutate: Mutation) -> Dict:
+        with self._pending_lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                # The row is read once per key per flush, not on every update
+                data = self._read_progress(self._conn(), key)
+                entry = self._pending[key] = _PendingProgress(
+                    copy.deepcopy(default), data if data is not None else copy.deepcopy(default))
+            entry.mutations.append(mutate)
+            _apply(mutate, entry.view)
+            self._pending_count += 1
+            full = self._pending_count >= self.max_pending
+            result = copy.deepcopy(entry.view)
+        if self._closed:
+            self.flush()
+        elif full:
+            self._wake.set()
+        return result
+
+    def flush(self) -> None:
+        """Apply all queued progress mutations in a single transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch = [(key, entry.default, list(entry.mutations)) for key, entry in self._pending.items()]
+            if not batch:
+                return
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows: Dict[str, Dict] = {}
+                for key, default, mutations in batch:
+                    # Re-read inside the transaction: other processes may have written the row
+                    data = self._read_progress(conn, key) or copy.deepcopy(default)
+                    for mutate in mutations:
+                        _apply(mutate, data)
+                    rows[key] = data
+                now = time.time()
+                conn.executemany(
+                    "INSERT INTO progress (key, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                    [(key, json.dumps(data), now) for key, data in rows.items()],
+                )
+                with self._pending_lock:
+                    conn.execute("COMMIT")
+                    # Only drop what was committed; updates queued meanwhile stay pending
+                    for key, _, mutations in batch:
+                        entry = self._pending[key]
+                        del entry.mutations[:len(mutations)]
+                        self._pending_count -= len(mutations)
+                        if not entry.mutations:
+                            del self._pending[key]
+                            continue
+                        entry.view = copy.deepcopy(rows[key])
+                        for mutate in entry.mutations:
+                            _apply(mutate, entry.view)
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            self.flushes += 1
+            self.flushed_updates += sum(len(mutations) for _, _, mutations in batch)
+
+    # --- Score statistics (one row per user and scope, updated in place) ---
+
+    def record_score(self, user_id: str, scopes: List[str], score: float, practice_ms: int = 0) -> None:
+        conn = self._conn()
+        sql = _score_upsert(stats.histogram_bucket(score))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, [{"user": user_id, "scope": scope, "score": float(score), "ms": int(practice_ms)}
+                                   for scope in scopes])
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def get_scores(self, user_id: str) -> ScopeStats:
+        rows = self._conn().execute(f"SELECT scope, {_SCORE_COLUMNS} FROM score_stats WHERE user = ?", (user_id,))
+        return {row[0]: (list(row[1:-1]), row[-1]) for row in rows}
+
+    def sweep_sessions(self) -> None:
+        """Delete sessions past their idle TTL, then the oldest beyond the max count"""
+        conn = self._conn()
+        cur = conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.session_ttl,))
+        self.expired_sessions += max(cur.rowcount, 0)
+        cur = conn.execute(
+            "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+        self.evicted_sessions += max(cur.rowcount, 0)
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_sweep >= 60:
+                    self._last_sweep = time.monotonic()
+                    self.sweep_sessions()
+            except Exception as e:
+                print(f"Store flush error: {e}")
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        with self._pending_lock:
+            pending = self._pending_count
+        return {
+            "backend": "sqlite",
+            "sessions": conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            "sessionBytes": conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM sessions").fetchone()[0],
+            "expiredSessions": self.expired_sessions,
+            "evictedSessions": self.evicted_sessions,
+            "progress": conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0],
+            "scoreRows": conn.execute("SELECT COUNT(*) FROM score_stats").fetchone()[0],
+            "pendingUpdates": pending,
+            "flushes": self.flushes,
+            "flushedUpdates": self.flushed_updates,
+        }
+
+
+def create_store():
+    if STORE_BACKEND == "memory":
+        return MemoryStore()
+    return SQLiteStore(STORE_PATH)
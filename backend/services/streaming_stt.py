@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+from typing import Optional, Tuple
+
+from fastapi import WebSocket
+
+from services.audio import SAMPLE_WIDTH, parse_wav_header, pcm_rms, pcm_to_wav
+from services.stt import transcribe_bytes
+
+# Emit a partial transcript every N ms of newly received audio
+PARTIAL_INTERVAL_MS = int(os.getenv("STREAM_PARTIAL_INTERVAL_MS", "800"))
+# Partials transcribe only the trailing window to keep each call cheap
+WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "10"))
+# Trailing silence after speech that counts as end-of-speech
+END_SILENCE_MS = int(os.getenv("STREAM_END_SILENCE_MS", "700"))
+# Chunk RMS (0..1) above which a chunk counts as speech
+SPEECH_RMS_THRESHOLD = float(os.getenv("STREAM_SPEECH_RMS", "0.015"))
+MAX_STREAM_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "60"))
+# Accepted stream formats; together with MAX_STREAM_SECONDS they bound the audio buffer
+MIN_SAMPLE_RATE, MAX_SAMPLE_RATE = 8000, 48000
+MAX_CHANNELS = 2
+# Websocket close code for a stream in a format we don't accept ("unsupported data")
+UNSUPPORTED_FORMAT_CLOSE_CODE = 1003
+
+
+class UnsupportedFormat(ValueError):
+    """Sample rate or channel count outside the accepted range"""
+
+
+def check_format(sample_rate: int, channels: int) -> None:
+    if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+        raise UnsupportedFormat(f"Sample rate must be {MIN_SAMPLE_RATE}-{MAX_SAMPLE_RATE} Hz, got {sample_rate}")
+    if not 1 <= channels <= MAX_CHANNELS:
+        raise UnsupportedFormat(f"Channels must be 1-{MAX_CHANNELS}, got {channels}")
+
+
+class StreamingTranscriber:
+    """
+    Accumulates streamed 16-bit PCM, tracks speech/silence per chunk and
+    transcribes rolling windows for partial results.
+    A leading WAV header (if the client streams a .wav file) is parsed and stripped.
+    Raises UnsupportedFormat for a sample rate or channel count out of range.
+    """
+
+    def __init__(self, language: str, sample_rate: int = 16000, channels: int = 1):
+        check_format(sample_rate, channels)
+        self.language = language
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.pcm = bytearray()
+        self.speech_started = False
+        self.silence_ms = 0.0
+        self._header_checked = False
+        self._partial_at = 0  # buffer length at the last partial
+        self._partial_result: Optional[Tuple[str, float, str]] = None
+        self._partial_covers_all = False
+
+    @property
+    def _frame_bytes(self) -> int:
+        return SAMPLE_WIDTH * self.channels
+
+    def _ms(self, n_bytes: int) -> float:
+        return n_bytes / self._frame_bytes / self.sample_rate * 1000
+
+    @property
+    def duration_ms(self) -> float:
+        return self._ms(len(self.pcm))
+
+    def feed(self, chunk: bytes) -> None:
+        if not self._header_checked:
+            self._header_checked = True
+            header = parse_wav_header(chunk)
+            if header:
+                check_format(header[0], header[1])
+                self.sample_rate, self.channels, offset = header
+                chunk = chunk[offset:]
+        if not chunk:
+            return
+        self.pcm += chunk
+        if pcm_rms(chunk) >= SPEECH_RMS_THRESHOLD:
+            self.speech_started = True
+            self.silence_ms = 0.0
+        elif self.speech_started:
+            self.silence_ms += self._ms(len(chunk))
+
+    @property
+    def end_of_speech(self) -> bool:
+        return (self.speech_started and self.silence_ms >= END_SILENCE_MS) or \
+            self.duration_ms >= MAX_STREAM_SECONDS * 1000
+
+    def partial_due(self) -> bool:
+        return self.speech_started and self._ms(len(self.pcm) - self._partial_at) >= PARTIAL_INTERVAL_MS
+
+    def _wav(self, pcm: bytes) -> bytes:
+        usable = len(pcm) - (len(pcm) % self._frame_bytes)
+        return pcm_to_wav(bytes(pcm[:usable]), self.sample_rate, self.channels)
+
+    async def partial(self) -> str:
+        """Transcribe the trailing window of audio received so far"""
+        end = len(self.pcm)
+        window = int(WINDOW_SECONDS * self.sample_rate) * self._frame_bytes
+        start = max(0, end - window)
+        start -= start % self._frame_bytes
+        self._partial_at = end
+        self._partial_result = await transcribe_bytes(self._wav(self.pcm[start:end]), self.language)
+        self._partial_covers_all = start == 0
+        return self._partial_result[0]
+
+    async def final(self) -> Tuple[str, float, str]:
+        """Final transcript; reuses the last partial when it already covered all audio"""
+        if not self.pcm:
+            return "", 0.0, "empty"
+        if self._partial_covers_all and self._partial_at == len(self.pcm) and self._partial_result:
+            return self._partial_result
+        return await transcribe_bytes(self._wav(self.pcm), self.language)
+
+
+async def _refuse(websocket: WebSocket, error: UnsupportedFormat) -> None:
+    await websocket.send_json({"type": "error", "detail": str(error)})
+    await websocket.close(code=UNSUPPORTED_FORMAT_CLOSE_CODE)
+
+
+async def stream_transcript(websocket: WebSocket, language: str, sample_rate: int = 16000,
+                            channels: int = 1) -> Optional[Tuple[str, float, str, int]]:
+    """
+    Drive one streaming transcription over an accepted websocket.
+    Client sends binary PCM frames and optionally {"type": "stop"}; the server
+    pushes {"type": "partial", "text": ...} messages and returns the final
+    (text, confidence, provider, audio_ms) at end-of-speech, or None if the client
+    left or the stream was refused (unsupported format: error message, then close 1003).
+    """
+    try:
+        transcriber = StreamingTranscriber(language, sample_rate, channels)
+    except UnsupportedFormat as e:
+        await _refuse(websocket, e)
+        return None
+    partial_task: Optional[asyncio.Task] = None
+    last_sent = None
+
+    async def send_partial():
+        nonlocal last_sent
+        text = await transcriber.partial()
+        if text and text != last_sent:
+            last_sent = text
+            await websocket.send_json({"type": "partial", "text": text})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                if partial_task:
+                    partial_task.cancel()
+                return None
+            if message.get("bytes"):
+                try:
+                    transcriber.feed(message["bytes"])
+                except UnsupportedFormat as e:
+                    await _refuse(websocket, e)
+                    return None
+                if transcriber.partial_due() and (partial_task is None or partial_task.done()):
+                    partial_task = asyncio.create_task(send_partial())
+                if transcriber.end_of_speech:
+                    break
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    continue
+                # Only {"type": "stop"} means anything; other JSON ("stop", 1, []) is ignored
+                if isinstance(control, dict) and control.get("type") == "stop":
+                    break
+
+        if partial_task:
+            try:
+                await partial_task
+            except Exception as e:
+                print(f"Streaming partial error: {e}")
+        return (*await transcriber.final(), int(transcriber.duration_ms))
+    finally:
+        if partial_task and not partial_task.done():
+            partial_task.cancel()
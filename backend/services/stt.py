@@ -1,62 +1,137 @@
+import asyncio
+import hashlib
 import os
-import tempfile
-from typing import Tuple
+from typing import Dict, Tuple
 from fastapi import UploadFile
 from pathlib import Path
 
-try:
-    from openai import OpenAI
-    _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-except Exception:
-    _openai_client = None
+from services import metrics
+from services.cache import TTLCache, content_key
+from services.concurrency import run_blocking
+from services.metrics import FALLBACKS, Counter, provider_call, span
+from services.provider_client import get_client
+from services.resilience import BREAKERS, bounded, call_with_deadline
+from services.preprocess import preprocess_audio
+from services.uploads import read_upload
 
-async def transcribe_audio(file: UploadFile, language: str) -> Tuple[str, float, str]:
-    """Return (text, confidence, provider). Fallback to stub if provider unavailable."""
-    contents = await file.read()
+# Transcripts of uploaded clips keyed on (audio bytes, language), so client
+# retries of the same upload skip preprocessing and Whisper entirely
+_transcript_cache = TTLCache(
+    max_items=int(os.getenv("STT_CACHE_MAX_ITEMS", "10000")),
+    ttl_seconds=float(os.getenv("STT_CACHE_TTL_SECONDS", "86400")),
+)
+# Uploads being transcribed, by cache key; identical concurrent uploads await the same call
+_transcribing: Dict[str, "asyncio.Future[Tuple[str, float, str]]"] = {}
+# Results worth reusing (stub fallbacks are retried instead), and how cache hits report them
+_CACHED_PROVIDERS = {"openai-whisper": "openai-whisper-cache", "no-speech": "no-speech"}
+# Larger clips are hashed off the event loop
+HASH_INLINE_MAX_BYTES = 256 * 1024
+
+TRANSCRIPT_CACHE = Counter("natulang_transcript_cache_total", "Upload transcriptions by outcome (hit, shared in-flight, miss)")
+metrics.register(TRANSCRIPT_CACHE)
+
+def _whisper_transcribe(contents: bytes, suffix: str, language: str) -> Tuple[str, float]:
+    """Blocking Whisper call. Returns (text, confidence); raises on provider error."""
+    # The SDK uploads (filename, bytes) as is; the filename only tells Whisper the format
+    with BREAKERS["stt"].guard(), provider_call("whisper"):
+        response = bounded(get_client()).audio.transcriptions.create(
+            model="whisper-1",
+            file=(f"audio{suffix}", contents),
+            language=language if language != "en" else None,  # Let Whisper auto-detect for English
+            response_format="verbose_json"
+        )
+
+    text = response.text
+    # Whisper doesn't return confidence, but we can estimate from segments if available
+    confidence = 0.9  # Default high confidence
+    if hasattr(response, 'segments') and response.segments:
+        # Average the no_speech_prob across segments (inverse)
+        # Segments are dicts in older SDKs and objects in newer ones
+        probs = [seg.get('no_speech_prob', 0.1) if isinstance(seg, dict) else getattr(seg, 'no_speech_prob', 0.1)
+                 for seg in response.segments]
+        avg_speech_prob = sum(1 - p for p in probs) / len(probs)
+        confidence = round(avg_speech_prob, 2)
+
+    return text, confidence
+
+async def transcribe_bytes(contents: bytes, language: str, suffix: str = ".wav") -> Tuple[str, float, str]:
+    """Transcribe an in-memory audio clip. Returns (text, confidence, provider)."""
     if not contents:
         return "", 0.0, "empty"
 
-    # Real OpenAI Whisper API integration
-    if _openai_client:
-        temp_file = None
+    # Decode, downmix/resample to 16 kHz mono and trim silence before any provider call
+    with span("preprocess"):
+        prepared = await run_blocking("audio", preprocess_audio, contents, suffix)
+    if not prepared.has_speech:
+        return "", 0.0, "no-speech"
+    contents, suffix = prepared.audio, prepared.suffix
+
+    # Real OpenAI Whisper API integration (off the event loop)
+    if get_client():
         try:
-            # Save to temp file (Whisper API requires file object)
-            suffix = Path(file.filename).suffix if file.filename else ".wav"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                temp_file.write(contents)
-                temp_file.flush()
-                temp_path = temp_file.name
-            
-            # Call Whisper API
-            with open(temp_path, "rb") as audio_file:
-                response = _openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language=language if language != "en" else None,  # Let Whisper auto-detect for English
-                    response_format="verbose_json"
-                )
-            
-            text = response.text
-            # Whisper doesn't return confidence, but we can estimate from segments if available
-            confidence = 0.9  # Default high confidence
-            if hasattr(response, 'segments') and response.segments:
-                # Average the no_speech_prob across segments (inverse)
-                avg_speech_prob = sum(1 - seg.get('no_speech_prob', 0.1) for seg in response.segments) / len(response.segments)
-                confidence = round(avg_speech_prob, 2)
-            
+            text, confidence = await call_with_deadline("stt", _whisper_transcribe, contents, suffix, language)
             return text, confidence, "openai-whisper"
-            
         except Exception as e:
             print(f"Whisper API error: {e}")
             # Fall through to stub
-        finally:
-            # Clean up temp file
-            if temp_file and os.path.exists(temp_path):
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
 
     # Stub fallback
-    length = len(contents)
-    return "(stub transcript)" if length else "", 0.0, "stub"
+    FALLBACKS.inc(kind="stt_stub")
+    return "(stub transcript)", 0.0, "stub"
+
+def _digest(contents: bytes) -> str:
+    return hashlib.sha256(contents).hexdigest()
+
+async def transcript_key(contents: bytes, language: str, suffix: str) -> str:
+    digest = _digest(contents) if len(contents) <= HASH_INLINE_MAX_BYTES else await run_blocking("audio", _digest, contents)
+    return content_key("stt", language, suffix.lower(), digest)
+
+async def transcribe_upload_bytes(contents: bytes, language: str, suffix: str = ".wav") -> Tuple[str, float, str]:
+    """
+    transcribe_bytes for uploaded clips, through the transcript cache:
+    byte-identical audio in the same language is transcribed (and billed)
+    once; concurrent duplicates share the in-flight call.
+    """
+    if not contents:
+        return "", 0.0, "empty"
+    key = await transcript_key(contents, language, suffix)
+    cached = _transcript_cache.get(key)
+    if cached is not None:
+        TRANSCRIPT_CACHE.inc(result="hit")
+        text, confidence, provider = cached
+        return text, confidence, _CACHED_PROVIDERS.get(provider, provider)
+
+    future = _transcribing.get(key)
+    if future is None:
+        TRANSCRIPT_CACHE.inc(result="miss")
+
+        async def run() -> Tuple[str, float, str]:
+            result = await transcribe_bytes(contents, language, suffix)
+            if result[2] in _CACHED_PROVIDERS:
+                _transcript_cache.put(key, list(result))
+            return result
+
+        def done(f: asyncio.Future) -> None:
+            _transcribing.pop(key, None)
+            if not f.cancelled():
+                f.exception()  # every waiter may have gone away; don't log it as unretrieved
+
+        future = _transcribing[key] = asyncio.ensure_future(run())
+        future.add_done_callback(done)
+    else:
+        TRANSCRIPT_CACHE.inc(result="shared")
+    # Shielded: a client dropping its request doesn't cancel the call for the others
+    return await asyncio.shield(future)
+
+def get_cache_stats() -> Dict:
+    return {**_transcript_cache.stats(), "inFlight": len(_transcribing)}
+
+async def transcribe_audio(file: UploadFile, language: str) -> Tuple[str, float, str]:
+    """
+    Return (text, confidence, provider). Fallback to stub if provider unavailable.
+    Raises UploadTooLarge for files over UPLOAD_MAX_BYTES.
+    """
+    with span("upload_read"):
+        contents = await read_upload(file)
+    suffix = Path(file.filename).suffix if file.filename else ".wav"
+    return await transcribe_upload_bytes(contents, language, suffix or ".wav")
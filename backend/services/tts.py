@@ -1,12 +1,20 @@
 import os
-from typing import Tuple
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 import base64
 
-try:
-    from openai import OpenAI
-    _tts_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-except Exception:
-    _tts_client = None
+from services.cache import LRUCache, DiskCache, content_key
+from services.concurrency import run_blocking
+from services.metrics import FALLBACKS, provider_call
+from services.provider_client import get_client
+from services.resilience import BREAKERS, bounded, call_with_deadline
+
+TTS_MODEL = "tts-1"  # or "tts-1-hd" for higher quality
+TTS_FORMAT = "mp3"
+# Formats the streaming endpoint can serve -> Content-Type (OpenAI opus is Ogg-wrapped)
+STREAM_FORMATS = {"mp3": "audio/mpeg", "opus": "audio/ogg"}
+STREAM_CHUNK_BYTES = 16 * 1024
 
 # Voice mapping for different languages
 VOICE_MAP = {
@@ -17,42 +25,217 @@ VOICE_MAP = {
     "default": "alloy"
 }
 
+# Two-tier audio cache: hot phrases in memory, everything else on disk (survives restarts)
+CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", Path(__file__).parent.parent / "cache" / "tts"))
+_memory_cache = LRUCache(
+    max_items=int(os.getenv("TTS_CACHE_MAX_ITEMS", "512")),
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_MEMORY_MB", "64")) * 1024 * 1024,
+)
+# One disk tier for every audio format: TTS_CACHE_MAX_DISK_MB caps the whole directory
+_disk_cache = DiskCache(
+    CACHE_DIR,
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_DISK_MB", "512")) * 1024 * 1024,
+    suffix=f".{TTS_FORMAT}",
+    suffixes=tuple(f".{fmt}" for fmt in STREAM_FORMATS),
+)
+
+def _resolve_voice(voice: str | None, language: str | None) -> Tuple[str, str]:
+    """Return (voice, language code) actually sent to the provider"""
+    lang_code = (language or "en")[:2].lower()
+    return voice or VOICE_MAP.get(lang_code, VOICE_MAP["default"]), lang_code
+
+def cache_key(text: str, voice: str | None, language: str | None,
+              model: str = TTS_MODEL, fmt: str = TTS_FORMAT) -> str:
+    """Content-addressed key for a synthesized clip"""
+    selected_voice, lang_code = _resolve_voice(voice, language)
+    return content_key(text, selected_voice, lang_code, model, fmt)
+
+# Read-only stores looked up after both cache tiers, (key, fmt) -> bytes or None
+# (e.g. pre-synthesized lesson audio, which is kept out of the disk tier)
+_audio_sources: List[Callable[[str, str], Optional[bytes]]] = []
+
+def add_audio_source(lookup: Callable[[str, str], Optional[bytes]]) -> None:
+    if lookup not in _audio_sources:
+        _audio_sources.append(lookup)
+
+def get_cached_audio(key: str, fmt: str = TTS_FORMAT) -> Optional[bytes]:
+    """Look up audio bytes by cache key: memory, disk, then audio sources (promoted to memory on hit)"""
+    audio = _memory_cache.get(key)
+    if audio is not None:
+        return audio
+    audio = _disk_cache.get(key, f".{fmt}")
+    for lookup in _audio_sources:
+        if audio is not None:
+            break
+        audio = lookup(key, fmt)
+    if audio is not None:
+        _memory_cache.put(key, audio)
+    return audio
+
+def store_cached_audio(key: str, audio: bytes, fmt: str = TTS_FORMAT) -> None:
+    _memory_cache.put(key, audio)
+    _disk_cache.put(key, audio, f".{fmt}")
+
+def get_cache_stats() -> Dict:
+    return {
+        "memory": _memory_cache.stats(),
+        "disk": _disk_cache.stats(),
+    }
+
+def stream_available() -> bool:
+    return get_client() is not None and not BREAKERS["tts"].is_open()
+
+def _estimate_duration_ms(text: str) -> int:
+    # Estimate duration (rough: ~150 words per minute for TTS)
+    words = len(text.split())
+    return int((words / 150) * 60 * 1000)
+
+def synthesize_bytes(text: str, voice: str | None, language: str | None, cache: bool = True) -> Tuple[bytes, str]:
+    """
+    Raw audio for `text` from the cache or the provider (result is cached
+    unless `cache` is False, for callers that keep the audio themselves).
+    Returns (audio_bytes, provider); raises if the provider call fails.
+    """
+    key = cache_key(text, voice, language)
+    audio_bytes = get_cached_audio(key)
+    if audio_bytes is not None:
+        return audio_bytes, "openai-cache"
+    
+    # Select appropriate voice for language
+    selected_voice, _ = _resolve_voice(voice, language)
+    
+    # Call OpenAI TTS API
+    with BREAKERS["tts"].guard(), provider_call("tts"):
+        response = bounded(get_client()).audio.speech.create(
+            model=TTS_MODEL,
+            voice=selected_voice,
+            input=text,
+            response_format=TTS_FORMAT
+        )
+        
+        # Get audio bytes
+        audio_bytes = response.content
+    if cache:
+        store_cached_audio(key, audio_bytes)
+    return audio_bytes, "openai"
+
 def synthesize(text: str, voice: str | None, language: str | None, provider: str | None) -> Tuple[str, str, int, str]:
     """
     Generate speech audio from text.
     Returns: (base64_audio, format, duration_ms, provider)
     """
-    chosen_provider = provider or ("openai-tts" if _tts_client else "stub")
+    client = get_client()
+    chosen_provider = provider or ("openai-tts" if client else "stub")
     
-    if _tts_client and chosen_provider.startswith("openai"):
+    if client and chosen_provider.startswith("openai"):
         try:
-            # Select appropriate voice for language
-            lang_code = (language or "en")[:2].lower()
-            selected_voice = voice or VOICE_MAP.get(lang_code, VOICE_MAP["default"])
-            
-            # Call OpenAI TTS API
-            response = _tts_client.audio.speech.create(
-                model="tts-1",  # or "tts-1-hd" for higher quality
-                voice=selected_voice,
-                input=text,
-                response_format="mp3"
-            )
-            
-            # Get audio bytes
-            audio_bytes = response.content
+            audio_bytes, used_provider = synthesize_bytes(text, voice, language)
             
             # Encode to base64
             b64 = base64.b64encode(audio_bytes).decode('utf-8')
             
-            # Estimate duration (rough: ~150 words per minute for TTS)
-            words = len(text.split())
-            duration_ms = int((words / 150) * 60 * 1000)
-            
-            return b64, "mp3", duration_ms, "openai"
+            return b64, TTS_FORMAT, _estimate_duration_ms(text), used_provider
             
         except Exception as e:
             print(f"TTS error: {e}")
             # Fall through to stub
 
     # Fallback stub (empty audio)
+    FALLBACKS.inc(kind="tts_stub")
     return "", "mp3", 0, "stub"
+
+async def synthesize_async(text: str, voice: str | None, language: str | None, provider: str | None) -> Tuple[str, str, int, str]:
+    """Async entry point: cache lookups (which may read the disk tier) and provider calls run on the "tts" pool"""
+    client = get_client()
+    chosen_provider = provider or ("openai-tts" if client else "stub")
+    if not (client and chosen_provider.startswith("openai")):
+        return synthesize(text, voice, language, provider)
+    audio_bytes = await run_blocking("tts", get_cached_audio, cache_key(text, voice, language))
+    if audio_bytes is not None:
+        b64 = base64.b64encode(audio_bytes).decode('utf-8')
+        return b64, TTS_FORMAT, _estimate_duration_ms(text), "openai-cache"
+    try:
+        # Deadline-bound, fails fast while the breaker is open, hedged (synthesis is idempotent)
+        audio_bytes, used_provider = await call_with_deadline("tts", synthesize_bytes, text, voice, language, hedge=True)
+    except Exception as e:
+        print(f"TTS error: {e}")
+        FALLBACKS.inc(kind="tts_stub")
+        return "", "mp3", 0, "stub"
+    b64 = base64.b64encode(audio_bytes).decode('utf-8')
+    return b64, TTS_FORMAT, _estimate_duration_ms(text), used_provider
+
+class _SpeechStream:
+    """A provider speech stream being opened on a "tts" worker thread"""
+
+    def __init__(self):
+        self.context = None
+        self.iterator = None
+        self.opened = False
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        self.context.__exit__(None, None, None)
+
+    def abandon(self) -> None:
+        """The caller gave up (deadline, error): close the stream now or once it opens"""
+        with self.lock:
+            self.abandoned = True
+            opened = self.opened
+        if opened:
+            self.close()
+
+def _open_stream(stream: _SpeechStream, text: str, voice: str, fmt: str) -> Optional[bytes]:
+    """Blocking: open the provider stream and read its first chunk (None if empty)"""
+    with BREAKERS["tts"].guard(), provider_call("tts_stream"):
+        stream.context = bounded(get_client()).audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
+            voice=voice,
+            input=text,
+            response_format=fmt
+        )
+        response = stream.context.__enter__()
+        try:
+            stream.iterator = response.iter_bytes(STREAM_CHUNK_BYTES)
+            first = next(stream.iterator, None)
+        except BaseException:
+            stream.close()
+            raise
+    with stream.lock:
+        stream.opened = not stream.abandoned
+    if not stream.opened:
+        stream.close()  # the deadline passed while this thread was still waiting
+    return first
+
+async def stream_speech(text: str, voice: str | None, language: str | None, fmt: str = TTS_FORMAT) -> AsyncIterator[bytes]:
+    """
+    Open a provider speech stream and return its audio chunks. Opening it and
+    the first chunk run under the "tts" deadline, breaker and metrics, so
+    failures raise here, before the caller has started a response; later
+    chunks arrive at the client's pace (each read on the "tts" pool). The
+    full clip is added to the cache once the stream completes.
+    Callers should serve cache hits directly instead of calling this.
+    """
+    selected_voice, _ = _resolve_voice(voice, language)
+    stream = _SpeechStream()
+    try:
+        first = await call_with_deadline("tts", _open_stream, stream, text, selected_voice, fmt)
+    except BaseException:
+        stream.abandon()
+        raise
+    return _stream_rest(stream, first, cache_key(text, voice, language, fmt=fmt), fmt)
+
+async def _stream_rest(stream: _SpeechStream, first: Optional[bytes], key: str, fmt: str) -> AsyncIterator[bytes]:
+    chunks = []
+    complete = False
+    try:
+        chunk = first
+        while chunk is not None:
+            chunks.append(chunk)
+            yield chunk
+            chunk = await run_blocking("tts", next, stream.iterator, None)
+        complete = True
+    finally:
+        await run_blocking("tts", stream.close)
+        if complete:
+            store_cached_audio(key, b"".join(chunks), fmt)
@@ -0,0 +1,116 @@
+import json
+import os
+from typing import Optional
+
+# Largest single audio upload accepted (Whisper's own limit is 25 MB)
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Largest multipart request body (several files on /api/practice/batch)
+MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(64 * 1024 * 1024)))
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """An upload exceeded its size limit (HTTP 413)"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+async def read_upload(file, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Contents of an UploadFile, refusing more than `max_bytes`. The size the
+    multipart parser recorded is checked first, so oversized files are
+    rejected without being read; otherwise the file is read in chunks and
+    abandoned as soon as it passes the limit.
+    """
+    size: Optional[int] = getattr(file, "size", None)
+    if size is not None:
+        if size > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        await file.seek(0)
+        return await file.read()
+    await file.seek(0)
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware capping multipart request bodies at `max_bytes`: a
+    declared Content-Length over the limit gets 413 before any of the body is
+    received; a body that grows past it while streaming (chunked uploads) is
+    cut off and answered with 413 instead of being spooled to the end.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            await self.app(scope, receive, send)
+            return
+        try:
+            declared = int(headers.get(b"content-length", b"-1"))
+        except ValueError:
+            declared = -1
+        if declared > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Looks like a client disconnect to the form parser, which stops reading
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            if exceeded and not started:
+                return  # the app's reaction to the cut-off body (a 400 parse error) becomes our 413
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except Exception:
+            if not (exceeded and not started):
+                raise
+        if exceeded and not started:
+            await self._reject(send)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": f"Request body exceeds {self.max_bytes} bytes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
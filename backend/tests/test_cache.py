@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from services.cache import DiskCache, LRUCache
+
+
+def _age(cache: DiskCache, key: str, suffix: str, mtime: float) -> None:
+    os.utime(cache.path_for(key, suffix), (mtime, mtime))
+
+
+def test_disk_cache_cap_covers_every_suffix(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=25, suffix=".mp3", suffixes=(".mp3", ".opus"))
+    cache.put("aa1", b"x" * 10)
+    cache.put("aa2", b"y" * 10, ".opus")
+    _age(cache, "aa1", ".mp3", 1_000)
+    _age(cache, "aa2", ".opus", 2_000)
+
+    cache.put("aa3", b"z" * 10, ".opus")
+
+    # One cap for both formats: the oldest file goes, whatever its format
+    assert cache.get("aa1") is None
+    assert cache.get("aa2", ".opus") == b"y" * 10
+    assert cache.get("aa3", ".opus") == b"z" * 10
+    assert cache.stats()["bytes"] == 20
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_cache_read_refreshes_recency(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=25, suffix=".mp3")
+    cache.put("aa1", b"x" * 10)
+    cache.put("aa2", b"y" * 10)
+    _age(cache, "aa1", ".mp3", 1_000)
+    _age(cache, "aa2", ".mp3", 2_000)
+
+    assert cache.get("aa1") == b"x" * 10  # now the most recently used
+    cache.put("aa3", b"z" * 10)
+
+    assert cache.get("aa2") is None
+    assert cache.get("aa1") is not None
+
+
+def test_disk_cache_formats_are_separate_entries(tmp_path):
+    cache = DiskCache(tmp_path, suffix=".mp3", suffixes=(".mp3", ".opus"))
+    cache.put("aa1", b"mp3")
+    assert cache.get("aa1", ".opus") is None
+    with pytest.raises(ValueError):
+        cache.get("aa1", ".wav")
+
+
+def test_disk_cache_counts_existing_files_on_open(tmp_path):
+    DiskCache(tmp_path, suffix=".mp3", suffixes=(".mp3", ".opus")).put("aa1", b"x" * 10, ".opus")
+    reopened = DiskCache(tmp_path, suffix=".mp3", suffixes=(".mp3", ".opus"))
+    assert reopened.stats()["bytes"] == 10
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_items=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.stats()["evictions"] == 1
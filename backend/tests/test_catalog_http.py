@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+os.environ.setdefault("STORE_BACKEND", "memory")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("x-gzip", True),
+    ("GZIP;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.000", False),
+    ("deflate, br", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("br, *;q=0.1", True),
+    ("gzip;q=oops", False),
+    ("", False),
+])
+def test_accepts_gzip(header, expected):
+    assert main._accepts_gzip(header) is expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('"abc"', True),
+    ('"x", "abc"', True),
+    ('W/"abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ("", False),
+])
+def test_etag_matches(header, expected):
+    assert main._etag_matches(header, '"abc"') is expected
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+def test_gzip_and_identity_bodies_have_their_own_etags(client):
+    plain = client.get("/api/courses", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/api/courses", headers={"Accept-Encoding": "gzip"})
+    assert plain.status_code == gzipped.status_code == 200
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != gzipped.headers["etag"]
+    assert gzipped.json() == plain.json()
+    assert "Accept-Encoding" in plain.headers["vary"]
+
+
+def test_matching_etag_is_not_modified(client):
+    for encoding in ("identity", "gzip"):
+        first = client.get("/api/courses", headers={"Accept-Encoding": encoding})
+        again = client.get("/api/courses", headers={"Accept-Encoding": encoding,
+                                                    "If-None-Match": first.headers["etag"]})
+        assert again.status_code == 304
+        assert again.headers["etag"] == first.headers["etag"]
+        assert again.content == b""
+
+
+def test_etag_of_other_encoding_gets_full_body(client):
+    plain = client.get("/api/courses", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/api/courses", headers={"Accept-Encoding": "gzip",
+                                                  "If-None-Match": plain.headers["etag"]})
+    assert gzipped.status_code == 200
+    assert gzipped.headers["content-encoding"] == "gzip"
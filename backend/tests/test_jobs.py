@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from services import jobs  # noqa: E402
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return jobs.JobQueue(tmp_path / "jobs.db")
+
+
+@pytest.fixture
+def flaky(monkeypatch):
+    """A "flaky" job kind whose handler raises the queued errors in turn, then succeeds"""
+    errors = []
+
+    async def handler(params, audio):
+        if errors:
+            raise errors.pop(0)
+        return {"ok": True}
+
+    monkeypatch.setitem(jobs.HANDLERS, "flaky", ("eval", handler, (), False))
+    monkeypatch.setattr(jobs, "JOB_RETRY_BASE_SECONDS", 5.0)
+    monkeypatch.setattr(jobs, "JOB_RETRY_MAX_SECONDS", 8.0)
+    return errors
+
+
+def _row(queue, job_id):
+    return queue._conn().execute(
+        "SELECT status, attempts, run_after, worker, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def _run(queue, job):
+    async def run():
+        await jobs.JobRunner(queue, workers=0)._run(job)
+    asyncio.run(run())
+
+
+def _make_runnable(queue, job_id):
+    queue._conn().execute("UPDATE jobs SET run_after = 0 WHERE id = ?", (job_id,))
+
+
+def test_claim_is_exclusive_until_the_lease_runs_out(queue):
+    job = queue.submit("tts", {"text": "bonjour"})
+    claimed = queue.claim(["tts"], "worker-a", lease_seconds=60)
+    assert claimed["id"] == job["id"] and claimed["attempts"] == 1
+    assert queue.claim(["tts"], "worker-b") is None
+
+    # worker-a dies: once its lease has expired the job goes to worker-b
+    queue._conn().execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job["id"]))
+    reclaimed = queue.claim(["tts"], "worker-b")
+    assert reclaimed["id"] == job["id"] and reclaimed["attempts"] == 2
+    # The late result of the lost lease is ignored
+    assert not queue.finish(job["id"], "worker-a", {"late": True})
+    assert queue.finish(job["id"], "worker-b", {"ok": True})
+    assert queue.get(job["id"])["result"] == {"ok": True}
+
+
+def test_claim_only_takes_open_kinds(queue):
+    queue.submit("tts", {"text": "bonjour"})
+    assert queue.claim(["eval"], "worker-a") is None
+    assert queue.claim([], "worker-a") is None
+    assert queue.claim(["eval", "tts"], "worker-a")["kind"] == "tts"
+
+
+def test_failed_attempts_back_off_then_fail_for_good(queue, flaky):
+    flaky += [RuntimeError("provider down")] * 3
+    job_id = queue.submit("flaky", {}, max_attempts=3)["id"]
+
+    delays = []
+    for attempt in (1, 2):
+        before = time.time()
+        _run(queue, queue.claim(["flaky"], jobs.WORKER_ID))
+        status, attempts, run_after, _, error = _row(queue, job_id)
+        assert (status, attempts) == ("queued", attempt)
+        assert error == "RuntimeError: provider down"
+        delays.append(run_after - before)
+        assert queue.claim(["flaky"], jobs.WORKER_ID) is None  # not before its backoff
+        _make_runnable(queue, job_id)
+    # base * 2^(attempt - 1), capped at JOB_RETRY_MAX_SECONDS
+    assert delays[0] == pytest.approx(5.0, abs=1.0)
+    assert delays[1] == pytest.approx(8.0, abs=1.0)
+
+    _run(queue, queue.claim(["flaky"], jobs.WORKER_ID))
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("failed", 3)
+    assert job["error"] == "RuntimeError: provider down"
+    assert queue.claim(["flaky"], jobs.WORKER_ID) is None
+
+
+def test_retry_then_success(queue, flaky):
+    flaky.append(RuntimeError("blip"))
+    job_id = queue.submit("flaky", {})["id"]
+    _run(queue, queue.claim(["flaky"], jobs.WORKER_ID))
+    _make_runnable(queue, job_id)
+    _run(queue, queue.claim(["flaky"], jobs.WORKER_ID))
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"], job["result"]) == ("succeeded", 2, {"ok": True})
+
+
+def test_bad_input_is_not_retried(queue, flaky):
+    flaky.append(ValueError("unknown course"))
+    job_id = queue.submit("flaky", {}, max_attempts=3)["id"]
+    _run(queue, queue.claim(["flaky"], jobs.WORKER_ID))
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("failed", 1)
+
+
+def test_lease_lost_on_the_final_attempt_fails_the_job(queue, flaky):
+    job_id = queue.submit("flaky", {}, max_attempts=1)["id"]
+    queue.claim(["flaky"], "dead-worker", lease_seconds=-1)
+    # The handler would succeed, but the job has used up its attempts
+    _run(queue, queue.claim(["flaky"], jobs.WORKER_ID))
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert "final attempt" in job["error"]
+
+
+def test_release_requeues_without_counting_the_attempt(queue):
+    job_id = queue.submit("tts", {"text": "bonjour"})["id"]
+    queue.claim(["tts"], "worker-a")
+    queue.release([job_id], "worker-a")
+    assert _row(queue, job_id)[:2] == ("queued", 0)
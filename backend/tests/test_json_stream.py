@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from services.json_stream import IncrementalJSONParser
+
+OBJECT = {
+    "reply": "Très bien ! \"Ça va\" — on continue 😀\nnext line \\ done",
+    "corrections": [{"original": "je suis allé", "corrected": "je suis allée", "note": "accord"}],
+    "suggestions": ["Répète {avec} [crochets]"],
+    "nextPrompt": "Et toi ?",
+    "score": 3.5,
+    "ok": True,
+}
+
+
+def _feed_in_chunks(text: str, size: int):
+    parser = IncrementalJSONParser(stream_keys=("reply",))
+    events = []
+    for start in range(0, len(text), size):
+        events += parser.feed(text[start:start + size])
+    return parser, events
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False], ids=["escaped", "raw"])
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_chunked_object_matches_json_loads(size, ensure_ascii):
+    # ensure_ascii writes "😀" as the escaped pair \ud83d\ude00 (split at every offset with size 1)
+    text = json.dumps(OBJECT, ensure_ascii=ensure_ascii)
+    parser, events = _feed_in_chunks(text, size)
+
+    assert parser.done
+    assert parser.fields == OBJECT
+    deltas = "".join(value for kind, key, value in events if kind == "delta")
+    assert deltas == OBJECT["reply"]
+    fields = [key for kind, key, _ in events if kind == "field"]
+    assert fields == list(OBJECT)
+
+
+def test_deltas_never_split_a_surrogate_pair():
+    parser = IncrementalJSONParser(stream_keys=("reply",))
+    first = parser.feed('{"reply": "a\\ud83d')
+    assert [value for kind, _, value in first if kind == "delta"] == ["a"]
+    second = parser.feed('\\ude00b"}')
+    assert [value for kind, _, value in second if kind == "delta"] == ["😀b"]
+    assert parser.fields == {"reply": "a😀b"}
+
+
+def test_escape_split_across_chunks():
+    parser = IncrementalJSONParser(stream_keys=("reply",))
+    events = parser.feed('{"reply": "say \\')
+    events += parser.feed('"hi\\')
+    events += parser.feed('u00e9\\n"}')
+    assert "".join(value for kind, _, value in events if kind == "delta") == 'say "hié\n'
+    assert parser.done
+
+
+def test_text_around_the_object_is_ignored():
+    parser = IncrementalJSONParser()
+    events = parser.feed('```json\n{"nextPrompt": "Salut"}\n```')
+    assert events == [("field", "nextPrompt", "Salut")]
+    assert parser.done
+
+
+def test_fields_are_reported_as_soon_as_they_close():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"suggestions": ["a", "b"]') == [("field", "suggestions", ["a", "b"])]
+    assert parser.feed(', "n": 1') == []
+    assert parser.feed("}") == [("field", "n", 1)]
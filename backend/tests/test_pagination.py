@@ -0,0 +1,134 @@
+import base64
+import json
+import os
+
+import pytest
+
+from services import course_service
+
+
+def _catalog(course_ids, lessons_per_course=5):
+    return {
+        "courses": [{"id": cid, "targetLanguage": "French" if i % 2 else "Spanish", "difficulty": "beginner"}
+                    for i, cid in enumerate(course_ids)],
+        "lessons": [{"id": f"{cid}-l{j}", "courseId": cid, "order": j, "exercises": []}
+                    for cid in course_ids for j in range(lessons_per_course)],
+    }
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    path = tmp_path / "courses.json"
+
+    def write(data):
+        path.write_text(json.dumps(data), encoding="utf-8")
+        # A distinct mtime even on filesystems with coarse timestamps
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def reload():
+        course_service._maybe_reload()
+
+    write(_catalog([f"c{i}" for i in range(6)]))
+    monkeypatch.setattr(course_service, "DATA_PATH", path)
+    monkeypatch.setattr(course_service, "CATALOG_MODE", "full")
+    monkeypatch.setattr(course_service, "RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(course_service, "_catalog", None)
+    course_service._get_catalog()
+    return write, reload
+
+
+def _ids(page):
+    return [item["id"] for item in page.items]
+
+
+def _forge(scope, position, item_id):
+    raw = json.dumps([scope, position, item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _walk(fetch, limit):
+    ids, cursor = [], None
+    while True:
+        page = fetch(limit, cursor)
+        ids += _ids(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids
+
+
+def test_pages_cover_the_filtered_list_once(catalog):
+    french = _walk(lambda limit, cursor: course_service.find_courses({"targetLanguage": "french"}, limit, cursor), 2)
+    assert french == ["c1", "c3", "c5"]
+    lessons = _walk(lambda limit, cursor: course_service.page_lessons("c2", limit, cursor), 2)
+    assert lessons == [f"c2-l{j}" for j in range(5)]
+
+
+def test_filters_are_normalized_in_the_cursor_scope(catalog):
+    page = course_service.find_courses({"targetLanguage": "French"}, 1)
+    assert _ids(course_service.find_courses({"targetLanguage": " FRENCH "}, 1, page.next_cursor)) == ["c3"]
+
+
+def test_cursor_from_another_listing_is_rejected(catalog):
+    courses_cursor = course_service.find_courses({"targetLanguage": "french"}, 1).next_cursor
+    lessons_cursor = course_service.page_lessons("c0", 2).next_cursor
+    with pytest.raises(ValueError):
+        course_service.find_courses({}, 1, courses_cursor)
+    with pytest.raises(ValueError):
+        course_service.find_courses({"targetLanguage": "spanish"}, 1, courses_cursor)
+    with pytest.raises(ValueError):
+        course_service.page_lessons("c1", 2, lessons_cursor)
+    with pytest.raises(ValueError):
+        course_service.find_courses({}, 1, lessons_cursor)
+
+
+def test_lesson_cursor_only_resolves_lessons_of_its_course(catalog):
+    # A forged cursor naming another course's lesson is treated as a lesson gone from c1
+    cursor = _forge("lessons:c1", 2, "c4-l3")
+    assert _ids(course_service.page_lessons("c1", 2, cursor)) == ["c1-l2", "c1-l3"]
+
+
+@pytest.mark.parametrize("cursor", [
+    _forge("lessons:c0", -3, "gone"),
+    _forge("lessons:c0", "x", "gone"),
+    _forge("lessons:c0", 1, "gone")[:-2],
+    "not base64 at all!",
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+])
+def test_malformed_or_negative_cursors_are_rejected(catalog, cursor):
+    with pytest.raises(ValueError):
+        course_service.page_lessons("c0", 2, cursor)
+
+
+def test_resume_after_reload_neither_skips_nor_repeats(catalog):
+    write, reload = catalog
+    first = course_service.find_courses({}, 3)
+    assert _ids(first) == ["c0", "c1", "c2"]
+
+    # Courses inserted before the cursor, and one removed after it
+    write(_catalog(["new-a", "c0", "new-b", "c1", "c2", "c3", "c5"]))
+    reload()
+    assert _ids(course_service.find_courses({}, 10, first.next_cursor)) == ["c3", "c5"]
+
+
+def test_filtered_resume_when_the_last_course_is_gone(catalog):
+    write, reload = catalog
+    first = course_service.find_courses({"targetLanguage": "french"}, 1)
+    assert _ids(first) == ["c1"]
+
+    write(_catalog(["c0", "c2", "c3", "c4", "c5"]))  # c1 removed: French is now c2, c4
+    reload()
+    assert _ids(course_service.find_courses({"targetLanguage": "french"}, 10, first.next_cursor)) == ["c2", "c4"]
+
+
+def test_resume_after_reload_when_the_last_item_is_gone(catalog):
+    write, reload = catalog
+    first = course_service.page_lessons("c0", 2)
+    assert _ids(first) == ["c0-l0", "c0-l1"]
+
+    data = _catalog([f"c{i}" for i in range(6)])
+    data["lessons"] = [l for l in data["lessons"] if l["id"] != "c0-l1"]
+    write(data)
+    reload()
+    # The following lessons moved up into the recorded position
+    assert _ids(course_service.page_lessons("c0", 10, first.next_cursor)) == ["c0-l2", "c0-l3", "c0-l4"]
@@ -0,0 +1,29 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from services.scoring import score_locally
+
+GOLDEN = json.loads((Path(__file__).resolve().parent.parent / "data" / "scoring_golden.json").read_text(encoding="utf-8"))
+PASS = 70.0  # the /api/practice "correct" threshold
+# Pass/fail verdicts that must match the GPT evaluator's (currently 24 of 25)
+MIN_AGREEMENT = 24
+
+
+def test_golden_set_agreement():
+    misses = []
+    for case in GOLDEN:
+        overall = score_locally(case["expected"], case["transcribed"])["overall"]
+        if (overall >= PASS) != case["pass"]:
+            misses.append((case["expected"], case["transcribed"], overall))
+    assert len(GOLDEN) - len(misses) >= MIN_AGREEMENT, misses
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=lambda c: f"{c['expected']}/{c['transcribed']}")
+def test_result_format(case):
+    result = score_locally(case["expected"], case["transcribed"])
+    for field in ("accuracy", "fluency", "completeness", "overall"):
+        assert 0.0 <= result[field] <= 100.0, field
+    assert isinstance(result["feedback"], str) and result["feedback"]
+    assert isinstance(result["wordErrors"], list)
@@ -0,0 +1,88 @@
+import multiprocessing
+
+from services.sessions import HISTORY_TURNS, append_turn, new_session
+from services.store import SQLiteStore
+
+KEY = "hammer-user"
+DEFAULT = {"userId": KEY, "courseId": "", "completedLessons": [], "averageScore": 0.0, "totalPracticeTime": 0}
+WORKERS = 4
+UPDATES = 500
+
+
+def _increment(progress):
+    progress["totalPracticeTime"] += 1
+
+
+def _hammer(db_path: str, worker_id: int, updates: int) -> None:
+    store = SQLiteStore(db_path, flush_interval_ms=5)
+    lesson = f"lesson-{worker_id}"
+
+    def complete(progress):
+        if lesson not in progress["completedLessons"]:
+            progress["completedLessons"].append(lesson)
+
+    for _ in range(updates):
+        store.update_progress(KEY, DEFAULT, _increment)
+    store.update_progress(KEY, DEFAULT, complete)
+    store.close()
+
+
+def _chat(db_path: str, worker_id: int, turns: int) -> None:
+    store = SQLiteStore(db_path)
+    for turn in range(turns):
+        store.update_session("hammer-session", new_session(),
+                             lambda data: append_turn(data, f"w{worker_id} t{turn}", "ok"))
+    store.close()
+
+
+def test_concurrent_processes_lose_no_progress_updates(tmp_path):
+    db_path = str(tmp_path / "store.db")
+    SQLiteStore(db_path).close()  # schema and WAL exist before the workers race
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_hammer, args=(db_path, i, UPDATES)) for i in range(WORKERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=120)
+    assert [p.exitcode for p in procs] == [0] * WORKERS
+
+    store = SQLiteStore(db_path)
+    final = store.get_progress(KEY)
+    store.close()
+    assert final["totalPracticeTime"] == WORKERS * UPDATES
+    assert sorted(final["completedLessons"]) == [f"lesson-{i}" for i in range(WORKERS)]
+
+
+def test_reads_see_own_queued_updates_before_flush(tmp_path):
+    store = SQLiteStore(tmp_path / "store.db", flush_interval_ms=60_000)
+    try:
+        assert store.get_progress(KEY) is None
+        for _ in range(3):
+            view = store.update_progress(KEY, DEFAULT, _increment)
+        assert view["totalPracticeTime"] == 3
+        assert store.get_progress(KEY)["totalPracticeTime"] == 3
+        assert store.stats()["pendingUpdates"] == 3
+        store.flush()
+        assert store.stats()["pendingUpdates"] == 0
+        assert store.get_progress(KEY)["totalPracticeTime"] == 3
+    finally:
+        store.close()
+
+
+def test_concurrent_session_turns_are_all_kept(tmp_path):
+    db_path = str(tmp_path / "store.db")
+    SQLiteStore(db_path).close()
+    turns = 50
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_chat, args=(db_path, i, turns)) for i in range(WORKERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=120)
+    assert [p.exitcode for p in procs] == [0] * WORKERS
+
+    store = SQLiteStore(db_path)
+    session = store.get_session("hammer-session")
+    store.close()
+    assert session["turns"] == WORKERS * turns
+    assert len(session["history"]) == HISTORY_TURNS
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from services import stt  # noqa: E402
+from services.cache import TTLCache  # noqa: E402
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """transcribe_bytes stand-in: counts calls and answers once `release` is set"""
+    state = {"calls": 0, "provider": "openai-whisper", "release": None}
+
+    async def transcribe_bytes(contents, language, suffix=".wav"):
+        state["calls"] += 1
+        await state["release"].wait()
+        return "bonjour", 0.9, state["provider"]
+
+    monkeypatch.setattr(stt, "transcribe_bytes", transcribe_bytes)
+    monkeypatch.setattr(stt, "_transcript_cache", TTLCache())
+    monkeypatch.setattr(stt, "_transcribing", {})
+    return state
+
+
+def test_concurrent_identical_uploads_share_one_call(provider):
+    async def run():
+        provider["release"] = asyncio.Event()
+        waiting = [asyncio.ensure_future(stt.transcribe_upload_bytes(b"clip", "fr")) for _ in range(5)]
+        await asyncio.sleep(0)
+        provider["release"].set()
+        first = await asyncio.gather(*waiting)
+        again = await stt.transcribe_upload_bytes(b"clip", "fr")
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert provider["calls"] == 1
+    assert first == [("bonjour", 0.9, "openai-whisper")] * 5
+    assert again == ("bonjour", 0.9, "openai-whisper-cache")
+    assert stt._transcribing == {}
+
+
+def test_cache_key_covers_language_and_bytes(provider):
+    async def run():
+        provider["release"] = asyncio.Event()
+        provider["release"].set()
+        for contents, language in [(b"clip", "fr"), (b"clip", "es"), (b"clip2", "fr"), (b"clip", "fr")]:
+            await stt.transcribe_upload_bytes(contents, language)
+
+    asyncio.run(run())
+    assert provider["calls"] == 3
+
+
+def test_stub_fallbacks_are_not_cached(provider):
+    provider["provider"] = "stub"
+
+    async def run():
+        provider["release"] = asyncio.Event()
+        provider["release"].set()
+        return [await stt.transcribe_upload_bytes(b"clip", "fr") for _ in range(2)]
+
+    results = asyncio.run(run())
+    assert provider["calls"] == 2
+    assert [r[2] for r in results] == ["stub", "stub"]
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call(provider):
+    async def run():
+        provider["release"] = asyncio.Event()
+        dropped = asyncio.ensure_future(stt.transcribe_upload_bytes(b"clip", "fr"))
+        kept = asyncio.ensure_future(stt.transcribe_upload_bytes(b"clip", "fr"))
+        await asyncio.sleep(0)
+        dropped.cancel()
+        provider["release"].set()
+        return await kept
+
+    assert asyncio.run(run()) == ("bonjour", 0.9, "openai-whisper")
+    assert provider["calls"] == 1